@@ -1,7 +1,10 @@
 import logging
 
+from ably.realtime.pool import AblyRealtimePool
 from ably.realtime.realtime import AblyRealtime
+from ably.realtime.threaded import AblyRealtimeThreaded
 from ably.rest.auth import Auth
+from ably.rest.outbox import Outbox
 from ably.rest.push import Push
 from ably.rest.rest import AblyRest
 from ably.types.annotation import Annotation, AnnotationAction
@@ -11,11 +14,14 @@ from ably.types.channeloptions import ChannelOptions
 from ably.types.channelsubscription import PushChannelSubscription
 from ably.types.device import DeviceDetails
 from ably.types.message import MessageAction, MessageVersion
+from ably.types.messagefilter import MessageFilter
 from ably.types.operations import MessageOperation, PublishResult, UpdateDeleteResult
-from ably.types.options import Options, VCDiffDecoder
+from ably.types.options import Options, VCDiffDecoder, VCDiffEncoder
+from ably.types.recoverykey import RecoveryKeyContext
 from ably.util.crypto import CipherParams
 from ably.util.exceptions import AblyAuthException, AblyException, IncompatibleClientIdException
 from ably.vcdiff.defaultvcdiffdecoder import AblyVCDiffDecoder
+from ably.vcdiff.defaultvcdiffencoder import AblyVCDiffEncoder
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -1,5 +1,4 @@
 import functools
-import json
 import logging
 import time
 from urllib.parse import urljoin
@@ -10,6 +9,7 @@ import msgpack
 from ably.http.httputils import HttpUtils
 from ably.rest.auth import Auth
 from ably.transport.defaults import Defaults
+from ably.util import serializer
 from ably.util.exceptions import AblyException
 from ably.util.helper import extract_url_params, is_token_error
 
@@ -102,7 +102,7 @@ class Response:
             if content_type.startswith('application/x-msgpack'):
                 return msgpack.unpackb(content)
             elif content_type.startswith('application/json'):
-                return self.__response.json()
+                return serializer.loads(content)
 
         raise ValueError("Unsupported content type")
 
@@ -138,7 +138,7 @@ class Http:
         if self.options.use_binary_protocol:
             return msgpack.packb(body, use_bin_type=False)
         else:
-            return json.dumps(body, separators=(',', ':'))
+            return serializer.dumps(body)
 
     def get_hosts(self):
         hosts = self.options.get_hosts()
@@ -229,6 +229,9 @@ class RealtimeAnnotations:
         else:
             raise ValueError('invalid unsubscribe arguments')
 
+    def _has_subscribers(self) -> bool:
+        return self.__subscriptions._listener_count() > 0
+
     def _process_incoming(self, incoming_annotations):
         """
         Process incoming annotations from the server.
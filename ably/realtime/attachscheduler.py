@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from ably.types.connectionstate import ConnectionState
+
+if TYPE_CHECKING:
+    from ably.realtime.channel import RealtimeChannel
+    from ably.realtime.realtime import AblyRealtime
+
+log = logging.getLogger(__name__)
+
+
+class AttachScheduler:
+    """Sends pending ATTACH/DETACH requests for all channels of a connection
+
+    Channels waiting to attach or detach are queued and sent in order from a single task, with at most
+    `max_concurrent_attaches` requests awaiting a response at any time and, if `max_attaches_per_second`
+    is set, requests spaced evenly at that rate. Outstanding requests share one timeout sweep instead of
+    each channel running its own timer.
+    """
+
+    def __init__(self, realtime: AblyRealtime):
+        self.__realtime = realtime
+        # Insertion-ordered sets of channels
+        self.__queue: dict[RealtimeChannel, None] = {}
+        # Channel -> loop time at which its request times out. Every request gets the same timeout, so
+        # insertion order is also deadline order and the first entry is always the next one to expire.
+        self.__in_flight: dict[RealtimeChannel, float] = {}
+        self.__drain_task: asyncio.Task | None = None
+        self.__sweep_task: asyncio.Task | None = None
+        # Loop time before which the next request is not sent, with max_attaches_per_second
+        self.__next_send_time = 0.0
+
+    @property
+    def queued_count(self) -> int:
+        """Number of channels waiting for their ATTACH/DETACH to be sent"""
+        return len(self.__queue)
+
+    @property
+    def in_flight_count(self) -> int:
+        """Number of channels that sent ATTACH/DETACH and are awaiting a response"""
+        return len(self.__in_flight)
+
+    def schedule(self, channel: RealtimeChannel) -> None:
+        """Queues the channel's pending ATTACH or DETACH request to be sent"""
+        if channel in self.__queue:
+            return
+        self.__queue[channel] = None
+        self.__start_drain()
+
+    def complete(self, channel: RealtimeChannel) -> None:
+        """Called once the channel left ATTACHING/DETACHING, freeing its slot"""
+        self.__queue.pop(channel, None)
+        if self.__in_flight.pop(channel, None) is None:
+            return
+        if self.__queue:
+            self.__start_drain()
+        elif not self.__in_flight and self.__sweep_task and self.__sweep_task is not asyncio.current_task():
+            self.__sweep_task.cancel()
+            self.__sweep_task = None
+
+    def clear(self) -> None:
+        """Drops all queued and outstanding requests, once the connection is closed or failed"""
+        self.__queue.clear()
+        self.__in_flight.clear()
+        for task in (self.__drain_task, self.__sweep_task):
+            if task and not task.done():
+                task.cancel()
+        self.__drain_task = None
+        self.__sweep_task = None
+
+    def __start_drain(self) -> None:
+        if self.__drain_task is None or self.__drain_task.done():
+            self.__drain_task = asyncio.create_task(self.__drain())
+
+    def __start_sweep(self) -> None:
+        if self.__sweep_task is None or self.__sweep_task.done():
+            self.__sweep_task = asyncio.create_task(self.__sweep())
+
+    async def __drain(self) -> None:
+        connection_manager = self.__realtime.connection.connection_manager
+        options = self.__realtime.options
+        loop = asyncio.get_running_loop()
+
+        while self.__queue:
+            if connection_manager.state != ConnectionState.CONNECTED:
+                # Channels are rescheduled by Channels._on_connected once the connection is back
+                log.debug('AttachScheduler.drain(): connection not connected, dropping queued requests')
+                self.__queue.clear()
+                return
+
+            limit = options.max_concurrent_attaches
+            if limit and len(self.__in_flight) >= limit:
+                # Resumed by complete() once a slot frees up
+                return
+
+            rate = options.max_attaches_per_second
+            if rate:
+                delay = self.__next_send_time - loop.time()
+                if delay > 0:
+                    # The connection and queue may have changed by then, so they are checked again
+                    await asyncio.sleep(delay)
+                    continue
+
+            channel = next(iter(self.__queue))
+            del self.__queue[channel]
+
+            message = channel._pending_state_message()
+            if message is None:
+                continue
+
+            if rate:
+                self.__next_send_time = max(self.__next_send_time, loop.time()) + 1 / rate
+
+            # A request resent while still outstanding, as when the connection comes back before the
+            # response, keeps its deadline, as a per-channel timer would. Channels that changed state
+            # since were removed by complete() and get a new one.
+            if channel not in self.__in_flight:
+                self.__in_flight[channel] = loop.time() + options.realtime_request_timeout / 1000
+                self.__start_sweep()
+
+            try:
+                await connection_manager.send_protocol_message(message)
+            except Exception as e:
+                log.exception(f'AttachScheduler.drain(): failed to send request for channel {channel.name}: {e}')
+
+    async def __sweep(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while self.__in_flight:
+            channel, deadline = next(iter(self.__in_flight.items()))
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            del self.__in_flight[channel]
+            log.debug(f'AttachScheduler.sweep(): request timed out for channel {channel.name}')
+            try:
+                channel._timeout_pending_state()
+            except Exception as e:
+                log.exception(f'AttachScheduler.sweep(): error handling timeout for channel {channel.name}: {e}')
+
+            # The channel was already removed, so complete() did not resume the queue for its free slot
+            if self.__queue:
+                self.__start_drain()
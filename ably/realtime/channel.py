@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import logging
+import re
+import time
+from collections import deque
 from typing import TYPE_CHECKING
 
 from ably.realtime.annotations import RealtimeAnnotations
+from ably.realtime.attachscheduler import AttachScheduler
 from ably.realtime.connection import ConnectionState
 from ably.realtime.presence import RealtimePresence
 from ably.rest.channel import Channel
@@ -16,9 +21,11 @@ from ably.types.channeloptions import ChannelOptions
 from ably.types.channelstate import ChannelState, ChannelStateChange
 from ably.types.flags import Flag, has_flag
 from ably.types.message import Message, MessageAction, MessageVersion
-from ably.types.mixins import DecodingContext
+from ably.types.messagefilter import MessageFilter
+from ably.types.mixins import ENC_VCDIFF, DecodingContext, EncodingContext
 from ably.types.operations import MessageOperation, PublishResult, UpdateDeleteResult
 from ably.types.presence import PresenceMessage
+from ably.util.crypto import get_cipher
 from ably.util.eventemitter import EventEmitter
 from ably.util.exceptions import AblyException, IncompatibleClientIdException
 from ably.util.helper import Timer, is_callable_or_coroutine, validate_message_size
@@ -28,6 +35,25 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+# Matches an optionally qualified channel name, e.g. "[?rewind=1]name" or "[meta]name"
+_qualified_channel_name = re.compile(r'^(\[([^?]*)(?:(.*))\])?(.+)$')
+
+
+def _decode_message_batch(encoded_batch: list[list[dict]], cipher_params, keep_bytes: bool) -> list:
+    """Decodes the messages of several protocol messages, in a decode executor
+
+    Returns the messages of each protocol message, or the AblyException raised decoding them.
+    """
+    cipher = get_cipher(cipher_params) if cipher_params is not None else None
+    context = DecodingContext(keep_bytes=keep_bytes)
+    results = []
+    for encoded_messages in encoded_batch:
+        try:
+            results.append(Message.from_encoded_array(encoded_messages, cipher=cipher, context=context))
+        except Exception as e:
+            results.append(AblyException.from_exception(e))
+    return results
+
 
 class RealtimeChannel(EventEmitter, Channel):
     """
@@ -60,7 +86,7 @@ class RealtimeChannel(EventEmitter, Channel):
         self.__realtime = realtime
         self.__state = ChannelState.INITIALIZED
         self.__message_emitter = EventEmitter()
-        self.__state_timer: Timer | None = None
+        self.__filtered_listeners: dict = {}
         self.__attach_resume = False
         self.__attach_serial: str | None = None
         self.__channel_serial: str | None = None
@@ -72,8 +98,23 @@ class RealtimeChannel(EventEmitter, Channel):
 
         # Delta-specific fields for RTL19/RTL20 compliance
         vcdiff_decoder = self.__realtime.options.vcdiff_decoder if self.__realtime.options.vcdiff_decoder else None
-        self.__decoding_context = DecodingContext(vcdiff_decoder=vcdiff_decoder)
+        self.__decoding_context = DecodingContext(
+            vcdiff_decoder=vcdiff_decoder, keep_bytes=self.__realtime.options.binary_as_bytes
+        )
+        vcdiff_encoder = self.__realtime.options.vcdiff_encoder
+        self.__encoding_context = EncodingContext(vcdiff_encoder) if vcdiff_encoder else None
         self.__decode_failure_recovery_in_progress = False
+        # Protocol messages waiting to be delivered in order, each batch with the future of its messages
+        # when decoded by a decode executor, or None to be decoded when reached, and the epoch it arrived in
+        self.__incoming_messages: deque[tuple[list[dict], asyncio.Future | None, int]] = deque()
+        self.__incoming_task: asyncio.Task | None = None
+        # Advanced by each ATTACHED, whose channel serial supersedes those of the messages received before
+        self.__incoming_epoch = 0
+        # Messages received before this epoch belong to an attachment that has ended, and are dropped
+        self.__live_epoch = 0
+        # Protocol messages to be decoded together by the decode executor
+        self.__decode_batch: list[dict] = []
+        self.__decode_batch_handle: asyncio.Handle | None = None
 
         # Used to listen to state changes internally, if we use the public event emitter interface then internals
         # will be disrupted if the user called .off() to remove all listeners
@@ -149,7 +190,9 @@ class RealtimeChannel(EventEmitter, Channel):
 
     def _attach_impl(self):
         log.debug("RealtimeChannel.attach_impl(): sending ATTACH protocol message")
+        self._send_message(self._attach_message())
 
+    def _attach_message(self) -> dict:
         # RTL4c
         attach_msg = {
             "action": ProtocolMessageAction.ATTACH,
@@ -164,7 +207,7 @@ class RealtimeChannel(EventEmitter, Channel):
         if self.__channel_serial:
             attach_msg["channelSerial"] = self.__channel_serial
 
-        self._send_message(attach_msg)
+        return attach_msg
 
     # RTL5
     async def detach(self) -> None:
@@ -218,15 +261,15 @@ class RealtimeChannel(EventEmitter, Channel):
 
     def _detach_impl(self) -> None:
         log.debug("RealtimeChannel.detach_impl(): sending DETACH protocol message")
+        self._send_message(self._detach_message())
 
+    def _detach_message(self) -> dict:
         # RTL5d
-        detach_msg = {
+        return {
             "action": ProtocolMessageAction.DETACH,
             "channel": self.__name,
         }
 
-        self._send_message(detach_msg)
-
     # RTL7
     async def subscribe(self, *args) -> None:
         """Subscribe to a channel
@@ -242,8 +285,11 @@ class RealtimeChannel(EventEmitter, Channel):
         *args: event, listener
             Subscribe event and listener
 
-            arg1(event): str, optional
-                Subscribe to messages with the given event name
+            arg1(event): str or MessageFilter, optional
+                Subscribe to messages with the given event name, or to messages matching the given
+                MessageFilter (RTL22). Filters are evaluated on the client; to have Ably drop
+                non-matching messages before they are sent, use a channel obtained from
+                Channels.get_derived() with the filter's expression.
 
             arg2(listener): callable
                 Subscribe to all messages on the channel
@@ -257,13 +303,17 @@ class RealtimeChannel(EventEmitter, Channel):
         ValueError
             If no valid subscribe arguments are passed
         """
-        if isinstance(args[0], str):
+        message_filter = None
+        if isinstance(args[0], (str, MessageFilter, dict)):
             event = args[0]
-            if not args[1]:
+            if len(args) < 2 or not args[1]:
                 raise ValueError("channel.subscribe called without listener")
             if not is_callable_or_coroutine(args[1]):
                 raise ValueError("subscribe listener must be function or coroutine function")
             listener = args[1]
+            if not isinstance(event, str):
+                message_filter = event if isinstance(event, MessageFilter) else MessageFilter.from_dict(event)
+                event = None
         elif is_callable_or_coroutine(args[0]):
             listener = args[0]
             event = None
@@ -272,7 +322,10 @@ class RealtimeChannel(EventEmitter, Channel):
 
         log.info(f'RealtimeChannel.subscribe called, channel = {self.name}, event = {event}')
 
-        if event is not None:
+        if message_filter is not None:
+            # RTL22
+            self.__message_emitter.on(self.__add_filtered_listener(message_filter, listener))
+        elif event is not None:
             # RTL7b
             self.__message_emitter.on(event, listener)
         else:
@@ -282,6 +335,34 @@ class RealtimeChannel(EventEmitter, Channel):
         # RTL7c
         await self.attach()
 
+    def __add_filtered_listener(self, message_filter: MessageFilter, listener):
+        if asyncio.iscoroutinefunction(listener):
+            async def filtered_listener(message):
+                if message_filter.matches(message):
+                    await listener(message)
+        else:
+            def filtered_listener(message):
+                if message_filter.matches(message):
+                    listener(message)
+
+        self.__filtered_listeners.setdefault(listener, []).append((message_filter, filtered_listener))
+        return filtered_listener
+
+    def __remove_filtered_listeners(self, listener, message_filter: MessageFilter | None = None) -> None:
+        entries = self.__filtered_listeners.get(listener)
+        if not entries:
+            return
+        remaining = []
+        for entry_filter, filtered_listener in entries:
+            if message_filter is None or entry_filter == message_filter:
+                self.__message_emitter.off(filtered_listener)
+            else:
+                remaining.append((entry_filter, filtered_listener))
+        if remaining:
+            self.__filtered_listeners[listener] = remaining
+        else:
+            del self.__filtered_listeners[listener]
+
     # RTL8
     def unsubscribe(self, *args) -> None:
         """Unsubscribe from a channel
@@ -294,8 +375,8 @@ class RealtimeChannel(EventEmitter, Channel):
         *args: event, listener
             Unsubscribe event and listener
 
-            arg1(event): str, optional
-                Unsubscribe to messages with the given event name
+            arg1(event): str or MessageFilter, optional
+                Unsubscribe to messages with the given event name or MessageFilter
 
             arg2(listener): callable
                 Unsubscribe to all messages on the channel
@@ -308,16 +389,20 @@ class RealtimeChannel(EventEmitter, Channel):
             If no valid unsubscribe arguments are passed, no listener or listener is not a function
             or coroutine
         """
+        message_filter = None
         if len(args) == 0:
             event = None
             listener = None
-        elif isinstance(args[0], str):
+        elif isinstance(args[0], (str, MessageFilter, dict)):
             event = args[0]
-            if not args[1]:
+            if len(args) < 2 or not args[1]:
                 raise ValueError("channel.unsubscribe called without listener")
             if not is_callable_or_coroutine(args[1]):
                 raise ValueError("unsubscribe listener must be a function or coroutine function")
             listener = args[1]
+            if not isinstance(event, str):
+                message_filter = event if isinstance(event, MessageFilter) else MessageFilter.from_dict(event)
+                event = None
         elif is_callable_or_coroutine(args[0]):
             listener = args[0]
             event = None
@@ -329,12 +414,17 @@ class RealtimeChannel(EventEmitter, Channel):
         if listener is None:
             # RTL8c
             self.__message_emitter.off()
+            self.__filtered_listeners.clear()
+        elif message_filter is not None:
+            # RTL22
+            self.__remove_filtered_listeners(listener, message_filter)
         elif event is not None:
             # RTL8b
             self.__message_emitter.off(event, listener)
         else:
             # RTL8a
             self.__message_emitter.off(listener)
+            self.__remove_filtered_listeners(listener)
 
     # RTL6
     async def publish(self, *args, **kwargs) -> PublishResult:
@@ -358,6 +448,23 @@ class RealtimeChannel(EventEmitter, Channel):
         ValueError
             If invalid arguments are provided
         """
+        encoding_context = self.__encoding_context if not self.cipher else None
+        sending = self.__realtime.connection.connection_manager.send_protocol_message(self.__publish_message(args))
+        # The message may be spilled to disk while queued, so no reference to its payload is kept here
+        del args
+        self.__realtime.channels._touch(self.name)
+
+        # RTL6b: Await acknowledgment from server
+        try:
+            return await sending
+        except AblyException:
+            # Subscribers never see a rejected payload, so the next one is published in full
+            if encoding_context is not None:
+                encoding_context.reset()
+            raise
+
+    def __publish_message(self, args: tuple) -> dict:
+        """Builds the protocol message publishing the given messages, as passed to publish()"""
         messages = []
 
         # RTL6i: Parse arguments - expect Message object, array of Messages, or name and data
@@ -424,21 +531,22 @@ class RealtimeChannel(EventEmitter, Channel):
         # RTL6c: Check connection and channel state
         self._throw_if_unpublishable_state()
 
+        # Deltas of the previous payload, once the messages are known to be sent
+        encoding_context = self.__encoding_context if not self.cipher else None
+        if encoding_context is not None:
+            encoded_messages = encoding_context.encode(encoded_messages, self.ably.options.use_binary_protocol)
+
         log.info(
             f'RealtimeChannel.publish(): sending message; '
             f'channel = {self.name}, state = {self.state}, message count = {len(encoded_messages)}'
         )
 
-        # Send protocol message
-        protocol_message = {
+        return {
             "action": ProtocolMessageAction.MESSAGE,
             "channel": self.name,
             "messages": encoded_messages,
         }
 
-        # RTL6b: Await acknowledgment from server
-        return await self.__realtime.connection.connection_manager.send_protocol_message(protocol_message)
-
     def _throw_if_unpublishable_state(self) -> None:
         """Check if the channel and connection are in a state that allows publishing
 
@@ -703,6 +811,9 @@ class RealtimeChannel(EventEmitter, Channel):
             resumed = False
             has_presence = False
 
+            # Messages received before are still delivered, but no longer set the channel serial
+            self.__submit_decode_batch()
+            self.__incoming_epoch += 1
             self.__attach_serial = channel_serial
             self.__channel_serial = channel_serial
             self.__params = proto_msg.get('params')
@@ -727,6 +838,7 @@ class RealtimeChannel(EventEmitter, Channel):
             else:
                 log.warn("RealtimeChannel._on_message(): ATTACHED received while not attaching")
         elif action == ProtocolMessageAction.DETACHED:
+            self.__discard_incoming_messages()
             if self.state == ChannelState.DETACHING:
                 self._notify_state(ChannelState.DETACHED)
             elif self.state == ChannelState.ATTACHING:
@@ -734,19 +846,20 @@ class RealtimeChannel(EventEmitter, Channel):
             else:
                 self._request_state(ChannelState.ATTACHING)
         elif action == ProtocolMessageAction.MESSAGE:
-            messages = []
-            try:
-                messages = Message.from_encoded_array(proto_msg.get('messages'),
-                                                      cipher=self.cipher, context=self.__decoding_context)
-                self.__decoding_context.last_message_id = messages[-1].id
-                self.__channel_serial = channel_serial
-            except AblyException as e:
-                if e.code == 40018:  # Delta decode failure - start recovery
-                    self._start_decode_failure_recovery(e)
-                else:
-                    log.error(f"Message processing error {e}. Skip messages {proto_msg.get('messages')}")
-            for message in messages:
-                self.__message_emitter._emit(message.name, message)
+            if self.__should_decode_in_executor(proto_msg):
+                self.__add_to_decode_batch(proto_msg)
+            elif (self.__incoming_task is not None or self.__decode_batch
+                  or self.__should_decode_in_thread(proto_msg)):
+                self.__submit_decode_batch()
+                self.__queue_incoming([proto_msg])
+            else:
+                messages = []
+                try:
+                    messages = self.__decode_messages(proto_msg)
+                    self.__on_messages_decoded(proto_msg, messages, self.__incoming_epoch)
+                except AblyException as e:
+                    self.__on_decode_error(proto_msg, e)
+                self.__deliver_messages(messages)
         elif action == ProtocolMessageAction.PRESENCE:
             # Handle PRESENCE messages
             presence_messages = proto_msg.get('presence', [])
@@ -775,6 +888,145 @@ class RealtimeChannel(EventEmitter, Channel):
             error = AblyException.from_dict(proto_msg.get('error'))
             self._notify_state(ChannelState.FAILED, reason=error)
 
+    def __decode_messages(self, proto_msg: dict) -> list[Message]:
+        # May run in a worker thread, so the channel state is only updated by __on_messages_decoded()
+        return Message.from_encoded_array(proto_msg.get('messages'),
+                                          cipher=self.cipher, context=self.__decoding_context)
+
+    def __on_messages_decoded(self, proto_msg: dict, messages: list[Message], epoch: int) -> None:
+        if messages:
+            self.__decoding_context.last_message_id = messages[-1].id
+        if epoch == self.__incoming_epoch:
+            self.__channel_serial = proto_msg.get('channelSerial')
+
+    def __discard_incoming_messages(self) -> None:
+        """Drops the messages waiting to be delivered, which belong to an attachment that has ended"""
+        self.__incoming_epoch += 1
+        self.__live_epoch = self.__incoming_epoch
+        if self.__decode_batch_handle is not None:
+            self.__decode_batch_handle.cancel()
+            self.__decode_batch_handle = None
+        self.__decode_batch = []
+        for _, decoded, _ in self.__incoming_messages:
+            if decoded is not None:
+                decoded.cancel()
+        self.__incoming_messages.clear()
+        if self.__incoming_task is not None:
+            self.__incoming_task.cancel()
+            self.__incoming_task = None
+
+    def __on_decode_error(self, proto_msg: dict, error: AblyException) -> None:
+        if error.code == 40018:  # Delta decode failure - start recovery
+            self._start_decode_failure_recovery(error)
+        else:
+            log.error(f"Message processing error {error}. Skip messages {proto_msg.get('messages')}")
+
+    def __deliver_messages(self, messages: list[Message]) -> None:
+        for message in messages:
+            self.__message_emitter._emit(message.name, message)
+
+    def __should_decode_in_thread(self, proto_msg: dict) -> bool:
+        """Whether the deltas in a protocol message are large enough to be decoded in a worker thread"""
+        threshold = self.__realtime.options.vcdiff_thread_threshold
+        if threshold is None or self.__decoding_context.vcdiff_decoder is None:
+            return False
+
+        deltas = [
+            message.get('data') for message in proto_msg.get('messages') or []
+            if ENC_VCDIFF in (message.get('encoding') or '')
+        ]
+        if not deltas:
+            return False
+
+        base_payload = self.__decoding_context.base_payload
+        size = len(base_payload) if base_payload is not None else 0
+        return size + sum(len(delta) for delta in deltas if delta is not None) >= threshold
+
+    def __should_decode_in_executor(self, proto_msg: dict) -> bool:
+        if self.__channel_options.decode_executor is None or self.__decoding_context.vcdiff_decoder is not None:
+            return False
+        messages = proto_msg.get('messages') or []
+        return not any(ENC_VCDIFF in (message.get('encoding') or '') for message in messages)
+
+    def __add_to_decode_batch(self, proto_msg: dict) -> None:
+        self.__decode_batch.append(proto_msg)
+        if len(self.__decode_batch) >= self.__channel_options.decode_batch_size:
+            self.__submit_decode_batch()
+        elif self.__decode_batch_handle is None:
+            # Messages received in the same loop iteration are batched, without waiting for more
+            self.__decode_batch_handle = asyncio.get_running_loop().call_soon(self.__submit_decode_batch)
+
+    def __submit_decode_batch(self) -> None:
+        if self.__decode_batch_handle is not None:
+            self.__decode_batch_handle.cancel()
+            self.__decode_batch_handle = None
+        if not self.__decode_batch:
+            return
+
+        batch, self.__decode_batch = self.__decode_batch, []
+        decoded = asyncio.get_running_loop().run_in_executor(
+            self.__channel_options.decode_executor,
+            _decode_message_batch,
+            [proto_msg.get('messages') for proto_msg in batch],
+            self.__channel_options.cipher,
+            self.__decoding_context.keep_bytes,
+        )
+        self.__queue_incoming(batch, decoded)
+
+    def __queue_incoming(self, proto_msgs: list[dict], decoded: asyncio.Future | None = None) -> None:
+        self.__incoming_messages.append((proto_msgs, decoded, self.__incoming_epoch))
+        if self.__incoming_task is None:
+            self.__incoming_task = asyncio.create_task(self.__process_incoming_messages())
+
+    async def __deliver_decoded_batch(self, proto_msgs: list[dict], decoded: asyncio.Future, epoch: int) -> None:
+        try:
+            results = await decoded
+        except Exception:
+            log.exception(f'Message processing error. Skip messages of {len(proto_msgs)} protocol messages')
+            return
+        if epoch < self.__live_epoch:
+            return
+
+        for proto_msg, result in zip(proto_msgs, results):
+            if isinstance(result, AblyException):
+                self.__on_decode_error(proto_msg, result)
+                continue
+            self.__on_messages_decoded(proto_msg, result, epoch)
+            self.__deliver_messages(result)
+
+    async def __process_incoming_messages(self) -> None:
+        """Decodes and delivers queued messages in order, decoding large deltas in a worker thread"""
+        loop = asyncio.get_running_loop()
+        try:
+            while self.__incoming_messages:
+                proto_msgs, decoded, epoch = self.__incoming_messages.popleft()
+                if epoch < self.__live_epoch:
+                    continue
+                if decoded is not None:
+                    await self.__deliver_decoded_batch(proto_msgs, decoded, epoch)
+                    continue
+
+                proto_msg = proto_msgs[0]
+                messages = []
+                try:
+                    # Decided as each message is reached, as it depends on the base payload before it
+                    if self.__should_decode_in_thread(proto_msg):
+                        messages = await loop.run_in_executor(None, self.__decode_messages, proto_msg)
+                        if epoch < self.__live_epoch:
+                            continue
+                    else:
+                        messages = self.__decode_messages(proto_msg)
+                    self.__on_messages_decoded(proto_msg, messages, epoch)
+                except AblyException as e:
+                    self.__on_decode_error(proto_msg, e)
+                except Exception:
+                    log.exception(f"Message processing error. Skip messages {proto_msg.get('messages')}")
+                self.__deliver_messages(messages)
+        finally:
+            # A cancelled task may finish after the next one started
+            if self.__incoming_task is asyncio.current_task():
+                self.__incoming_task = None
+
     def _request_state(self, state: ChannelState) -> None:
         log.debug(f'RealtimeChannel._request_state(): state = {state}')
         self._notify_state(state)
@@ -784,7 +1036,7 @@ class RealtimeChannel(EventEmitter, Channel):
                       resumed: bool = False, has_presence: bool = False) -> None:
         log.debug(f'RealtimeChannel._notify_state(): state = {state}')
 
-        self.__clear_state_timer()
+        self.__complete_pending_state()
 
         if state == self.state:
             return
@@ -813,9 +1065,14 @@ class RealtimeChannel(EventEmitter, Channel):
         if state != ChannelState.ATTACHING:
             self.__decode_failure_recovery_in_progress = False
 
+        # Messages queued before the attachment changed are not delivered after it
+        if self.__state == ChannelState.ATTACHED or state in (
+                ChannelState.ATTACHED, ChannelState.DETACHED, ChannelState.SUSPENDED, ChannelState.FAILED):
+            self.__discard_incoming_messages()
+
         state_change = ChannelStateChange(self.__state, state, resumed, reason=reason)
 
-        self.__state = state
+        self.__set_state(state)
         self._emit(state, state_change)
         self.__internal_state_emitter._emit(state, state_change)
 
@@ -832,28 +1089,23 @@ class RealtimeChannel(EventEmitter, Channel):
             log.debug(f"RealtimeChannel._check_pending_state(): connection state = {connection_state}")
             return
 
+        if self.state in (ChannelState.ATTACHING, ChannelState.DETACHING):
+            # The ATTACH/DETACH is sent, and timed out, by the connection-wide attach scheduler
+            self.__realtime.channels._attach_scheduler.schedule(self)
+
+    def _pending_state_message(self) -> dict | None:
         if self.state == ChannelState.ATTACHING:
-            self.__start_state_timer()
-            self._attach_impl()
+            log.debug("RealtimeChannel._pending_state_message(): sending ATTACH protocol message")
+            return self._attach_message()
         elif self.state == ChannelState.DETACHING:
-            self.__start_state_timer()
-            self._detach_impl()
-
-    def __start_state_timer(self) -> None:
-        if not self.__state_timer:
-            def on_timeout() -> None:
-                log.debug('RealtimeChannel.start_state_timer(): timer expired')
-                self.__state_timer = None
-                self.__timeout_pending_state()
-
-            self.__state_timer = Timer(self.__realtime.options.realtime_request_timeout, on_timeout)
+            log.debug("RealtimeChannel._pending_state_message(): sending DETACH protocol message")
+            return self._detach_message()
+        return None
 
-    def __clear_state_timer(self) -> None:
-        if self.__state_timer:
-            self.__state_timer.cancel()
-            self.__state_timer = None
+    def __complete_pending_state(self) -> None:
+        self.__realtime.channels._attach_scheduler.complete(self)
 
-    def __timeout_pending_state(self) -> None:
+    def _timeout_pending_state(self) -> None:
         if self.state == ChannelState.ATTACHING:
             self._notify_state(
                 ChannelState.SUSPENDED, reason=AblyException("Channel attach timed out", 408, 90007))
@@ -879,11 +1131,40 @@ class RealtimeChannel(EventEmitter, Channel):
             log.info("RealtimeChannel retry timer expired, attempting a new attach")
             self._request_state(ChannelState.ATTACHING)
 
+    def _is_idle(self) -> bool:
+        """Whether the channel can be released without anyone noticing
+
+        That is, nothing listens to its messages, state, presence or annotations, no presence members were
+        entered through it and no attach or detach is being awaited.
+        """
+        return (
+            self._listener_count() == 0
+            and self.__message_emitter._listener_count() == 0
+            and self.__internal_state_emitter._listener_count() == 0
+            and self.__presence._is_idle()
+            and not self.annotations._has_subscribers()
+        )
+
+    def _has_options(self) -> bool:
+        """Whether the channel has options other than the defaults, which are lost if it is released"""
+        return self.__channel_options != ChannelOptions()
+
+    def _release(self) -> None:
+        """Removes all listeners and stops any retry timer, once the channel is released"""
+        self.__cancel_retry_timer()
+        self.off()
+        self.unsubscribe()
+        self.__presence.unsubscribe()
+        self.annotations.unsubscribe()
+
     def should_reattach_to_set_options(self, new_options: ChannelOptions) -> bool:
         """Internal method"""
         if self.state != ChannelState.ATTACHING and self.state != ChannelState.ATTACHED:
             return False
-        return self.__channel_options != new_options
+        # The decode executor and batch size only apply locally
+        old_options = self.__channel_options
+        return (old_options.cipher != new_options.cipher or old_options.params != new_options.params
+                or old_options.modes != new_options.modes)
 
     # RTL23
     @property
@@ -899,7 +1180,12 @@ class RealtimeChannel(EventEmitter, Channel):
 
     @state.setter
     def state(self, state: ChannelState) -> None:
+        self.__set_state(state)
+
+    def __set_state(self, state: ChannelState) -> None:
+        previous = self.__state
         self.__state = state
+        self.__realtime.channels._on_channel_state_change(self, previous, state)
 
     # RTL24
     @property
@@ -926,6 +1212,14 @@ class RealtimeChannel(EventEmitter, Channel):
         """Get the list of channel modes"""
         return self.__modes
 
+    @property
+    def _channel_serial(self) -> str | None:
+        return self.__channel_serial
+
+    @_channel_serial.setter
+    def _channel_serial(self, channel_serial: str | None) -> None:
+        self.__channel_serial = channel_serial
+
     def _start_decode_failure_recovery(self, error: AblyException) -> None:
         """Start RTL18 decode failure recovery procedure"""
 
@@ -970,6 +1264,16 @@ class Channels(RestChannels):
         Releases a channel
     """
 
+    def __init__(self, realtime: AblyRealtime):
+        super().__init__(realtime)
+        self._attach_scheduler = AttachScheduler(realtime)
+        # Channels indexed by state, so connection state changes only visit the channels they affect
+        self.__by_state: dict[ChannelState, dict[RealtimeChannel, None]] = {state: {} for state in ChannelState}
+        # Names of channels being detached, to be released once detached
+        self.__releasing: set[str] = set()
+        # Names of the channels being released which were evicted, counted once released
+        self.__evicting: set[str] = set()
+
     # RTS3
     def get(self, name: str, options: ChannelOptions | None = None, **kwargs) -> RealtimeChannel:
         """Creates a new RealtimeChannel object, or returns the existing channel object.
@@ -990,8 +1294,10 @@ class Channels(RestChannels):
         elif options and isinstance(options, dict):
             options = ChannelOptions.from_dict(options)
 
-        if name not in self.__all:
+        channel = self.__all.get(name)
+        if channel is None:
             channel = self.__all[name] = RealtimeChannel(self.__ably, name, options)
+            self.__by_state[channel.state][channel] = None
         else:
             channel = self.__all[name]
             # Update options if channel is not attached or currently attaching
@@ -1004,14 +1310,62 @@ class Channels(RestChannels):
                 )
             elif options:
                 channel.set_options_without_reattach(options)
+            # Using the channel again cancels a pending release
+            self.__releasing.discard(name)
+            self.__evicting.discard(name)
+        self._touch(name)
         return channel
 
+    # RTS5
+    def get_derived(self, name: str, derive_options: dict | MessageFilter,
+                    options: ChannelOptions | None = None, **kwargs) -> RealtimeChannel:
+        """Creates a new derived RealtimeChannel object, or returns the existing one.
+
+        A derived channel applies a filter expression on the Ably service, so only messages matching
+        the filter are delivered to the client.
+
+        Parameters
+        ----------
+
+        name: str
+            Channel name
+        derive_options: dict or MessageFilter
+            Either a MessageFilter, or a dict with a ``filter`` key holding a filter expression,
+            e.g. ``{'filter': 'name == `"foo"` && headers.region == `"eu"`'}``
+        options: ChannelOptions or dict, optional
+            Channel options for the channel
+        **kwargs:
+            Additional keyword arguments to create ChannelOptions (e.g., cipher, params)
+
+        Raises
+        ------
+        AblyException
+            If the channel name already carries a qualifier that cannot be combined with a filter
+        """
+        if isinstance(derive_options, MessageFilter):
+            expression = derive_options.to_expression()
+        else:
+            expression = (derive_options or {}).get('filter')
+
+        if expression:
+            match = _qualified_channel_name.match(name)
+            if not match:
+                raise AblyException('regex match failed', 400, 40010)
+            # RTS5a1
+            if match.group(2):
+                raise AblyException(f'cannot use a derived option with a {match.group(2)} channel', 400, 40010)
+            # RTS5a2
+            encoded_filter = base64.b64encode(expression.encode('utf-8')).decode('ascii')
+            name = f'[filter={encoded_filter}{match.group(3) or ""}]{match.group(4)}'
+
+        return self.get(name, options, **kwargs)
+
     # RTS4
     def release(self, name: str) -> None:
         """Releases a RealtimeChannel object, deleting it, and enabling it to be garbage collected
 
-        It also removes any listeners associated with the channel.
-        To release a channel, the channel state must be INITIALIZED, DETACHED, or FAILED.
+        It also removes any listeners associated with the channel. An attached channel is detached first,
+        and released once the detach completes; getting the channel again before then cancels the release.
 
 
         Parameters
@@ -1019,24 +1373,82 @@ class Channels(RestChannels):
         name: str
             Channel name
         """
-        if name not in self.__all:
+        channel = self.__all.get(name)
+        if channel is None:
             return
-        del self.__all[name]
+
+        if channel.state in (ChannelState.ATTACHING, ChannelState.ATTACHED, ChannelState.DETACHING):
+            self.__releasing.add(name)
+            if channel.state != ChannelState.DETACHING:
+                channel._request_state(ChannelState.DETACHING)
+            return
+
+        self.__remove(channel)
+
+    def __remove(self, channel: RealtimeChannel) -> None:
+        super().release(channel.name)
+        self.__by_state[channel.state].pop(channel, None)
+        self.__releasing.discard(channel.name)
+        if channel.name in self.__evicting:
+            self.__evicting.discard(channel.name)
+            self._count_eviction(channel.name)
+        self._attach_scheduler.complete(channel)
+        channel._release()
+
+    def _evict(self, channel: RealtimeChannel) -> bool:
+        # Channels being attached or detached are in use by whoever asked for it
+        if channel.state in (ChannelState.ATTACHING, ChannelState.DETACHING) or not channel._is_idle():
+            return False
+        if channel.name in self.__releasing:
+            return True
+        self.__evicting.add(channel.name)
+        self.release(channel.name)
+        return True
+
+    def _has_options(self, channel: RealtimeChannel) -> bool:
+        return channel._has_options()
+
+    def count_by_state(self) -> dict[ChannelState, int]:
+        """Returns the number of live channels in each state"""
+        return {state: len(channels) for state, channels in self.__by_state.items()}
+
+    def _channels_in_states(self, *states: ChannelState) -> list[RealtimeChannel]:
+        """Returns a snapshot of the channels currently in any of the given states"""
+        return [channel for state in states for channel in self.__by_state[state]]
+
+    def _on_channel_state_change(self, channel: RealtimeChannel, previous: ChannelState,
+                                 current: ChannelState) -> None:
+        by_previous = self.__by_state[previous]
+        if channel not in by_previous:
+            # Released channels are no longer tracked
+            return
+        del by_previous[channel]
+        self.__by_state[current][channel] = None
+
+        if channel.name in self.__releasing and current != ChannelState.DETACHING:
+            if current in (ChannelState.DETACHED, ChannelState.SUSPENDED, ChannelState.FAILED,
+                           ChannelState.INITIALIZED):
+                self.__remove(channel)
+            else:
+                # The detach failed or was superseded by an attach, so keep the channel
+                self.__releasing.discard(channel.name)
+                self.__evicting.discard(channel.name)
+                options = self.__ably.options
+                if options.channel_idle_timeout or options.max_channels:
+                    self.__last_used[channel.name] = time.monotonic()
 
     def _on_channel_message(self, msg: dict) -> None:
         channel_name = msg.get('channel')
         if not channel_name:
             log.error(
-                'Channels.on_channel_message()',
-                f'received event without channel, action = {msg.get("action")}'
+                f'Channels.on_channel_message(): received event without channel, action = {msg.get("action")}'
             )
             return
 
-        channel = self.__all[channel_name]
-        if not channel:
+        channel = self.__all.get(channel_name)
+        if channel is None:
             log.warning(
-                'Channels.on_channel_message()',
-                f'receieved event for non-existent channel: {channel_name}'
+                f'Channels.on_channel_message(): received event for non-existent channel: {channel_name}'
             )
             return
 
@@ -1057,22 +1469,40 @@ class Channels(RestChannels):
             ConnectionState.SUSPENDED: ChannelState.SUSPENDED,
         }
 
-        for channel_name in self.__all:
-            channel = self.__all[channel_name]
-            if channel.state in from_channel_states:
-                channel._notify_state(connection_to_channel_state[state], reason)
+        new_channel_state = connection_to_channel_state[state]
+        for channel in self._channels_in_states(*from_channel_states):
+            channel._notify_state(new_channel_state, reason)
+
+        if state in (ConnectionState.CLOSED, ConnectionState.FAILED):
+            # No response can arrive any more, so nothing may time out on the channels of a closed client
+            self._attach_scheduler.clear()
 
     def _on_connected(self) -> None:
-        for channel_name in self.__all:
-            channel = self.__all[channel_name]
-            if channel.state == ChannelState.ATTACHING or channel.state == ChannelState.DETACHING:
-                channel._check_pending_state()
-            elif channel.state == ChannelState.SUSPENDED:
-                asyncio.create_task(channel.attach())
-            elif channel.state == ChannelState.ATTACHED:
+        for channel in self._channels_in_states(ChannelState.ATTACHING, ChannelState.DETACHING):
+            channel._check_pending_state()
+        for channel in self._channels_in_states(ChannelState.SUSPENDED, ChannelState.ATTACHED):
+            channel._request_state(ChannelState.ATTACHING)
+
+    def _channel_serials(self) -> dict[str, str]:
+        """Returns the channel serial of each attached channel, for the recovery key"""
+        return {
+            channel.name: channel._channel_serial
+            for channel in self._channels_in_states(ChannelState.ATTACHED)
+            if channel._channel_serial
+        }
+
+    def _restore(self, channel_serials: dict[str, str]) -> None:
+        """Gets the channels of a recovered connection and requests that they attach from their channel serials
+
+        The attaches are sent in one pass once the connection is CONNECTED.
+        """
+        for name, channel_serial in channel_serials.items():
+            channel = self.get(name)
+            channel._channel_serial = channel_serial
+            if channel.state == ChannelState.INITIALIZED:
                 channel._request_state(ChannelState.ATTACHING)
 
     def _initialize_channels(self) -> None:
-        for channel_name in self.__all:
-            channel = self.__all[channel_name]
+        non_initialized_states = [state for state in ChannelState if state != ChannelState.INITIALIZED]
+        for channel in self._channels_in_states(*non_initialized_states):
             channel._request_state(ChannelState.INITIALIZED)
@@ -8,6 +8,7 @@ from typing import TYPE_CHECKING
 from ably.realtime.connectionmanager import ConnectionManager
 from ably.types.connectiondetails import ConnectionDetails
 from ably.types.connectionstate import ConnectionEvent, ConnectionState, ConnectionStateChange
+from ably.types.recoverykey import RecoveryKeyContext
 from ably.util.eventemitter import EventEmitter
 from ably.util.exceptions import AblyException
 
@@ -38,6 +39,10 @@ class Connection(EventEmitter):  # RTN4
         Closes a realtime connection
     ping()
         Pings a realtime connection
+    create_recovery_key()
+        Returns a key to recover the connection from another client
+    save_recovery_key(path)
+        Saves the recovery key to a file
     """
 
     def __init__(self, realtime: AblyRealtime):
@@ -87,6 +92,27 @@ class Connection(EventEmitter):  # RTN4
         """
         return await self.__connection_manager.ping()
 
+    # RTN16g
+    def create_recovery_key(self) -> str | None:
+        """Returns a key to recover this connection, with the state of its channels, from another client
+
+        Passed as the recover client option, for instance after the process restarts, the new client
+        resumes the connection and reattaches the channels from where this one left off. Returns None
+        when there is no connection to recover.
+        """
+        return self.__connection_manager.create_recovery_key()
+
+    def save_recovery_key(self, path: str) -> bool:
+        """Saves the recovery key to a file, to be read with RecoveryKeyContext.load(path)
+
+        Returns False, leaving any existing file as it is, when there is no connection to recover.
+        """
+        recovery_key = self.create_recovery_key()
+        if recovery_key is None:
+            return False
+        RecoveryKeyContext.save(path, recovery_key)
+        return True
+
     def _when_state(self, state: ConnectionState):
         if self.state == state:
             fut = asyncio.get_event_loop().create_future()
@@ -1,30 +1,40 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
+import time
 from collections import deque
 from datetime import datetime
 from itertools import zip_longest
 from typing import TYPE_CHECKING
 
 import httpx
+from websockets.exceptions import WebSocketException
 
+from ably.realtime.offlinequeue import OfflineQueue
 from ably.transport.defaults import Defaults
+from ably.transport.standby import StandbySocket
 from ably.transport.websockettransport import ProtocolMessageAction, WebSocketTransport
 from ably.types.connectiondetails import ConnectionDetails
 from ably.types.connectionerrors import ConnectionErrors
 from ably.types.connectionstate import ConnectionEvent, ConnectionState, ConnectionStateChange
 from ably.types.operations import PublishResult
+from ably.types.options import QUEUE_OVERFLOW_BLOCK, QUEUE_OVERFLOW_DROP_OLDEST, QUEUE_OVERFLOW_FAIL
+from ably.types.recoverykey import RecoveryKeyContext
 from ably.types.tokendetails import TokenDetails
 from ably.util.eventemitter import EventEmitter
 from ably.util.exceptions import AblyException, IncompatibleClientIdException
-from ably.util.helper import Timer, get_random_id, is_token_error
+from ably.util.helper import Timer, encoded_size, get_random_id, get_retry_delay, is_token_error
 
 if TYPE_CHECKING:
     from ably.realtime.realtime import AblyRealtime
 
 log = logging.getLogger(__name__)
 
+# Queued messages handed to the transport at a time on connection, without an outbound_high_water_mark
+_QUEUED_MESSAGES_CHUNK_SIZE = 1000
+
 
 class PendingMessage:
     """Represents a message awaiting acknowledgment from the server"""
@@ -32,6 +42,12 @@ class PendingMessage:
     def __init__(self, message: dict):
         self.message = message
         self.future: asyncio.Future[PublishResult] | None = None
+        # Size on the wire, counted against max_queued_bytes while queued
+        self.size = 0
+        # Whether the message has been handed to a transport
+        self.sent = False
+        # Offset and length of the message in the spill segment, while spilled
+        self.spilled: tuple[int, int] | None = None
         action = message.get('action')
 
         # Messages that require acknowledgment: MESSAGE, PRESENCE, ANNOTATION, OBJECT
@@ -137,10 +153,28 @@ class ConnectionManager(EventEmitter):
         self.connect_base_task: asyncio.Task | None = None
         self.disconnect_transport_task: asyncio.Task | None = None
         self.__fallback_hosts: list[str] = self.options.get_fallback_hosts()
-        self.queued_messages: deque[PendingMessage] = deque()
+        self.queued_messages: OfflineQueue = OfflineQueue(
+            self.options.max_queued_messages, self.options.max_queued_bytes, self.options.queue_spill_path
+        )
+        self.__queue_drained: asyncio.Event | None = None
+        # The transport the queued messages are being handed to, a chunk at a time
+        self.__replay_transport: WebSocketTransport | None = None
         self.__error_reason: AblyException | None = None
         self.msg_serial: int = 0
         self.pending_message_queue: PendingMessageQueue = PendingMessageQueue()
+        self.__connectivity_client: httpx.AsyncClient | None = None
+        self.__connectivity_checked_at: float | None = None
+        self.__connectivity_result: bool = False
+        self.__race: asyncio.Future[WebSocketTransport] | None = None
+        self.__standby: StandbySocket | None = None
+        self.__standby_task: asyncio.Task | None = None
+        self.__retry_attempt: int = 0
+        # RTN16f: the connection to recover on the first connection attempt, if any
+        self.__recovery: RecoveryKeyContext | None = None
+        if isinstance(self.options.recover, str):
+            self.__recovery = RecoveryKeyContext.decode(self.options.recover)
+            if self.__recovery is not None:
+                self.msg_serial = self.__recovery.msg_serial
         super().__init__()
 
     def enact_state_change(self, state: ConnectionState, reason: AblyException | None = None) -> None:
@@ -159,17 +193,43 @@ class ConnectionManager(EventEmitter):
             self.connection_id = None
             self.__connection_key = None
             self.msg_serial = 0
+            self.close_standby()
 
         self._emit('connectionstate', ConnectionStateChange(current_state, state, state, reason))
 
-    def check_connection(self) -> bool:
+    async def check_connection(self) -> bool:
+        """Check whether the internet is available, reusing a recent result
+
+        The result is cached for connectivity_check_cache_window milliseconds, so trying several
+        fallback hosts in a row costs a single request.
+        """
+        window = self.options.connectivity_check_cache_window / 1000
+        now = time.monotonic()
+        if self.__connectivity_checked_at is not None and now - self.__connectivity_checked_at < window:
+            return self.__connectivity_result
+
+        self.__connectivity_result = await self.__probe_connectivity()
+        self.__connectivity_checked_at = time.monotonic()
+        return self.__connectivity_result
+
+    async def __probe_connectivity(self) -> bool:
+        if self.__connectivity_client is None:
+            self.__connectivity_client = httpx.AsyncClient(
+                timeout=Defaults.connectivity_check_timeout / 1000
+            )
+        url = self.options.connectivity_check_url
         try:
-            response = httpx.get(self.options.connectivity_check_url)
+            response = await self.__connectivity_client.get(url)
             return 200 <= response.status_code < 300 and \
-                (self.options.connectivity_check_url != Defaults.connectivity_check_url or "yes" in response.text)
+                (url != Defaults.connectivity_check_url or "yes" in response.text)
         except httpx.HTTPError:
             return False
 
+    async def close_connectivity_client(self) -> None:
+        if self.__connectivity_client is not None:
+            client, self.__connectivity_client = self.__connectivity_client, None
+            await client.aclose()
+
     def get_state_error(self) -> AblyException:
         return ConnectionErrors[self.state]
 
@@ -179,6 +239,9 @@ class ConnectionManager(EventEmitter):
         params["v"] = protocol_version
         if self.connection_details:
             params["resume"] = self.connection_details.connection_key
+        elif self.__recovery is not None:
+            # RTN16k
+            params["recover"] = self.__recovery.connection_key
         # RTN2a: Set format to msgpack if use_binary_protocol is enabled
         if self.options.use_binary_protocol:
             params["format"] = "msgpack"
@@ -195,15 +258,18 @@ class ConnectionManager(EventEmitter):
         self.start_transition_timer(ConnectionState.CLOSING, fail_state=ConnectionState.CLOSED)
         if self.transport:
             # Try to send protocol CLOSE message in the background
-            asyncio.create_task(self.transport.close())
-            # Yield to event loop to give the close message a chance to send
-            await asyncio.sleep(0)
+            close_task = asyncio.create_task(self.transport.close())
+            # The close message is best effort, so a failure to send it is not reported
+            close_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            # Give the writer task a chance to send the close message
+            await asyncio.wait([close_task], timeout=self.__timeout_in_secs)
             await self.transport.dispose()  # Dispose transport resources
         if self.connect_base_task:
             self.connect_base_task.cancel()
         if self.disconnect_transport_task:
             await self.disconnect_transport_task
         self.cancel_retry_timer()
+        await self.close_connectivity_client()
 
         # Clear connection details to prevent resume on next connect
         # When explicitly closed, we want a fresh connection, not a resume
@@ -221,8 +287,16 @@ class ConnectionManager(EventEmitter):
         Returns:
             None
         """
-        state_should_queue = (self.state in
-                           (ConnectionState.INITIALIZED, ConnectionState.DISCONNECTED, ConnectionState.CONNECTING))
+        if self.transport is not None:
+            # Backpressure: wait while the transport has too many messages waiting to be written
+            await self.transport.wait_writable()
+
+        size = 0
+        if self.options.max_queued_bytes is not None and self.__should_queue():
+            size = encoded_size(protocol_message, self.options.use_binary_protocol)
+        await self.__make_room_in_queue(size)
+
+        state_should_queue = self.__should_queue()
 
         if self.state != ConnectionState.CONNECTED and not state_should_queue:
             raise AblyException(f"Cannot send message while connection is {self.state}", 400, 90000)
@@ -236,29 +310,80 @@ class ConnectionManager(EventEmitter):
             )
 
         pending_message = PendingMessage(protocol_message)
+        pending_message.size = size
 
-        # Assign msgSerial to messages that need acknowledgment
+        # Assign msgSerial to messages that need acknowledgment; they are tracked for acknowledgment once
+        # handed to the transport
         if pending_message.ack_required:
             # New message - assign fresh serial
             protocol_message['msgSerial'] = self.msg_serial
-            self.pending_message_queue.push(pending_message)
             self.msg_serial += 1
 
-        if state_should_queue:
+        # While queued messages are being sent on connection, new ones are sent after them
+        if state_should_queue or self.queued_messages:
             self.queued_messages.appendleft(pending_message)
-            if pending_message.ack_required:
-                return await pending_message.future
+            future = pending_message.future
+            # The message may be spilled to disk while queued, so no reference to it is kept here
+            del protocol_message, pending_message
+            if future is not None:
+                return await future
             return None
 
         return await self._send_protocol_message_on_connected_state(pending_message)
 
+    def __should_queue(self) -> bool:
+        return self.state in (
+            ConnectionState.INITIALIZED, ConnectionState.DISCONNECTED, ConnectionState.CONNECTING
+        )
+
+    async def __make_room_in_queue(self, size: int) -> None:
+        """Apply queue_overflow_policy while a new message would not fit in the offline queue"""
+        while self.__should_queue() and self.options.queue_messages and not self.queued_messages.has_room(size):
+            policy = self.options.queue_overflow_policy
+            if policy == QUEUE_OVERFLOW_FAIL:
+                raise AblyException(
+                    f"Cannot queue message while connection is {self.state}; the queue is full", 400, 90000
+                )
+            if policy == QUEUE_OVERFLOW_DROP_OLDEST:
+                if not self.__drop_oldest_queued():
+                    raise AblyException(
+                        f"Cannot queue message while connection is {self.state}; the queue is full", 400, 90000
+                    )
+            elif policy == QUEUE_OVERFLOW_BLOCK:
+                if self.__queue_drained is None:
+                    self.__queue_drained = asyncio.Event()
+                self.__queue_drained.clear()
+                await self.__queue_drained.wait()
+
+    def __notify_queue_drained(self) -> None:
+        if self.__queue_drained is not None:
+            self.__queue_drained.set()
+
+    def __drop_oldest_queued(self) -> bool:
+        dropped = self.queued_messages.drop_oldest_unsent()
+        if dropped is None:
+            return False
+        log.warning('ConnectionManager.send_protocol_message(): queue full; dropping the oldest queued message')
+        if dropped.future and not dropped.future.done():
+            dropped.future.set_exception(
+                AblyException("Message dropped from the queue to make room for newer ones", 400, 90000)
+            )
+        if dropped.ack_required:
+            # Never sent, so the messages queued after it can take over its msgSerial, keeping them contiguous
+            serial = dropped.message['msgSerial']
+            for pending_message in self.queued_messages:
+                if not pending_message.sent and pending_message.message.get('msgSerial', -1) > serial:
+                    pending_message.message['msgSerial'] -= 1
+            self.msg_serial -= 1
+        return True
+
     async def _send_protocol_message_on_connected_state(
         self, pending_message: PendingMessage
     ) -> PublishResult | None:
         if self.state == ConnectionState.CONNECTED and self.transport:
-            # Add to pending queue before sending (for messages being resent from queue)
-            if pending_message.ack_required and pending_message not in self.pending_message_queue.messages:
+            if pending_message.ack_required:
                 self.pending_message_queue.push(pending_message)
+            pending_message.sent = True
             await self.transport.send(pending_message.message)
         else:
             log.exception(
@@ -274,9 +399,66 @@ class ConnectionManager(EventEmitter):
 
     def send_queued_messages(self) -> None:
         log.info(f'ConnectionManager.send_queued_messages(): sending {len(self.queued_messages)} message(s)')
-        while len(self.queued_messages) > 0:
+        if self.state != ConnectionState.CONNECTED or not self.transport:
+            if self.queued_messages:
+                log.exception(
+                    "ConnectionManager.send_queued_messages(): can not send message with no active transport"
+                )
+            while self.queued_messages:
+                pending_message = self.queued_messages.pop()
+                if pending_message.future and not pending_message.future.done():
+                    pending_message.future.set_exception(AblyException("No active transport", 500, 50000))
+            self.__notify_queue_drained()
+            return
+
+        if self.__replay_transport is not self.transport:
+            self.__send_queued_chunk(self.transport)
+
+    def __send_queued_chunk(self, transport: WebSocketTransport) -> None:
+        """Hands the oldest queued messages to the transport, which writes them in order
+
+        At most outbound_high_water_mark messages are waiting to be written at a time, so that spilled
+        messages are only read back from disk as the transport writes them. The next chunk is handed
+        over once this one is written. Each message is tracked for acknowledgment as it is handed over,
+        which is msgSerial order.
+        """
+        limit = self.options.outbound_high_water_mark or _QUEUED_MESSAGES_CHUNK_SIZE
+        written = None
+        while self.queued_messages and (written is None or transport.queue_depth < limit):
             pending_message = self.queued_messages.pop()
-            asyncio.create_task(self._send_protocol_message_on_connected_state(pending_message))
+            if pending_message.ack_required:
+                self.pending_message_queue.push(pending_message)
+            pending_message.sent = True
+            written = transport.enqueue(pending_message.message)
+            written.add_done_callback(self.__on_queued_message_written)
+        self.__notify_queue_drained()
+
+        if self.queued_messages and written is not None:
+            self.__replay_transport = transport
+            written.add_done_callback(functools.partial(self.__on_queued_chunk_written, transport))
+        else:
+            self.__replay_transport = None
+
+    def __on_queued_chunk_written(self, transport: WebSocketTransport, future: asyncio.Future) -> None:
+        if self.__replay_transport is not transport:
+            return
+        self.__replay_transport = None
+        # A transport that failed to write leaves the rest queued for the next connection
+        if future.cancelled() or isinstance(future.exception(), (AblyException, WebSocketException, OSError)):
+            return
+        if self.state == ConnectionState.CONNECTED and self.transport is transport:
+            self.__send_queued_chunk(transport)
+
+    @staticmethod
+    def __on_queued_message_written(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception():
+            # The message stays pending, so it is sent again when the connection is resumed
+            log.info(f'ConnectionManager.send_queued_messages(): failed to send message: {future.exception()}')
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of protocol messages queued while not connected or waiting to be written"""
+        return len(self.queued_messages) + (self.transport.queue_depth if self.transport else 0)
 
     def requeue_pending_messages(self) -> None:
         """RTN19a: Requeue messages awaiting ACK/NACK when transport disconnects
@@ -322,6 +504,7 @@ class ConnectionManager(EventEmitter):
             # Fail the Future if it exists
             if pending_msg.future and not pending_msg.future.done():
                 pending_msg.future.set_exception(error)
+        self.__notify_queue_drained()
 
         # Also fail all pending messages awaiting acknowledgment
         if self.pending_message_queue.count() > 0:
@@ -359,6 +542,7 @@ class ConnectionManager(EventEmitter):
     def on_connected(self, connection_details: ConnectionDetails, connection_id: str,
                      reason: AblyException | None = None) -> None:
         self.__fail_state = ConnectionState.DISCONNECTED
+        self.__retry_attempt = 0
 
         # RTN19a2: Reset msgSerial if connectionId changed (new connection)
         prev_connection_id = self.connection_id
@@ -370,6 +554,13 @@ class ConnectionManager(EventEmitter):
             # Note: In JS they call resetSendAttempted() here, but we don't need it
             # because we fail all pending messages on disconnect per RTN7e
 
+        if self.__recovery is not None:
+            # RTN16d: a recovery that failed gives a new connection, with the reason set
+            if reason is not None:
+                log.info(f'ConnectionManager.on_connected(): unable to recover connection: {reason}')
+                self.msg_serial = 0
+            self.__recovery = None
+
         self.__connection_details = connection_details
         self.connection_id = connection_id
 
@@ -389,6 +580,52 @@ class ConnectionManager(EventEmitter):
 
         self.ably.channels._on_connected()
 
+        if self.options.standby_transport:
+            self.start_standby()
+
+    def restore_channels(self) -> None:
+        # RTN16j
+        if self.__recovery is not None and self.__recovery.channel_serials:
+            self.ably.channels._restore(self.__recovery.channel_serials)
+
+    # RTN16g
+    def create_recovery_key(self) -> str | None:
+        if self.__connection_details is None or self.__state in (
+            ConnectionState.CLOSING, ConnectionState.CLOSED, ConnectionState.FAILED, ConnectionState.SUSPENDED
+        ):
+            return None
+        return RecoveryKeyContext(
+            self.__connection_details.connection_key,
+            self.msg_serial,
+            self.ably.channels._channel_serials(),
+        ).encode()
+
+    def start_standby(self) -> None:
+        """Open a standby socket to another host, to resume the connection over should the transport fail"""
+        self.close_standby()
+        current_host = self.transport.host if self.transport else None
+        hosts = [host for host in (self.options.get_host(), *self.__fallback_hosts) if host != current_host]
+        if not hosts:
+            return
+        standby = StandbySocket(hosts[0], Defaults.get_port(self.options))
+        self.__standby_task = asyncio.create_task(self.__open_standby(standby))
+
+    async def __open_standby(self, standby: StandbySocket) -> None:
+        try:
+            await asyncio.wait_for(standby.open(), self.__timeout_in_secs)
+        except (OSError, asyncio.TimeoutError) as e:
+            log.info(f'ConnectionManager.start_standby(): unable to connect to {standby.host}: {e}')
+            return
+        self.__standby = standby
+
+    def close_standby(self) -> None:
+        if self.__standby_task:
+            self.__standby_task.cancel()
+            self.__standby_task = None
+        if self.__standby:
+            self.__standby.close()
+            self.__standby = None
+
     async def on_disconnected(self, exception: AblyException) -> None:
         # RTN15h
         if self.transport:
@@ -532,9 +769,16 @@ class ConnectionManager(EventEmitter):
         self.connect_base_task = asyncio.create_task(self.connect_base())
 
     async def connect_with_fallback_hosts(self, fallback_hosts: list) -> Exception | None:
+        if self.options.fallback_race_delay is not None:
+            try:
+                await self.race_hosts(fallback_hosts)
+            except Exception as exc:
+                log.exception(f'Connection to fallback hosts failed, reason={exc}')
+                return exc
+            return None
         for host in fallback_hosts:
             try:
-                if self.check_connection():
+                if await self.check_connection():
                     await self.try_host(host)
                     return
                 else:
@@ -550,8 +794,24 @@ class ConnectionManager(EventEmitter):
         return exception
 
     async def connect_base(self) -> None:
+        standby, self.__standby = self.__standby, None
+        sock = standby.take() if standby else None
+        if sock is not None:
+            try:
+                await self.try_host(standby.host, sock=sock)
+                return
+            except Exception as exception:
+                log.exception(f'Connection to standby host {standby.host} failed, reason={exception}')
+
         fallback_hosts = self.__fallback_hosts
         primary_host = self.options.get_host()
+        if self.options.fallback_race_delay is not None and len(fallback_hosts) > 0:
+            try:
+                await self.race_hosts([primary_host, *fallback_hosts])
+            except Exception as exception:
+                log.exception(f'Connection to {primary_host} and fallback hosts failed, reason={exception}')
+                self.notify_state(self.__fail_state, reason=exception)
+            return
         try:
             await self.try_host(primary_host)
             return
@@ -565,13 +825,15 @@ class ConnectionManager(EventEmitter):
                 exception = resp
             self.notify_state(self.__fail_state, reason=exception)
 
-    async def try_host(self, host) -> None:
+    async def try_host(self, host, sock=None) -> None:
         try:
             params = await self.__get_transport_params()
         except AblyException as e:
+            if sock is not None:
+                sock.close()
             self.on_error_from_authorize(e)
             return
-        self.transport = WebSocketTransport(self, host, params)
+        self.transport = WebSocketTransport(self, host, params, sock=sock)
         self._emit('transport.pending', self.transport)
         self.transport.connect()
 
@@ -599,6 +861,80 @@ class ConnectionManager(EventEmitter):
         except asyncio.CancelledError:
             return
 
+    async def race_hosts(self, hosts: list[str]) -> None:
+        """Connect to whichever host responds first
+
+        A connection attempt to the next host starts every fallback_race_delay milliseconds, or as soon as
+        all the attempts in progress have failed. The first transport to receive CONNECTED becomes the
+        transport of the connection and the others are disposed.
+        """
+        try:
+            params = await self.__get_transport_params()
+        except AblyException as e:
+            self.on_error_from_authorize(e)
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.options.realtime_request_timeout / 1000
+        delay = self.options.fallback_race_delay / 1000
+        remaining_hosts = deque(hosts)
+        candidates: list[WebSocketTransport] = []
+        failures: list[Exception] = []
+        changed = asyncio.Event()
+        race = self.__race = loop.create_future()
+        race.add_done_callback(lambda _: changed.set())
+
+        def on_failed(exception):
+            failures.append(exception)
+            changed.set()
+
+        def start_next():
+            host = remaining_hosts.popleft()
+            log.info(f'ConnectionManager.race_hosts(): connecting to {host}')
+            transport = WebSocketTransport(self, host, params)
+            transport.racing = True
+            transport.once('failed', on_failed)
+            candidates.append(transport)
+            self._emit('transport.pending', transport)
+            transport.connect()
+
+        try:
+            start_next()
+            while not race.done():
+                if len(failures) >= len(candidates):
+                    if not remaining_hosts:
+                        raise failures[-1]
+                    start_next()
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    raise AblyException("Connection cancelled due to request timeout", 504, 50003)
+                if remaining_hosts:
+                    timeout = min(timeout, delay)
+                changed.clear()
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    if remaining_hosts:
+                        start_next()
+        finally:
+            self.__race = None
+            winner = race.result() if race.done() and not race.cancelled() else None
+            race.cancel()
+            for transport in candidates:
+                if transport is not winner and not transport.is_disposed:
+                    await transport.dispose()
+
+    def claim_transport(self, transport: WebSocketTransport) -> bool:
+        """Called by a racing transport on its first response; returns whether it won the race"""
+        if self.__race is None or self.__race.done():
+            return False
+        log.info(f'ConnectionManager.claim_transport(): connected to {transport.host}')
+        transport.racing = False
+        self.transport = transport
+        self.__race.set_result(transport)
+        return True
+
     def notify_state(self, state: ConnectionState, reason: AblyException | None = None,
                      retry_immediately: bool | None = None) -> None:
         # RTN15a
@@ -619,7 +955,7 @@ class ConnectionManager(EventEmitter):
         if retry_immediately:
             self.options.loop.call_soon(self.request_state, ConnectionState.CONNECTING)
         elif state == ConnectionState.DISCONNECTED:
-            self.start_retry_timer(self.options.disconnected_retry_timeout)
+            self.start_retry_timer(self.__disconnected_retry_delay())
         elif state == ConnectionState.SUSPENDED:
             self.start_retry_timer(self.options.suspended_retry_timeout)
 
@@ -710,6 +1046,13 @@ class ConnectionManager(EventEmitter):
             self.suspend_timer.cancel()
             self.suspend_timer = None
 
+    def __disconnected_retry_delay(self) -> float:
+        timeout = self.options.disconnected_retry_timeout
+        if self.options.disconnected_retry_backoff is None:
+            return timeout
+        self.__retry_attempt += 1
+        return get_retry_delay(self.options.disconnected_retry_backoff, timeout, self.__retry_attempt)
+
     def start_retry_timer(self, interval: int) -> None:
         def on_retry_timeout():
             log.info('ConnectionManager retry timer expired, retrying')
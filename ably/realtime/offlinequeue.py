@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import tempfile
+from collections import deque
+from typing import TYPE_CHECKING, Iterator
+
+import msgpack
+
+if TYPE_CHECKING:
+    from ably.realtime.connectionmanager import PendingMessage
+
+log = logging.getLogger(__name__)
+
+
+class SpillSegment:
+    """A file of msgpack-framed protocol messages, read back through a memory map"""
+
+    def __init__(self, directory: str):
+        fd, self.path = tempfile.mkstemp(prefix='ably-queue-', suffix='.msgpack', dir=directory)
+        self.__file = os.fdopen(fd, 'r+b')
+        self.__map: mmap.mmap | None = None
+
+    def write(self, message: dict) -> tuple[int, int]:
+        """Append a message, returning the offset and length of its frame"""
+        frame = msgpack.packb(message, use_bin_type=True)
+        self.__close_map()
+        offset = self.__file.seek(0, os.SEEK_END)
+        self.__file.write(frame)
+        return offset, len(frame)
+
+    def read(self, offset: int, length: int) -> dict:
+        if self.__map is None:
+            self.__file.flush()
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        return msgpack.unpackb(self.__map[offset:offset + length], raw=False)
+
+    def __close_map(self) -> None:
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+    def close(self) -> None:
+        self.__close_map()
+        self.__file.close()
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            log.warning(f'SpillSegment.close(): unable to remove {self.path}: {e}')
+
+
+class OfflineQueue:
+    """Protocol messages queued while the connection is not CONNECTED
+
+    Used like a deque: new messages are added with appendleft(), messages to resend first with append(),
+    and pop() returns the oldest. The count and size in bytes of the messages held in memory are tracked
+    against max_messages and max_bytes. When spill_path is set, new messages beyond those bounds are
+    written to a segment file in that directory instead, and only a placeholder keeping their action and
+    msgSerial is held in memory until they are popped.
+    """
+
+    def __init__(self, max_messages: int | None = None, max_bytes: int | None = None,
+                 spill_path: str | None = None):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.__messages: deque[PendingMessage] = deque()
+        self.__memory_count = 0
+        self.__memory_bytes = 0
+        self.__spilled_count = 0
+        self.__segment: SpillSegment | None = None
+
+    def __len__(self) -> int:
+        return len(self.__messages)
+
+    def __getitem__(self, index: int) -> PendingMessage:
+        return self.__messages[index]
+
+    def __iter__(self) -> Iterator[PendingMessage]:
+        return iter(self.__messages)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the messages held in memory, for those given a size"""
+        return self.__memory_bytes
+
+    @property
+    def spilled_count(self) -> int:
+        """Number of messages written to the spill segment"""
+        return self.__spilled_count
+
+    def has_room(self, size: int) -> bool:
+        """Whether a new message of the given size can be queued without exceeding the bounds"""
+        return self.spill_path is not None or self.__fits_in_memory(size)
+
+    def appendleft(self, pending_message: PendingMessage) -> None:
+        bounded = self.max_messages is not None or self.max_bytes is not None
+        if self.spill_path is not None and not (bounded and self.__fits_in_memory(pending_message.size)):
+            self.__spill(pending_message)
+        else:
+            self.__memory_count += 1
+            self.__memory_bytes += pending_message.size
+        self.__messages.appendleft(pending_message)
+
+    def append(self, pending_message: PendingMessage) -> None:
+        self.__memory_count += 1
+        self.__memory_bytes += pending_message.size
+        self.__messages.append(pending_message)
+
+    def pop(self) -> PendingMessage:
+        return self.__release(self.__messages.pop())
+
+    def drop_oldest_unsent(self) -> PendingMessage | None:
+        """Remove and return the oldest message never handed to a transport"""
+        for index in range(len(self.__messages) - 1, -1, -1):
+            if not self.__messages[index].sent:
+                pending_message = self.__messages[index]
+                del self.__messages[index]
+                return self.__release(pending_message)
+        return None
+
+    def clear(self) -> None:
+        while self.__messages:
+            self.pop()
+
+    def __fits_in_memory(self, size: int) -> bool:
+        if self.max_messages is not None and self.__memory_count + 1 > self.max_messages:
+            return False
+        if self.max_bytes is not None and self.__memory_bytes + size > self.max_bytes:
+            return False
+        return True
+
+    def __spill(self, pending_message: PendingMessage) -> None:
+        if self.__segment is None:
+            self.__segment = SpillSegment(self.spill_path)
+            log.info(f'OfflineQueue: spilling queued messages to {self.__segment.path}')
+        message = pending_message.message
+        pending_message.spilled = self.__segment.write(message)
+        # The placeholder keeps what acknowledgment tracking reads
+        pending_message.message = {'action': message.get('action')}
+        if 'msgSerial' in message:
+            pending_message.message['msgSerial'] = message['msgSerial']
+        self.__spilled_count += 1
+
+    def __release(self, pending_message: PendingMessage) -> PendingMessage:
+        if pending_message.spilled is None:
+            self.__memory_count -= 1
+            self.__memory_bytes -= pending_message.size
+            return pending_message
+
+        offset, length = pending_message.spilled
+        message = self.__segment.read(offset, length)
+        # The msgSerial may have been reassigned while spilled
+        message.update(pending_message.message)
+        pending_message.message = message
+        pending_message.spilled = None
+        self.__spilled_count -= 1
+        if self.__spilled_count == 0:
+            self.__segment.close()
+            self.__segment = None
+        return pending_message
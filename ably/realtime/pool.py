@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import logging
+from typing import Iterator
+
+from ably.realtime.channel import RealtimeChannel, _qualified_channel_name
+from ably.realtime.realtime import AblyRealtime
+from ably.types.channeloptions import ChannelOptions
+from ably.types.connectionstate import ConnectionEvent, ConnectionState, ConnectionStateChange
+from ably.types.messagefilter import MessageFilter
+from ably.util.eventemitter import EventEmitter
+from ably.util.exceptions import AblyException
+
+log = logging.getLogger(__name__)
+
+# The state of the pool is that of its least connected client, in this order
+_STATE_PRECEDENCE = (
+    ConnectionState.FAILED,
+    ConnectionState.SUSPENDED,
+    ConnectionState.DISCONNECTED,
+    ConnectionState.CONNECTING,
+    ConnectionState.INITIALIZED,
+    ConnectionState.CLOSING,
+    ConnectionState.CLOSED,
+    ConnectionState.CONNECTED,
+)
+
+
+class HashRing:
+    """Maps keys to one of `size` nodes by consistent hashing
+
+    Each node is placed at `virtual_nodes` points of the ring, so keys spread evenly and resizing the
+    ring only moves the keys of the nodes added or removed.
+    """
+
+    def __init__(self, size: int, virtual_nodes: int = 100):
+        points = sorted(
+            (self.__hash(f'{node}:{replica}'), node)
+            for node in range(size)
+            for replica in range(virtual_nodes)
+        )
+        self.__hashes = [point for point, _ in points]
+        self.__nodes = [node for _, node in points]
+
+    @staticmethod
+    def __hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def node(self, key: str) -> int:
+        index = bisect.bisect(self.__hashes, self.__hash(key))
+        return self.__nodes[index % len(self.__nodes)]
+
+
+class PoolConnection(EventEmitter):
+    """The connections of an AblyRealtimePool, seen as one
+
+    The state is CONNECTED once every connection is, and otherwise that of the least connected one.
+    Events are emitted when that state changes.
+    """
+
+    def __init__(self, clients: list[AblyRealtime]):
+        super().__init__()
+        self.__clients = clients
+        self.__state = self.__aggregate_state()
+        for client in clients:
+            client.connection.on(self.__on_client_state_change)
+
+    def connect(self) -> None:
+        for client in self.__clients:
+            client.connection.connect()
+
+    async def close(self) -> None:
+        await asyncio.gather(*(client.connection.close() for client in self.__clients))
+
+    async def ping(self) -> list[float]:
+        """Pings every connection, returning their response times in milliseconds"""
+        return list(await asyncio.gather(*(client.connection.ping() for client in self.__clients)))
+
+    @property
+    def state(self) -> ConnectionState:
+        return self.__state
+
+    @property
+    def states(self) -> list[ConnectionState]:
+        """The state of each connection of the pool"""
+        return [client.connection.state for client in self.__clients]
+
+    @property
+    def error_reason(self) -> AblyException | None:
+        """The error reason of the first connection that has one"""
+        for client in self.__clients:
+            if client.connection.error_reason is not None:
+                return client.connection.error_reason
+        return None
+
+    def __aggregate_state(self) -> ConnectionState:
+        states = set(self.states)
+        return next(state for state in _STATE_PRECEDENCE if state in states)
+
+    def __on_client_state_change(self, state_change: ConnectionStateChange) -> None:
+        if state_change.event == ConnectionEvent.UPDATE:
+            return
+        previous, current = self.__state, self.__aggregate_state()
+        if current == previous:
+            return
+        self.__state = current
+        self._emit(current, ConnectionStateChange(previous, current, ConnectionEvent(current.value),
+                                                  state_change.reason))
+
+
+class PoolChannels:
+    """The channels of an AblyRealtimePool, each held by the client its name hashes to
+
+    Only the base name is hashed, so qualified channels, such as derived ones, share the connection of
+    the channel they derive from, and can be found and released by their full name.
+    """
+
+    def __init__(self, pool: AblyRealtimePool):
+        self.__pool = pool
+
+    def get(self, name: str, options: ChannelOptions | None = None, **kwargs) -> RealtimeChannel:
+        return self.__pool.client_for(name).channels.get(name, options, **kwargs)
+
+    def get_derived(self, name: str, derive_options: dict | MessageFilter,
+                    options: ChannelOptions | None = None, **kwargs) -> RealtimeChannel:
+        return self.__pool.client_for(name).channels.get_derived(name, derive_options, options, **kwargs)
+
+    def release(self, name: str) -> None:
+        self.__pool.client_for(name).channels.release(name)
+
+    def __getitem__(self, name: str) -> RealtimeChannel:
+        return self.get(name)
+
+    def __contains__(self, item) -> bool:
+        name = item.name if isinstance(item, RealtimeChannel) else item
+        return name in self.__pool.client_for(name).channels
+
+    def __iter__(self) -> Iterator[RealtimeChannel]:
+        for client in self.__pool.clients:
+            yield from client.channels
+
+    def __len__(self) -> int:
+        return sum(len(client.channels) for client in self.__pool.clients)
+
+
+class AblyRealtimePool:
+    """
+    A pool of Ably Realtime clients, each with its own connection
+
+    Channels are spread across the connections by consistent hashing of their names, so the messages of
+    many channels are not limited by the throughput of a single connection. A channel always uses the same
+    connection, and so keeps the ordering guarantees of a single client.
+
+    Attributes
+    ----------
+    connection: PoolConnection
+        the connections of the pool, seen as one
+    channels: PoolChannels
+        the channels of every client of the pool
+    clients: list[AblyRealtime]
+        the clients of the pool
+
+    Methods
+    -------
+    connect()
+        Establishes every connection
+    close()
+        Closes every connection
+    """
+
+    def __init__(self, key: str | None = None, size: int = 2, loop: asyncio.AbstractEventLoop | None = None,
+                 **kwargs):
+        """Constructs a pool of `size` realtime clients, passing them the key, loop and client options
+
+        As each client connects with its own connection, options which apply to a single connection,
+        such as recover, cannot be used.
+        """
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        if kwargs.get('recover'):
+            raise AblyException('The recover option cannot be used with a pool of connections', 400, 40000)
+
+        self.__clients = [AblyRealtime(key, loop=loop, **kwargs) for _ in range(size)]
+        self.__ring = HashRing(size)
+        self.__connection = PoolConnection(self.__clients)
+        self.__channels = PoolChannels(self)
+
+    def client_for(self, name: str) -> AblyRealtime:
+        """Returns the client holding the channel of this name, or of its base name if qualified"""
+        if isinstance(name, bytes):
+            name = name.decode('ascii')
+        match = _qualified_channel_name.match(name)
+        if match:
+            name = match.group(4)
+        return self.__clients[self.__ring.node(name)]
+
+    def connect(self) -> None:
+        log.info('AblyRealtimePool.connect() called')
+        self.__connection.connect()
+
+    async def close(self) -> None:
+        log.info('AblyRealtimePool.close() called')
+        await asyncio.gather(*(client.close() for client in self.__clients))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excinfo):
+        await self.close()
+
+    @property
+    def clients(self) -> list[AblyRealtime]:
+        return list(self.__clients)
+
+    @property
+    def connection(self) -> PoolConnection:
+        return self.__connection
+
+    @property
+    def channels(self) -> PoolChannels:
+        return self.__channels
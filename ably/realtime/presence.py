@@ -8,22 +8,48 @@ including enter/leave operations, presence state management, and SYNC handling.
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
+from collections import deque
+from collections.abc import Iterable
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Any
 
 from ably.realtime.connection import ConnectionState
+from ably.realtime.presencediff import PresenceDiffAggregator
 from ably.realtime.presencemap import PresenceMap
 from ably.types.channelstate import ChannelState, ChannelStateChange
 from ably.types.presence import PresenceAction, PresenceMessage
 from ably.util.eventemitter import EventEmitter
 from ably.util.exceptions import AblyException
+from ably.util.helper import encoded_size, is_callable_or_coroutine
 
 if TYPE_CHECKING:
     from ably.realtime.channel import RealtimeChannel
 
 log = logging.getLogger(__name__)
 
+# Presence messages applied, or leaves emitted, before yielding to the event loop
+_PRESENCE_CHUNK_SIZE = 1000
+
+# Upper bound on the bytes a protocol message adds around its encoded presence array
+_BATCH_OVERHEAD = 5
+
+
+def _batches(sizes: list[int], max_message_size: int) -> list[tuple[int, int]]:
+    """Split messages of the given encoded sizes into (start, end) ranges that each fit in one protocol message"""
+    batches = []
+    start = 0
+    total = _BATCH_OVERHEAD
+    for i, size in enumerate(sizes):
+        if i > start and total + size + 1 > max_message_size:
+            batches.append((start, i))
+            start, total = i, _BATCH_OVERHEAD
+        total += size + 1
+    if start < len(sizes):
+        batches.append((start, len(sizes)))
+    return batches
+
 
 def _get_client_id(presence: RealtimePresence) -> str | None:
     """Get the clientId for the current connection."""
@@ -82,10 +108,22 @@ class RealtimePresence(EventEmitter):
 
         # EventEmitter for presence subscriptions
         self._subscriptions = EventEmitter()
+        # Listener -> aggregator delivering its coalesced presence diffs
+        self._diff_subscriptions: dict[Any, PresenceDiffAggregator] = {}
 
         # RTP16: Queue for pending presence messages
         self._pending_presence: list[dict] = []
 
+        # clientId -> (id, data, cipher, message) of the last enter sent for it, reused when
+        # re-entering with the same data (RTP17g) so that its wire form is not encoded again
+        self._sent_enters: dict[str, tuple] = {}
+
+        # Incoming presence too large to apply at once is applied in chunks by a task,
+        # with pages received meanwhile queued behind it to keep them in order
+        self._incoming_presence: deque = deque()
+        self._incoming_steps = None
+        self._incoming_task: asyncio.Task | None = None
+
     async def enter(self, data: Any = None) -> None:
         """
         Enter this client into the channel's presence (RTP8).
@@ -186,6 +224,148 @@ class RealtimePresence(EventEmitter):
         """
         return await self._leave_client(client_id, data)
 
+    async def enter_clients(self, members: Iterable[tuple[str, Any]]) -> list[Exception | None]:
+        """
+        Enter many clientIds into presence at once (RTP14).
+
+        The presence messages are packed into as few protocol messages as the
+        maximum message size allows, instead of one protocol message per client.
+
+        Args:
+            members: (client_id, data) pairs to enter
+
+        Returns:
+            The result for each member, in order: None once its enter is acknowledged,
+            or the exception it failed with
+
+        Raises:
+            AblyException: If connection or channel state prevents entering
+        """
+        return await self._send_presence_batch(
+            [(None, client_id, data) for client_id, data in members], PresenceAction.ENTER
+        )
+
+    async def leave_clients(self, members: Iterable[tuple[str, Any]]) -> list[Exception | None]:
+        """
+        Leave presence on behalf of many clientIds at once (RTP15).
+
+        Args:
+            members: (client_id, data) pairs to leave
+
+        Returns:
+            The result for each member, in order: None once its leave is acknowledged,
+            or the exception it failed with
+
+        Raises:
+            AblyException: If connection or channel state prevents leaving
+        """
+        return await self._send_presence_batch(
+            [(None, client_id, data) for client_id, data in members], PresenceAction.LEAVE
+        )
+
+    async def _send_presence_batch(
+        self,
+        members: list[tuple[str | None, str, Any]],
+        action: int
+    ) -> list[Exception | None]:
+        """
+        Internal method to enter, update or leave many clients in as few protocol messages as possible.
+
+        Args:
+            members: (id, client_id, data) for each client
+            action: The presence action (ENTER, UPDATE or LEAVE)
+
+        Returns:
+            None or the exception each member failed with, in order
+
+        Raises:
+            AblyException: If connection or channel state prevents the operation
+        """
+        channel = self.channel
+        action_name = PresenceAction._action_name(action).lower()
+
+        if channel.ably.connection.state not in [
+            ConnectionState.CONNECTING,
+            ConnectionState.CONNECTED,
+            ConnectionState.DISCONNECTED
+        ]:
+            raise AblyException(
+                f'Unable to {action_name} presence channel; '
+                f'connection state = {channel.ably.connection.state}',
+                400, 90001
+            )
+
+        # RTP8d/RTP8g, RTP10e: Same channel state rules as for a single client
+        if channel.state == ChannelState.ATTACHED:
+            queue = False
+        elif channel.state == ChannelState.ATTACHING:
+            queue = True
+        elif action != PresenceAction.LEAVE and channel.state in [ChannelState.INITIALIZED, ChannelState.DETACHED]:
+            queue = True
+            asyncio.create_task(channel.attach())
+        elif action == PresenceAction.LEAVE and channel.state in [ChannelState.INITIALIZED, ChannelState.FAILED]:
+            raise AblyException(
+                'Unable to leave presence channel (incompatible state)',
+                400, 90001
+            )
+        else:
+            raise AblyException(
+                f'Unable to {action_name} presence channel while in {channel.state} state',
+                400, 90001
+            )
+
+        log.info(
+            f'RealtimePresence.{action_name}_clients(): '
+            f'channel = {channel.name}, {len(members)} clients'
+        )
+
+        use_binary_protocol = channel.ably.options.use_binary_protocol
+        max_message_size = getattr(channel.ably.options, 'max_message_size', 65536)
+        results: list[Exception | None] = [None] * len(members)
+        indexes, wire_msgs, sizes = [], [], []
+
+        for i, (msg_id, client_id, data) in enumerate(members):
+            # RTP15f: A clientId mismatch only fails that client
+            if not channel.ably.auth.can_assume_client_id(client_id):
+                results[i] = AblyException(
+                    f'Unable to {action_name} presence channel with clientId {client_id} '
+                    f'as it does not match the current clientId {channel.ably.auth.client_id}',
+                    400, 40012
+                )
+                continue
+
+            try:
+                presence_msg = self._presence_message(msg_id, action, client_id, data)
+                wire_msg = presence_msg.to_encoded(binary=use_binary_protocol)
+            except AblyException as e:
+                results[i] = e
+                continue
+
+            size = encoded_size(wire_msg, use_binary_protocol)
+            if size + _BATCH_OVERHEAD > max_message_size:
+                results[i] = AblyException(
+                    f'Maximum size of messages that can be published at once exceeded '
+                    f'(was {size} bytes; limit is {max_message_size} bytes)',
+                    400, 40009
+                )
+                continue
+
+            indexes.append(i)
+            wire_msgs.append(wire_msg)
+            sizes.append(size)
+
+        if queue:
+            sent = await asyncio.gather(
+                *(self._queue_presence(wire_msg) for wire_msg in wire_msgs), return_exceptions=True
+            )
+        else:
+            sent = await self._send_presence_in_batches(wire_msgs, sizes)
+
+        for i, result in zip(indexes, sent):
+            if isinstance(result, BaseException):
+                results[i] = result
+        return results
+
     async def _enter_or_update_client(
         self,
         id: str | None,
@@ -238,17 +418,8 @@ class RealtimePresence(EventEmitter):
         # RTP8c: Use connection's clientId if not explicitly provided
         effective_client_id = client_id if client_id is not None else _get_client_id(self)
 
-        # Create presence message
-        presence_msg = PresenceMessage(
-            id=id,
-            action=action,
-            client_id=effective_client_id,
-            data=data
-        )
-
-        # Encrypt if cipher is configured
-        if channel.cipher:
-            presence_msg.encrypt(channel.cipher)
+        # Create presence message, encrypted if cipher is configured
+        presence_msg = self._presence_message(id, action, effective_client_id, data)
 
         # Convert to wire format
         wire_msg = presence_msg.to_encoded(binary=channel.ably.options.use_binary_protocol)
@@ -314,16 +485,8 @@ class RealtimePresence(EventEmitter):
         # RTP10c: Use connection's clientId if not explicitly provided
         effective_client_id = client_id if client_id is not None else _get_client_id(self)
 
-        # Create presence message
-        presence_msg = PresenceMessage(
-            action=PresenceAction.LEAVE,
-            client_id=effective_client_id,
-            data=data
-        )
-
-        # Encrypt if cipher is configured
-        if channel.cipher:
-            presence_msg.encrypt(channel.cipher)
+        # Create presence message, encrypted if cipher is configured
+        presence_msg = self._presence_message(None, PresenceAction.LEAVE, effective_client_id, data)
 
         # Convert to wire format
         wire_msg = presence_msg.to_encoded(binary=channel.ably.options.use_binary_protocol)
@@ -347,6 +510,32 @@ class RealtimePresence(EventEmitter):
                 400, 90001
             )
 
+    def _presence_message(self, id: str | None, action: int, client_id: str | None, data: Any) -> PresenceMessage:
+        """
+        Create a presence message to send, encrypted if the channel has a cipher.
+
+        Enters are remembered per clientId, and an enter with the same id and data as
+        the last one is sent as the same message, along with its cached wire form.
+        """
+        cipher = self.channel.cipher
+
+        if action != PresenceAction.ENTER:
+            self._sent_enters.pop(client_id, None)
+        else:
+            sent = self._sent_enters.get(client_id)
+            if (sent is not None and sent[0] == id and sent[2] is cipher
+                    and type(sent[1]) is type(data) and sent[1] == data):
+                return sent[3]
+
+        presence_msg = PresenceMessage(id=id, action=action, client_id=client_id, data=data)
+        if cipher:
+            presence_msg.encrypt(cipher)
+
+        # Only data that can't be changed in place is compared with later enters
+        if action == PresenceAction.ENTER and (data is None or isinstance(data, (str, bytes))):
+            self._sent_enters[client_id] = (id, data, cipher, presence_msg)
+        return presence_msg
+
     async def _send_presence(self, presence_messages: list[dict]) -> None:
         """
         Send presence messages to the server.
@@ -364,6 +553,30 @@ class RealtimePresence(EventEmitter):
 
         await self.channel.ably.connection.connection_manager.send_protocol_message(protocol_msg)
 
+    async def _send_presence_in_batches(self, wire_msgs: list[dict], sizes: list[int]) -> list[Exception | None]:
+        """
+        Send presence messages in as few protocol messages as the maximum message size allows.
+
+        Args:
+            wire_msgs: Encoded presence messages to send
+            sizes: The encoded size of each message
+
+        Returns:
+            None or the exception the protocol message carrying it failed with, for each message
+        """
+        max_message_size = getattr(self.channel.ably.options, 'max_message_size', 65536)
+        ranges = _batches(sizes, max_message_size)
+
+        # Gathered so each protocol message is sent without waiting for the ACK of the previous one
+        sent = await asyncio.gather(
+            *(self._send_presence(wire_msgs[start:end]) for start, end in ranges), return_exceptions=True
+        )
+
+        results: list[Exception | None] = []
+        for (start, end), result in zip(ranges, sent):
+            results.extend([result if isinstance(result, BaseException) else None] * (end - start))
+        return results
+
     async def _queue_presence(self, wire_msg: dict) -> None:
         """
         Queue a presence message to be sent when channel attaches.
@@ -400,6 +613,31 @@ class RealtimePresence(EventEmitter):
         Raises:
             AblyException: If channel state prevents getting presence
         """
+        await self._wait_for_members(wait_for_sync)
+        return self.members.list(client_id=client_id, connection_id=connection_id)
+
+    async def count(
+        self,
+        wait_for_sync: bool = True,
+        client_id: str | None = None,
+        connection_id: str | None = None
+    ) -> int:
+        """
+        Get the number of current presence members on this channel, without listing them.
+
+        Takes the same arguments, and waits in the same way, as get().
+
+        Returns:
+            Number of current presence members
+
+        Raises:
+            AblyException: If channel state prevents getting presence
+        """
+        await self._wait_for_members(wait_for_sync)
+        return self.members.count(client_id=client_id, connection_id=connection_id)
+
+    async def _wait_for_members(self, wait_for_sync: bool) -> None:
+        """Attaches the channel and waits for SYNC as needed before members are read (RTP11)."""
         # RTP11d: Handle SUSPENDED state
         if self.channel.state == ChannelState.SUSPENDED:
             if wait_for_sync:
@@ -408,8 +646,8 @@ class RealtimePresence(EventEmitter):
                     400, 91005
                 )
             else:
-                # Return current members without waiting
-                return self.members.list(client_id=client_id, connection_id=connection_id)
+                # Use current members without waiting
+                return
 
         # RTP11b: Implicitly attach if needed
         if self.channel.state in [ChannelState.INITIALIZED, ChannelState.DETACHED]:
@@ -435,8 +673,6 @@ class RealtimePresence(EventEmitter):
         if wait_for_sync and not self.sync_complete and self.members.sync_in_progress:
             await self._wait_for_sync()
 
-        return self.members.list(client_id=client_id, connection_id=connection_id)
-
     async def _wait_for_sync(self) -> None:
         """Wait for presence SYNC to complete."""
         if self.sync_complete:
@@ -485,6 +721,52 @@ class RealtimePresence(EventEmitter):
         if self.channel.state in [ChannelState.INITIALIZED, ChannelState.DETACHED, ChannelState.DETACHING]:
             await self.channel.attach()
 
+    async def subscribe_diff(self, listener, interval: float = 1000) -> None:
+        """
+        Subscribe to coalesced presence changes on this channel.
+
+        Instead of an event per member change, the listener is called at most
+        once per interval with a PresenceDiff of the members that entered,
+        left or were updated since the previous call, and the current member count.
+
+        Args:
+            listener: Callback, or coroutine function, taking a PresenceDiff
+            interval: Milliseconds over which changes are coalesced (default: 1000)
+
+        Raises:
+            AblyException: If channel state prevents subscription
+        """
+        if not is_callable_or_coroutine(listener):
+            raise ValueError('subscribe_diff listener must be a function or coroutine function')
+
+        self.unsubscribe_diff(listener)
+        self._diff_subscriptions[listener] = PresenceDiffAggregator(self.members, interval, listener)
+
+        # RTP6d: Implicitly attach
+        if self.channel.state in [ChannelState.INITIALIZED, ChannelState.DETACHED, ChannelState.DETACHING]:
+            await self.channel.attach()
+
+    def unsubscribe_diff(self, listener=None) -> None:
+        """
+        Unsubscribe a listener added with subscribe_diff(), or all of them if none is given.
+
+        Changes not yet delivered to the listener are discarded.
+        """
+        if listener is None:
+            aggregators = list(self._diff_subscriptions.values())
+            self._diff_subscriptions.clear()
+        else:
+            aggregator = self._diff_subscriptions.pop(listener, None)
+            aggregators = [aggregator] if aggregator else []
+
+        for aggregator in aggregators:
+            aggregator.close()
+
+    @property
+    def member_count(self) -> int:
+        """Number of members currently present, without waiting for a SYNC to complete"""
+        return self.members.count()
+
     def unsubscribe(self, *args) -> None:
         """
         Unsubscribe from presence events on this channel (RTP7).
@@ -498,6 +780,7 @@ class RealtimePresence(EventEmitter):
         if len(args) == 0:
             # unsubscribe() - remove all
             self._subscriptions.off()
+            self.unsubscribe_diff()
         elif len(args) == 1:
             # unsubscribe(listener)
             listener = args[0]
@@ -519,6 +802,9 @@ class RealtimePresence(EventEmitter):
         """
         Process incoming presence messages from the server (Phase 3 - RTP2, RTP18).
 
+        Large pages, and the leaves at the end of a large SYNC, are processed
+        in chunks, yielding to the event loop in between.
+
         Args:
             presence_set: List of presence messages received
             is_sync: True if this is part of a SYNC operation
@@ -530,6 +816,24 @@ class RealtimePresence(EventEmitter):
             f'syncChannelSerial = {sync_channel_serial}'
         )
 
+        if self._incoming_task is not None:
+            self._incoming_presence.append((presence_set, is_sync, sync_channel_serial))
+            return
+
+        steps = self._process_presence(presence_set, is_sync, sync_channel_serial)
+        for _ in steps:
+            # More than one chunk of work, continue from a task
+            self._incoming_steps = steps
+            self._incoming_task = asyncio.create_task(self._process_incoming_presence())
+            return
+
+    def _process_presence(
+        self,
+        presence_set: list[PresenceMessage],
+        is_sync: bool,
+        sync_channel_serial: str | None
+    ):
+        """Generator applying presence messages, which yields after each chunk of work"""
         conn_id = self.channel.ably.connection.connection_manager.connection_id
         broadcast_messages = []
 
@@ -547,7 +851,7 @@ class RealtimePresence(EventEmitter):
             sync_cursor = None
 
         # Process each presence message
-        for presence in presence_set:
+        for index, presence in enumerate(presence_set, 1):
             if presence.action == PresenceAction.LEAVE:
                 # RTP2h: Handle LEAVE
                 if self.members.remove(presence):
@@ -556,6 +860,7 @@ class RealtimePresence(EventEmitter):
                 # RTP17b: Update internal presence map (not synthesized)
                 if presence.connection_id == conn_id and not presence.is_synthesized():
                     self._my_members.remove(presence)
+                    self._sent_enters.pop(presence.client_id, None)
 
             elif presence.action in (
                 PresenceAction.ENTER,
@@ -570,13 +875,18 @@ class RealtimePresence(EventEmitter):
                 if presence.connection_id == conn_id:
                     self._my_members.put(presence)
 
+            if index % _PRESENCE_CHUNK_SIZE == 0 and index < len(presence_set):
+                self._broadcast_presence(broadcast_messages)
+                broadcast_messages = []
+                yield
+
         # RTP18b/RTP18c: End sync if cursor is empty or no channelSerial
         if is_sync and (not sync_channel_serial or not sync_cursor):
             residual, absent = self.members.end_sync()
             self.sync_complete = True
 
             # RTP19: Emit synthesized leave events for residual members
-            for member in residual + absent:
+            for index, member in enumerate(itertools.chain(residual, absent), 1):
                 synthesized_leave = PresenceMessage(
                     action=PresenceAction.LEAVE,
                     client_id=member.client_id,
@@ -587,11 +897,53 @@ class RealtimePresence(EventEmitter):
                 )
                 broadcast_messages.append(synthesized_leave)
 
+                if index % _PRESENCE_CHUNK_SIZE == 0:
+                    self._broadcast_presence(broadcast_messages)
+                    broadcast_messages = []
+                    yield
+
+        self._broadcast_presence(broadcast_messages)
+
+    def _broadcast_presence(self, broadcast_messages: list[PresenceMessage]) -> None:
         # Broadcast messages to subscribers
         for presence in broadcast_messages:
             action_name = PresenceAction._action_name(presence.action).lower()
             self._subscriptions._emit(action_name, presence)
 
+    async def _process_incoming_presence(self) -> None:
+        while self._incoming_steps is not None:
+            await asyncio.sleep(0)
+            try:
+                next(self._incoming_steps)
+            except StopIteration:
+                self._incoming_steps = self._next_incoming_steps()
+            except Exception as e:
+                log.exception(f'RealtimePresence._process_incoming_presence(): error processing presence: {e}')
+                self._incoming_steps = self._next_incoming_steps()
+        self._incoming_task = None
+
+    def _next_incoming_steps(self):
+        if not self._incoming_presence:
+            return None
+        return self._process_presence(*self._incoming_presence.popleft())
+
+    def _flush_incoming_presence(self) -> None:
+        """Applies any presence still waiting to be processed, without yielding"""
+        if self._incoming_task is None:
+            return
+
+        self._incoming_task.cancel()
+        self._incoming_task = None
+        steps = self._incoming_steps
+        self._incoming_steps = None
+        while steps is not None:
+            try:
+                for _ in steps:
+                    pass
+            except Exception as e:
+                log.exception(f'RealtimePresence._flush_incoming_presence(): error processing presence: {e}')
+            steps = self._next_incoming_steps()
+
     def on_attached(self, has_presence: bool = False) -> None:
         """
         Handle channel ATTACHED event (RTP5b).
@@ -623,13 +975,22 @@ class RealtimePresence(EventEmitter):
         # RTP5b: Send pending presence messages
         asyncio.create_task(self._send_pending_presence())
 
+    def _is_idle(self) -> bool:
+        """Whether nothing is subscribed and no members were entered by this client"""
+        return (
+            self._subscriptions._listener_count() == 0
+            and not self._diff_subscriptions
+            and not self._my_members._map
+        )
+
     def _ensure_my_members_present(self) -> None:
         """
         Re-enter own presence members after attach (RTP17g).
         """
         conn_id = self.channel.ably.connection.connection_manager.connection_id
+        members = []
 
-        for _client_id, entry in list(self._my_members._map.items()):
+        for entry in self._my_members._map.values():
             log.info(
                 f'RealtimePresence._ensure_my_members_present(): '
                 f'auto-reentering clientId "{entry.client_id}"'
@@ -637,39 +998,36 @@ class RealtimePresence(EventEmitter):
 
             # RTP17g1: Suppress id if connectionId has changed
             msg_id = entry.id if entry.connection_id == conn_id else None
+            members.append((msg_id, entry.client_id, entry.data))
 
-            # Create task to re-enter - use default args to bind loop variables
-            asyncio.create_task(
-                self._reenter_member(msg_id, entry.client_id, entry.data)
-            )
+        if members:
+            asyncio.create_task(self._reenter_members(members))
 
-    async def _reenter_member(self, msg_id: str | None, client_id: str, data: Any) -> None:
+    async def _reenter_members(self, members: list[tuple[str | None, str, Any]]) -> None:
         """
-        Helper method to re-enter a member (RTP17g).
+        Helper method to re-enter members in as few protocol messages as possible (RTP17g).
 
         Args:
-            msg_id: Optional message ID
-            client_id: The client ID to re-enter
-            data: The presence data
+            members: (id, client_id, data) for each member to re-enter
         """
         try:
-            await self._enter_or_update_client(
-                msg_id,
-                client_id,
-                data,
-                PresenceAction.ENTER
-            )
+            results = await self._send_presence_batch(members, PresenceAction.ENTER)
         except AblyException as e:
+            results = [e] * len(members)
+
+        for (_msg_id, client_id, _data), error in zip(members, results):
+            if error is None:
+                continue
             log.error(
-                f'RealtimePresence._reenter_member(): '
-                f'auto-reenter failed: {e}'
+                f'RealtimePresence._reenter_members(): '
+                f'auto-reenter of clientId "{client_id}" failed: {error}'
             )
             # RTP17e: Emit update event with error
             state_change = ChannelStateChange(
                 previous=self.channel.state,
                 current=self.channel.state,
                 resumed=False,
-                reason=e
+                reason=error
             )
             self.channel._emit("update", state_change)
 
@@ -688,20 +1046,20 @@ class RealtimePresence(EventEmitter):
         pending = self._pending_presence
         self._pending_presence = []
 
-        # Send all pending messages
+        # Send all pending messages, split so that each protocol message stays within the size limit
         presence_array = [item['presence'] for item in pending]
-
-        try:
-            await self._send_presence(presence_array)
-            # Resolve all futures AFTER send completes
-            for item in pending:
-                if not item['future'].done():
-                    item['future'].set_result(None)
-        except Exception as e:
-            # Reject all futures
-            for item in pending:
-                if not item['future'].done():
-                    item['future'].set_exception(e)
+        use_binary_protocol = self.channel.ably.options.use_binary_protocol
+        sizes = [encoded_size(wire_msg, use_binary_protocol) for wire_msg in presence_array]
+        results = await self._send_presence_in_batches(presence_array, sizes)
+
+        # Resolve or reject each future AFTER its protocol message completes
+        for item, error in zip(pending, results):
+            if item['future'].done():
+                continue
+            if error is None:
+                item['future'].set_result(None)
+            else:
+                item['future'].set_exception(error)
 
     def _synthesize_leaves(self, members: list[PresenceMessage]) -> None:
         """
@@ -735,11 +1093,15 @@ class RealtimePresence(EventEmitter):
             has_presence: Whether the channel has presence (for ATTACHED)
             error: Optional error associated with state change
         """
+        # Presence received before the state change is applied first
+        self._flush_incoming_presence()
+
         if state == ChannelState.ATTACHED:
             self.on_attached(has_presence)
         elif state in (ChannelState.DETACHED, ChannelState.FAILED):
             # RTP5a: Clear maps and fail pending
             self._my_members.clear()
+            self._sent_enters.clear()
             self.members.clear()
             self.sync_complete = False
             self._fail_pending_presence(error)
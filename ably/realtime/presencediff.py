@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Callable
+
+from ably.types.presence import PresenceAction, PresenceDiff, PresenceMessage
+from ably.util.helper import Timer
+
+if TYPE_CHECKING:
+    from ably.realtime.presencemap import PresenceMap
+
+log = logging.getLogger(__name__)
+
+
+def _is_present(item: PresenceMessage | None) -> bool:
+    return item is not None and item.action not in (PresenceAction.ABSENT, PresenceAction.LEAVE)
+
+
+class PresenceDiffAggregator:
+    """Coalesces changes to a presence map, delivering them as one PresenceDiff per interval
+
+    Only the state of each changed member at the start of the interval is recorded. When the interval
+    ends it is compared with the member's current state, so a member entering and leaving within the
+    same interval produces nothing.
+    """
+
+    def __init__(self, members: PresenceMap, interval: float, listener: Callable):
+        self.__members = members
+        self.__interval = interval
+        self.__listener = listener
+        # Member key -> stored message at the start of the interval, None if it was not present
+        self.__before: dict[str, PresenceMessage | None] = {}
+        self.__timer: Timer | None = None
+        members._change_listeners.append(self._on_change)
+
+    def close(self) -> None:
+        if self._on_change in self.__members._change_listeners:
+            self.__members._change_listeners.remove(self._on_change)
+        if self.__timer:
+            self.__timer.cancel()
+            self.__timer = None
+        self.__before.clear()
+
+    def _on_change(self, key: str, existing: PresenceMessage | None) -> None:
+        if key in self.__before:
+            return
+        self.__before[key] = existing if _is_present(existing) else None
+        if self.__timer is None:
+            self.__timer = Timer(self.__interval, self.__flush)
+
+    def __flush(self) -> None:
+        self.__timer = None
+        before, self.__before = self.__before, {}
+
+        diff = PresenceDiff(count=self.__members.count())
+        for key, previous in before.items():
+            current = self.__members.get(key)
+            if not _is_present(current):
+                if previous is not None:
+                    diff.left.append(previous._with_action(PresenceAction.PRESENT))
+            elif previous is None:
+                diff.entered.append(current)
+            elif current.data != previous.data or current.extras != previous.extras:
+                diff.updated.append(current)
+
+        if not (diff.entered or diff.left or diff.updated):
+            return
+
+        try:
+            if asyncio.iscoroutinefunction(self.__listener):
+                asyncio.create_task(self.__listener(diff))
+            else:
+                self.__listener(diff)
+        except Exception as e:
+            log.exception(f'PresenceDiffAggregator.flush(): uncaught listener exception: {e}')
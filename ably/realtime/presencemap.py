@@ -11,6 +11,16 @@ from ably.types.presence import PresenceAction, PresenceMessage
 
 logger = logging.getLogger(__name__)
 
+# Stored actions of members that left during a SYNC (RTP2h2)
+_ABSENT_ACTIONS = (PresenceAction.ABSENT, PresenceAction.LEAVE)
+
+
+def _as_member(item: PresenceMessage) -> PresenceMessage:
+    """Returns a stored message with the action of the member it represents (RTP2d, RTP2h2)"""
+    if item.action in _ABSENT_ACTIONS:
+        return item._with_action(PresenceAction.ABSENT)
+    return item._with_action(PresenceAction.PRESENT)
+
 
 def _is_newer(item: PresenceMessage, existing: PresenceMessage) -> bool:
     """
@@ -48,15 +58,9 @@ def _is_newer(item: PresenceMessage, existing: PresenceMessage) -> bool:
             return True
         return item.timestamp >= existing.timestamp
 
-    # RTP2b2: compare by msgSerial and index
-    # parse_id will raise ValueError if id format is invalid
-    item_parts = item.parse_id()
-    existing_parts = existing.parse_id()
-
-    if item_parts['msgSerial'] == existing_parts['msgSerial']:
-        return item_parts['index'] > existing_parts['index']
-    else:
-        return item_parts['msgSerial'] > existing_parts['msgSerial']
+    # RTP2b2: compare by msgSerial, then by index
+    # _serials will raise ValueError if id format is invalid
+    return item._serials() > existing._serials()
 
 
 class PresenceMap:
@@ -66,6 +70,11 @@ class PresenceMap:
     Maintains a map of members keyed by memberKey (connectionId:clientId).
     Handles newness comparison, SYNC operations, and member filtering.
 
+    Members are stored as the presence messages that were received, so
+    updates do not copy them. A stored ENTER, UPDATE or PRESENT message
+    is a PRESENT member, and a stored LEAVE or ABSENT message is an ABSENT
+    member; readers see the message with that action.
+
     Implements RTP2 specification requirements.
     """
 
@@ -84,12 +93,23 @@ class PresenceMap:
             logger_instance: Optional logger instance (default: module logger)
         """
         self._map: Dict[str, PresenceMessage] = {}
-        self._residual_members: Optional[Dict[str, PresenceMessage]] = None
+        # Secondary indexes of member keys, kept up to date by _set and _delete
+        self._keys_by_client_id: Dict[str, Dict[str, None]] = {}
+        self._keys_by_connection_id: Dict[str, Dict[str, None]] = {}
+        self._absent_count = 0
+        # Result of values(), until the map changes
+        self._values: Optional[List[PresenceMessage]] = None
+        # Members are stamped with the epoch of the sync they were last seen in, so the ones
+        # not seen by the end of a sync are found without copying the map when it starts
+        self._epochs: Dict[str, int] = {}
+        self._sync_epoch = 0
         self._sync_in_progress = False
         self._member_key_fn = member_key_fn
         self._is_newer_fn = is_newer_fn or _is_newer
         self._logger = logger_instance or logger
         self._sync_complete_callbacks: List[Callable[[], None]] = []
+        # Called with the member key and the stored message, if any, before a member changes
+        self._change_listeners: List[Callable[[str, Optional[PresenceMessage]], None]] = []
 
     @property
     def sync_in_progress(self) -> bool:
@@ -106,14 +126,17 @@ class PresenceMap:
         Returns:
             The PresenceMessage if found, None otherwise
         """
-        return self._map.get(key)
+        item = self._map.get(key)
+        if item is None:
+            return None
+        return _as_member(item)
 
     def put(self, item: PresenceMessage) -> bool:
         """
         Add or update a presence member (RTP2d).
 
         For ENTER, UPDATE, or PRESENT actions, the message is stored in the map
-        with action set to PRESENT (if it passes the newness check).
+        and read back with action set to PRESENT (if it passes the newness check).
 
         Args:
             item: The presence message to add/update
@@ -121,38 +144,22 @@ class PresenceMap:
         Returns:
             True if the item was added/updated, False if rejected due to newness check
         """
-        # RTP2d: ENTER, UPDATE, PRESENT all get stored as PRESENT
-        if item.action in (PresenceAction.ENTER, PresenceAction.UPDATE, PresenceAction.PRESENT):
-            # Create a copy with action set to PRESENT
-            item_to_store = PresenceMessage(
-                id=item.id,
-                action=PresenceAction.PRESENT,
-                client_id=item.client_id,
-                connection_id=item.connection_id,
-                data=item.data,
-                encoding=item.encoding,
-                timestamp=item.timestamp,
-                extras=item.extras
-            )
-        else:
-            item_to_store = item
-
-        key = self._member_key_fn(item_to_store)
+        key = self._member_key_fn(item)
         if not key:
             self._logger.warning("PresenceMap.put: item has no member key, ignoring")
             return False
 
-        # If we're in a sync, mark this member as seen (remove from residual)
-        if self._residual_members is not None and key in self._residual_members:
-            del self._residual_members[key]
+        # If we're in a sync, mark this member as seen, even if this message is not newer
+        if self._sync_in_progress and key in self._epochs:
+            self._epochs[key] = self._sync_epoch
 
         # Check newness against existing member
         existing = self._map.get(key)
-        if existing and not self._is_newer_fn(item_to_store, existing):
+        if existing and not self._is_newer_fn(item, existing):
             self._logger.debug(f"PresenceMap.put: incoming message for {key} is not newer, ignoring")
             return False
 
-        self._map[key] = item_to_store
+        self._set(key, item, existing)
         self._logger.debug(f"PresenceMap.put: added/updated member {key}")
         return True
 
@@ -184,21 +191,12 @@ class PresenceMap:
 
         # RTP2h2: During SYNC, mark as ABSENT instead of removing
         if self._sync_in_progress:
-            absent_item = PresenceMessage(
-                id=item.id,
-                action=PresenceAction.ABSENT,
-                client_id=item.client_id,
-                connection_id=item.connection_id,
-                data=item.data,
-                encoding=item.encoding,
-                timestamp=item.timestamp,
-                extras=item.extras
-            )
-            self._map[key] = absent_item
+            # The stored LEAVE is read back as ABSENT
+            self._set(key, item, existing)
             self._logger.debug(f"PresenceMap.remove: marked member {key} as ABSENT (sync in progress)")
         else:
             # RTP2h1: Outside of SYNC, remove the member
-            del self._map[key]
+            self._delete(key)
             self._logger.debug(f"PresenceMap.remove: removed member {key}")
 
         return True
@@ -210,10 +208,12 @@ class PresenceMap:
         Returns:
             List of all PRESENT members
         """
-        return [
-            msg for msg in self._map.values()
-            if msg.action != PresenceAction.ABSENT
-        ]
+        if self._values is None:
+            self._values = [
+                msg._with_action(PresenceAction.PRESENT) for msg in self._map.values()
+                if msg.action not in _ABSENT_ACTIONS
+            ]
+        return list(self._values)
 
     def list(
         self,
@@ -230,37 +230,117 @@ class PresenceMap:
         Returns:
             List of matching PRESENT members
         """
+        if not client_id and not connection_id:
+            return self.values()
+
         result = []
-        for msg in self._map.values():
+        for key in self._matching_keys(client_id, connection_id):
+            msg = self._map[key]
             # Skip ABSENT members
-            if msg.action == PresenceAction.ABSENT:
-                continue
+            if msg.action not in _ABSENT_ACTIONS:
+                result.append(msg._with_action(PresenceAction.PRESENT))
 
-            # Apply filters
-            if client_id and msg.client_id != client_id:
-                continue
-            if connection_id and msg.connection_id != connection_id:
-                continue
+        return result
 
-            result.append(msg)
+    def count(
+        self,
+        client_id: Optional[str] = None,
+        connection_id: Optional[str] = None
+    ) -> int:
+        """
+        Get the number of presence members, with the same filtering as list().
 
-        return result
+        Returns:
+            Number of matching PRESENT members
+        """
+        if not client_id and not connection_id:
+            return len(self._map) - self._absent_count
+
+        return sum(
+            1 for key in self._matching_keys(client_id, connection_id)
+            if self._map[key].action not in _ABSENT_ACTIONS
+        )
+
+    def _matching_keys(self, client_id: Optional[str], connection_id: Optional[str]) -> List[str]:
+        by_client_id = self._keys_by_client_id.get(client_id, {}) if client_id else None
+        by_connection_id = self._keys_by_connection_id.get(connection_id, {}) if connection_id else None
+
+        if by_client_id is None:
+            return list(by_connection_id)
+        if by_connection_id is None:
+            return list(by_client_id)
+        # Walk the smaller index and look keys up in the other
+        if len(by_connection_id) < len(by_client_id):
+            by_client_id, by_connection_id = by_connection_id, by_client_id
+        return [key for key in by_client_id if key in by_connection_id]
+
+    def _set(self, key: str, item: PresenceMessage, existing: Optional[PresenceMessage] = None) -> None:
+        """Stores a member in place of existing, if any, keeping the indexes up to date"""
+        if self._change_listeners:
+            self._notify_change(key, existing)
+        self._map[key] = item
+        self._epochs[key] = self._sync_epoch
+        self._values = None
+
+        if existing is None:
+            self._index(key, item)
+        else:
+            if existing.action in _ABSENT_ACTIONS:
+                self._absent_count -= 1
+            # Only happens when the key is not derived from both ids
+            if existing.client_id != item.client_id or existing.connection_id != item.connection_id:
+                self._unindex(key, existing)
+                self._index(key, item)
+
+        if item.action in _ABSENT_ACTIONS:
+            self._absent_count += 1
+
+    def _delete(self, key: str) -> None:
+        """Removes a member, keeping the indexes up to date"""
+        if self._change_listeners:
+            self._notify_change(key, self._map[key])
+        existing = self._map.pop(key)
+        self._epochs.pop(key, None)
+        if existing.action in _ABSENT_ACTIONS:
+            self._absent_count -= 1
+        self._unindex(key, existing)
+        self._values = None
+
+    def _notify_change(self, key: str, existing: Optional[PresenceMessage]) -> None:
+        for listener in self._change_listeners:
+            try:
+                listener(key, existing)
+            except Exception as e:
+                self._logger.error(f"Error in presence map change listener: {e}")
+
+    def _index(self, key: str, item: PresenceMessage) -> None:
+        for index, value in ((self._keys_by_client_id, item.client_id),
+                             (self._keys_by_connection_id, item.connection_id)):
+            index.setdefault(value, {})[key] = None
+
+    def _unindex(self, key: str, item: PresenceMessage) -> None:
+        for index, value in ((self._keys_by_client_id, item.client_id),
+                             (self._keys_by_connection_id, item.connection_id)):
+            keys = index.get(value)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del index[value]
 
     def start_sync(self) -> None:
         """
         Start a SYNC operation (RTP18).
 
-        Captures current members as residual members to track which ones
-        are not seen during the sync.
+        Starts a new sync epoch. Current members that are not seen again
+        before the sync ends are residual members.
         """
         self._logger.info(f"PresenceMap.start_sync: starting sync (in_progress={self._sync_in_progress})")
 
         # May be called multiple times while a sync is in progress
         if not self._sync_in_progress:
-            # Copy current map as residual members
-            self._residual_members = dict(self._map)
+            self._sync_epoch += 1
             self._sync_in_progress = True
-            self._logger.debug(f"PresenceMap.start_sync: captured {len(self._residual_members)} residual members")
+            self._logger.debug(f"PresenceMap.start_sync: {len(self._map)} members to be seen again")
 
     def end_sync(self) -> Tuple[List[PresenceMessage], List[PresenceMessage]]:
         """
@@ -278,26 +358,22 @@ class PresenceMap:
         absent_list: List[PresenceMessage] = []
 
         if self._sync_in_progress:
-            # Collect ABSENT members and remove them from map (RTP2h2b)
             keys_to_remove = []
+            epochs = self._epochs
             for key, msg in self._map.items():
-                if msg.action == PresenceAction.ABSENT:
-                    absent_list.append(msg)
+                if msg.action in _ABSENT_ACTIONS:
+                    # Collect ABSENT members (RTP2h2b)
+                    absent_list.append(msg._with_action(PresenceAction.ABSENT))
+                    keys_to_remove.append(key)
+                elif epochs.get(key) != self._sync_epoch:
+                    # Collect residual members (members present at start but not seen during sync)
+                    # These need synthesized LEAVE events (RTP19)
+                    residual_list.append(msg._with_action(PresenceAction.PRESENT))
                     keys_to_remove.append(key)
 
             for key in keys_to_remove:
-                del self._map[key]
-
-            # Collect residual members (members present at start but not seen during sync)
-            # These need synthesized LEAVE events (RTP19)
-            if self._residual_members:
-                residual_list = list(self._residual_members.values())
-                # Remove residual members from map
-                for key in self._residual_members.keys():
-                    if key in self._map:
-                        del self._map[key]
-
-            self._residual_members = None
+                self._delete(key)
+
             self._sync_in_progress = False
             self._logger.debug(
                 f"PresenceMap.end_sync: removed {len(absent_list)} absent members, "
@@ -344,8 +420,16 @@ class PresenceMap:
             except Exception as e:
                 self._logger.error(f"Error in sync complete callback during clear: {e}")
 
+        if self._change_listeners:
+            for key, item in self._map.items():
+                self._notify_change(key, item)
+
         self._map.clear()
-        self._residual_members = None
+        self._keys_by_client_id.clear()
+        self._keys_by_connection_id.clear()
+        self._absent_count = 0
+        self._values = None
+        self._epochs.clear()
         self._sync_in_progress = False
         self._sync_complete_callbacks.clear()
         self._logger.debug("PresenceMap.clear: cleared all members")
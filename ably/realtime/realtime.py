@@ -75,6 +75,11 @@ class AblyRealtime(AblyRest):
             connection_state_ttl: float
                 The duration that Ably will persist the connection state for when a Realtime client is abruptly
                 disconnected.
+            recover: str
+                A recovery key from Connection.create_recovery_key(), or a file saved with
+                Connection.save_recovery_key() and read with RecoveryKeyContext.load(). The client recovers that
+                connection on its first connection attempt, carrying on with its msgSerial, and attaches its
+                channels from their channel serials, so no messages are missed in between.
             suspended_retry_timeout: float
                 When the connection enters the SUSPENDED state, after this delay, if the state is still SUSPENDED,
                 the client library attempts to reconnect automatically. The default is 30 seconds.
@@ -83,6 +88,65 @@ class AblyRealtime(AblyRest):
                 In the event of a failure to connect to the primary endpoint, the client will send a
                 GET request to this URL to check if the internet is available. If this request returns
                 a success response the client will attempt to connect to a fallback host.
+            connectivity_check_cache_window: float
+                The result of the connectivity check is reused for this many milliseconds, so trying several
+                fallback hosts in a row sends a single request. The default is 10 seconds.
+            max_concurrent_attaches: int
+                The maximum number of channel ATTACH/DETACH requests awaiting a response at any one time.
+                Further requests are queued and sent as responses arrive, which keeps reconnecting with
+                many channels from flooding the connection. Set to 0 or None to disable. The default is 500.
+            max_attaches_per_second: float
+                The maximum rate at which channel ATTACH/DETACH requests are sent, evenly spaced, on top of
+                max_concurrent_attaches. The default is None (unlimited).
+            channel_idle_timeout: float
+                Channels without listeners or entered presence members that have not been used for this
+                many milliseconds are detached and released automatically, so services touching many
+                short-lived channels do not grow without bound. Channels with options, such as a cipher,
+                are never released this way, nor counted against max_channels. The default is None (never).
+            max_channels: int
+                The number of channels to keep. Beyond it, the least recently used channels are detached and
+                released, skipping those still in use as for channel_idle_timeout. The default is None (unbounded).
+            vcdiff_thread_threshold: int
+                Delta-compressed messages whose delta and base payload together reach this many bytes are
+                decoded in a worker thread, so large documents do not block the event loop. Messages are
+                still delivered in order. The default is None (always decode on the event loop).
+            vcdiff_encoder: VCDiffEncoder
+                When set, messages published on unencrypted realtime channels are sent as VCDiff deltas of the
+                previous payload published on the channel whenever the delta is smaller. Subscribers need a
+                vcdiff_decoder and must receive every message in order. The default is None (never).
+            binary_as_bytes: bool
+                When True, binary data of messages received on realtime channels is delivered as bytes, as
+                decoded from the wire, instead of being copied into a bytearray. The default is False.
+            fallback_race_delay: float
+                When set, the client connects to the primary and fallback hosts in parallel rather than one
+                after another: an attempt on the next host starts after this many milliseconds without a
+                response, and the first host to respond is kept. The default is None (one host at a time).
+            standby_transport: bool
+                When True, a TCP connection to another host is kept open while connected, and the connection
+                is resumed over it as soon as the transport fails, saving the name lookup and TCP handshake.
+                The default is False.
+            disconnected_retry_backoff: float
+                When set, the first reconnection attempt after a failure to connect waits this many milliseconds,
+                doubling with each further attempt up to disconnected_retry_timeout, less a random jitter of up
+                to 20%. The default is None (always wait disconnected_retry_timeout).
+            outbound_high_water_mark: int
+                Protocol messages are written to the websocket in order by a single task. When this many are
+                waiting to be written, publishing waits until the queue has drained to half of it. The default is
+                None (unbounded).
+            max_queued_messages: int
+                The number of messages that may be queued in memory while the connection is not connected, for
+                queue_messages. The default is None (unbounded).
+            max_queued_bytes: int
+                The size in bytes of the messages that may be queued in memory while the connection is not
+                connected. The default is None (unbounded).
+            queue_overflow_policy: str
+                What happens to a message published when the queue is full: 'fail' raises an exception, 'block'
+                waits until the queue has been sent or failed, and 'drop_oldest' fails the oldest queued message
+                to make room. The default is 'fail'.
+            queue_spill_path: str
+                A directory where messages beyond max_queued_messages or max_queued_bytes are written instead of
+                being held in memory, or all queued messages when neither is set. They are read back and sent
+                in order once connected. The default is None (never spill).
         Raises
         ------
         ValueError
@@ -103,6 +167,7 @@ class AblyRealtime(AblyRest):
         self.key = key
         self.__connection = Connection(self)
         self.__channels = Channels(self)
+        self.__connection.connection_manager.restore_channels()
 
         # RTN3
         if self.options.auto_connect:
@@ -129,6 +194,7 @@ class AblyRealtime(AblyRest):
         log.info('Realtime.close() called')
         # RTC16a
         await self.connection.close()
+        await self.connection.connection_manager.close_connectivity_client()
         await super().close()
 
     # RTC2
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from ably.realtime.channel import RealtimeChannel
+from ably.realtime.realtime import AblyRealtime
+from ably.types.channeloptions import ChannelOptions
+from ably.types.channelstate import ChannelState
+from ably.types.connectionstate import ConnectionState
+from ably.types.operations import PublishResult
+from ably.util.exceptions import AblyException
+
+log = logging.getLogger(__name__)
+
+# ThreadedChannels entries whose channel the client has released, such as for being idle, are dropped
+# once there are at least this many entries
+_MIN_PRUNE_SIZE = 64
+
+
+class _ListenerLoops:
+    """An event loop for each executor thread, on which coroutine listeners run there"""
+
+    def __init__(self):
+        self.__local = threading.local()
+        self.__loops: list[asyncio.AbstractEventLoop] = []
+        self.__lock = threading.Lock()
+
+    def run(self, coro) -> None:
+        loop = getattr(self.__local, 'loop', None)
+        if loop is None or loop.is_closed():
+            loop = self.__local.loop = asyncio.new_event_loop()
+            with self.__lock:
+                self.__loops.append(loop)
+        loop.run_until_complete(coro)
+
+    def close(self) -> None:
+        with self.__lock:
+            loops, self.__loops = self.__loops, []
+        for loop in loops:
+            # A loop still running a listener in an executor of the caller's is left to its thread
+            if not loop.is_running():
+                loop.close()
+
+
+def _call_listener(loops: _ListenerLoops, listener: Callable, *args) -> None:
+    result = listener(*args)
+    if asyncio.iscoroutine(result):
+        loops.run(result)
+
+
+def _log_listener_error(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        log.error('AblyRealtimeThreaded: uncaught listener exception', exc_info=future.exception())
+
+
+class _Dispatcher:
+    """Runs listeners in the executor rather than on the event loop thread"""
+
+    def __init__(self, executor: Executor, loops: _ListenerLoops):
+        self.__executor = executor
+        self.__loops = loops
+        # Listener -> the wrapper registered with the event loop side, to unsubscribe it
+        self.__wrappers: dict[Callable, Callable] = {}
+        self.__lock = threading.Lock()
+
+    def wrap(self, listener: Callable) -> Callable:
+        with self.__lock:
+            wrapper = self.__wrappers.get(listener)
+            if wrapper is None:
+                def wrapper(*args):
+                    self.dispatch(listener, *args)
+                self.__wrappers[listener] = wrapper
+            return wrapper
+
+    def unwrap(self, listener: Callable, forget: bool = False) -> Callable:
+        if forget:
+            return self.__wrappers.pop(listener, listener)
+        return self.__wrappers.get(listener, listener)
+
+    def forget_all(self) -> None:
+        self.__wrappers.clear()
+
+    def dispatch(self, listener: Callable, *args) -> None:
+        try:
+            future = self.__executor.submit(_call_listener, self.__loops, listener, *args)
+        except RuntimeError:
+            # The executor is shut down as the client closes
+            log.debug('AblyRealtimeThreaded: dropping event for a listener after close')
+            return
+        future.add_done_callback(_log_listener_error)
+
+
+class ThreadedConnection:
+    """The connection of an AblyRealtimeThreaded client, usable from any thread"""
+
+    def __init__(self, client: AblyRealtimeThreaded, dispatcher: _Dispatcher):
+        self.__client = client
+        self.__dispatcher = dispatcher
+
+    @property
+    def __connection(self):
+        return self.__client.realtime.connection
+
+    @property
+    def state(self) -> ConnectionState:
+        return self.__connection.state
+
+    @property
+    def error_reason(self) -> AblyException | None:
+        return self.__connection.error_reason
+
+    def on(self, *args) -> None:
+        """Registers a listener for the named connection event, if given, and otherwise for all events
+
+        The listener is called in the client's executor.
+        """
+        args = args[:-1] + (self.__dispatcher.wrap(args[-1]),)
+        self.__client._call(self.__connection.on, *args)
+
+    def off(self, *args) -> None:
+        if args:
+            args = args[:-1] + (self.__dispatcher.unwrap(args[-1]),)
+        self.__client._call(self.__connection.off, *args)
+
+    def wait_for(self, state: ConnectionState, timeout: float | None = None) -> None:
+        """Blocks until the connection is in the given state
+
+        Raises
+        ------
+        TimeoutError
+            If the state is not reached within timeout seconds
+        """
+        async def when_state():
+            await self.__connection._when_state(state)
+        self.__client._run(when_state(), timeout)
+
+    def ping(self, timeout: float | None = None) -> float:
+        return self.__client._run(self.__connection.ping(), timeout)
+
+
+class ThreadedChannel:
+    """A channel of an AblyRealtimeThreaded client, usable from any thread
+
+    Listeners are called in the client's executor; coroutine listeners are run there, on an event loop
+    kept by each executor thread.
+    Methods block the calling thread until the operation
+    completes on the event loop, except publish_nowait(), which returns a concurrent.futures.Future.
+    """
+
+    def __init__(self, client: AblyRealtimeThreaded, channel: RealtimeChannel, dispatcher: _Dispatcher):
+        self.__client = client
+        self.__channel = channel
+        self.__dispatcher = dispatcher
+
+    @property
+    def name(self) -> str:
+        return self.__channel.name
+
+    @property
+    def state(self) -> ChannelState:
+        return self.__channel.state
+
+    @property
+    def error_reason(self) -> AblyException | None:
+        return self.__channel.error_reason
+
+    @property
+    def channel(self) -> RealtimeChannel:
+        """The underlying channel, only to be used from the event loop thread"""
+        return self.__channel
+
+    def attach(self, timeout: float | None = None) -> None:
+        self.__client._run(self.__channel.attach(), timeout)
+
+    def detach(self, timeout: float | None = None) -> None:
+        self.__client._run(self.__channel.detach(), timeout)
+
+    def subscribe(self, *args, timeout: float | None = None) -> None:
+        """Registers a listener, as with RealtimeChannel.subscribe(), and blocks until the channel is attached"""
+        if not args or not callable(args[-1]):
+            raise ValueError('invalid subscribe arguments')
+        args = args[:-1] + (self.__dispatcher.wrap(args[-1]),)
+        self.__client._run(self.__channel.subscribe(*args), timeout)
+
+    def unsubscribe(self, *args) -> None:
+        if not args:
+            self.__dispatcher.forget_all()
+        elif len(args) == 1:
+            args = (self.__dispatcher.unwrap(args[0], forget=True),)
+        else:
+            args = args[:-1] + (self.__dispatcher.unwrap(args[-1]),)
+        self.__client._call(self.__channel.unsubscribe, *args)
+
+    def publish(self, *args, timeout: float | None = None, **kwargs) -> PublishResult:
+        """Publishes messages, as with RealtimeChannel.publish(), and blocks until they are acknowledged"""
+        return self.__client._run(self.__channel.publish(*args, **kwargs), timeout)
+
+    def publish_nowait(self, *args, **kwargs) -> Future:
+        """Publishes messages without waiting, returning a Future of the PublishResult"""
+        return self.__client._submit(self.__channel.publish(*args, **kwargs))
+
+
+class ThreadedChannels:
+    def __init__(self, client: AblyRealtimeThreaded, executor: Executor, loops: _ListenerLoops):
+        self.__client = client
+        self.__executor = executor
+        self.__loops = loops
+        # Only used on the event loop thread, so threads getting the same channel at once share its
+        # ThreadedChannel, and so its listeners
+        self.__all: dict[str, ThreadedChannel] = {}
+        self.__prune_size = _MIN_PRUNE_SIZE
+
+    def get(self, name: str, options: ChannelOptions | None = None, **kwargs) -> ThreadedChannel:
+        return self.__client._call(self.__get, name, options, **kwargs)
+
+    def __get(self, name: str, options: ChannelOptions | None, **kwargs) -> ThreadedChannel:
+        channel = self.__client.realtime.channels.get(name, options, **kwargs)
+        threaded = self.__all.get(channel.name)
+        # The channel may have been released and created again since
+        if threaded is None or threaded.channel is not channel:
+            threaded = ThreadedChannel(self.__client, channel, _Dispatcher(self.__executor, self.__loops))
+            self.__all[channel.name] = threaded
+            if len(self.__all) > self.__prune_size:
+                self.__prune()
+        return threaded
+
+    def __prune(self) -> None:
+        live = set(self.__client.realtime.channels)
+        self.__all = {name: threaded for name, threaded in self.__all.items() if threaded.channel in live}
+        self.__prune_size = max(2 * len(self.__all), _MIN_PRUNE_SIZE)
+
+    def __getitem__(self, name: str) -> ThreadedChannel:
+        return self.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__client.realtime.channels
+
+    def release(self, name: str) -> None:
+        self.__client._call(self.__release, name)
+
+    def __release(self, name: str) -> None:
+        self.__all.pop(name, None)
+        self.__client.realtime.channels.release(name)
+
+
+class AblyRealtimeThreaded:
+    """
+    An Ably Realtime client for applications without an asyncio event loop
+
+    The AblyRealtime client runs on an event loop in a background thread, owned by this object. Its
+    methods can be called from any thread: they hand the work to the event loop and block until it is
+    done. Listeners are not called on the event loop thread but in `executor`, so slow listeners do not
+    hold up the connection. The default executor is a single thread, which calls listeners in the order
+    of the events; with more threads, listeners may run concurrently and out of order.
+
+    Attributes
+    ----------
+    connection: ThreadedConnection
+        realtime connection object
+    channels: ThreadedChannels
+        realtime channel object
+    realtime: AblyRealtime
+        the underlying client, only to be used from the event loop thread
+
+    Methods
+    -------
+    connect()
+        Establishes the realtime connection
+    close()
+        Closes the realtime connection and stops the event loop thread
+    """
+
+    def __init__(self, key: str | None = None, executor: Executor | None = None, **kwargs):
+        """Constructs a client, passing the key and client options to AblyRealtime
+
+        Parameters
+        ----------
+        key: str
+            A valid ably API key string
+        executor: Executor, optional
+            The executor calling listeners. The default is a single thread, shut down on close.
+        """
+        self.__owns_executor = executor is None
+        self.__executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='ably-listeners')
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__run_loop, name='ably-realtime', daemon=True)
+        self.__thread.start()
+
+        async def create():
+            return AblyRealtime(key, loop=self.__loop, **kwargs)
+
+        try:
+            self.__realtime = self._run(create())
+        except BaseException:
+            self.__stop_loop()
+            if self.__owns_executor:
+                self.__executor.shutdown()
+            raise
+
+        self.__listener_loops = _ListenerLoops()
+        self.__connection = ThreadedConnection(self, _Dispatcher(self.__executor, self.__listener_loops))
+        self.__channels = ThreadedChannels(self, self.__executor, self.__listener_loops)
+
+    def __run_loop(self) -> None:
+        asyncio.set_event_loop(self.__loop)
+        self.__loop.run_forever()
+
+    def _submit(self, coro) -> Future:
+        error = None
+        if threading.current_thread() is self.__thread:
+            error = 'AblyRealtimeThreaded methods cannot be called from its event loop thread'
+        elif self.__loop.is_closed():
+            error = 'AblyRealtimeThreaded is closed'
+        if error is not None:
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise RuntimeError(error)
+        return asyncio.run_coroutine_threadsafe(coro, self.__loop)
+
+    def _run(self, coro, timeout: float | None = None) -> Any:
+        """Runs a coroutine on the event loop, blocking until its result"""
+        future = self._submit(coro)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def _call(self, function: Callable, *args, **kwargs) -> Any:
+        """Calls a function on the event loop, blocking until its result"""
+        async def call():
+            return function(*args, **kwargs)
+        return self._run(call())
+
+    def connect(self) -> None:
+        self._call(self.__realtime.connect)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Closes the connection, then stops the event loop thread and the default executor"""
+        if not self.__thread.is_alive():
+            return
+        log.info('AblyRealtimeThreaded.close() called')
+        try:
+            self._run(self.__realtime.close(), timeout)
+        finally:
+            self.__stop_loop()
+            if self.__owns_executor:
+                self.__executor.shutdown(wait=True)
+            self.__listener_loops.close()
+
+    def __stop_loop(self) -> None:
+        async def cancel_tasks():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(cancel_tasks(), self.__loop).result()
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excinfo):
+        self.close()
+
+    @property
+    def realtime(self) -> AblyRealtime:
+        return self.__realtime
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.__loop
+
+    @property
+    def connection(self) -> ThreadedConnection:
+        return self.__connection
+
+    @property
+    def channels(self) -> ThreadedChannels:
+        return self.__channels
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import base64
-import json
 import logging
 import os
 from urllib import parse
@@ -16,6 +15,7 @@ from ably.types.annotation import (
 )
 from ably.types.message import Message
 from ably.types.options import Options
+from ably.util import serializer
 from ably.util.exceptions import AblyException
 
 log = logging.getLogger(__name__)
@@ -141,7 +141,7 @@ class RestAnnotations:
 
         # Encode based on protocol
         if not self.__channel.ably.options.use_binary_protocol:
-            request_body = json.dumps(request_body, separators=(',', ':'))
+            request_body = serializer.dumps(request_body)
         else:
             request_body = msgpack.packb(request_body, use_bin_type=True)
 
@@ -1,7 +1,7 @@
 import base64
-import json
 import logging
 import os
+import time
 from collections import OrderedDict
 from typing import Iterator, Optional
 from urllib import parse
@@ -20,6 +20,7 @@ from ably.types.message import (
 )
 from ably.types.operations import MessageOperation, PublishResult, UpdateDeleteResult
 from ably.types.presence import Presence
+from ably.util import serializer
 from ably.util.crypto import get_cipher
 from ably.util.exceptions import (
     AblyException,
@@ -30,17 +31,96 @@ from ably.util.exceptions import (
 log = logging.getLogger(__name__)
 
 
+def _channel_base_path(name):
+    return '/channels/{}/'.format(parse.quote_plus(name, safe=':'))
+
+
+def _messages_from_args(arg=None, *args):
+    if isinstance(arg, Message):
+        return [arg]
+    elif isinstance(arg, list):
+        return arg
+    elif isinstance(arg, str) or arg is None:
+        return [Message(arg, args[0] if args else None)]
+    else:
+        raise TypeError(f'Unexpected type {type(arg)}')
+
+
+def _assign_idempotent_ids(messages):
+    # RSL1k1
+    if all(message.id is None for message in messages):
+        base_id = base64.b64encode(os.urandom(12)).decode()
+        for serial, message in enumerate(messages):
+            message.id = f'{base_id}:{serial}'
+
+
+def _publish_request_body(ably, messages, cipher):
+    # Idempotent publishing
+    if ably.options.idempotent_rest_publishing:
+        _assign_idempotent_ids(messages)
+
+    for m in messages:
+        if m.client_id == '*':
+            raise IncompatibleClientIdException(
+                'Wildcard client_id is reserved and cannot be used when publishing messages',
+                400, 40012)
+        elif m.client_id is not None and not ably.auth.can_assume_client_id(m.client_id):
+            raise IncompatibleClientIdException(
+                f'Cannot publish with client_id \'{m.client_id}\' as it is incompatible with the '
+                f'current configured client_id \'{ably.auth.client_id}\'',
+                400, 40012)
+
+        if cipher:
+            m.encrypt(cipher)
+
+    request_body = [
+        message.as_dict(binary=ably.options.use_binary_protocol)
+        for message in messages]
+
+    if len(request_body) == 1:
+        request_body = request_body[0]
+
+    return request_body
+
+
+def _encode_request_body(ably, request_body):
+    if not ably.options.use_binary_protocol:
+        return serializer.dumps(request_body)
+    return msgpack.packb(request_body, use_bin_type=True)
+
+
+def _messages_path(base_path, params=None):
+    path = base_path + 'messages'
+    if params:
+        params = {k: str(v).lower() if isinstance(v, bool) else v for k, v in params.items()}
+        path += '?' + parse.urlencode(params)
+    return path
+
+
+async def _post_messages(ably, base_path, messages, cipher, params=None, timeout=None):
+    request_body = _encode_request_body(ably, _publish_request_body(ably, messages, cipher))
+    path = _messages_path(base_path, params)
+    response = await ably.http.post(path, body=request_body, timeout=timeout)
+
+    # Parse response to extract serials
+    result_data = response.to_native()
+    if result_data and isinstance(result_data, dict):
+        return PublishResult.from_dict(result_data)
+    return PublishResult()
+
+
 class Channel:
     __annotations: RestAnnotations
 
     def __init__(self, ably, name, options):
         self.__ably = ably
         self.__name = name
-        self.__base_path = '/channels/{}/'.format(parse.quote_plus(name, safe=':'))
+        self.__base_path = _channel_base_path(name)
         self.__cipher = None
         self.options = options
-        self.__presence = Presence(self)
-        self.__annotations = RestAnnotations(self)
+        # Created on first use, most channels are only published to
+        self.__presence = None
+        self.__annotations = None
 
     @catch_all
     async def history(self, direction=None, limit: int = None, start=None, end=None):
@@ -56,39 +136,7 @@ class Channel:
         """
         Helper private method, separated from publish() to test RSL1j
         """
-        # Idempotent publishing
-        if self.ably.options.idempotent_rest_publishing:
-            # RSL1k1
-            if all(message.id is None for message in messages):
-                base_id = base64.b64encode(os.urandom(12)).decode()
-                for serial, message in enumerate(messages):
-                    message.id = f'{base_id}:{serial}'
-
-        request_body_list = []
-        for m in messages:
-            if m.client_id == '*':
-                raise IncompatibleClientIdException(
-                    'Wildcard client_id is reserved and cannot be used when publishing messages',
-                    400, 40012)
-            elif m.client_id is not None and not self.ably.auth.can_assume_client_id(m.client_id):
-                raise IncompatibleClientIdException(
-                    f'Cannot publish with client_id \'{m.client_id}\' as it is incompatible with the '
-                    f'current configured client_id \'{self.ably.auth.client_id}\'',
-                    400, 40012)
-
-            if self.cipher:
-                m.encrypt(self.__cipher)
-
-            request_body_list.append(m)
-
-        request_body = [
-            message.as_dict(binary=self.ably.options.use_binary_protocol)
-            for message in request_body_list]
-
-        if len(request_body) == 1:
-            request_body = request_body[0]
-
-        return request_body
+        return _publish_request_body(self.ably, messages, self.__cipher)
 
     async def _publish(self, arg, *args, **kwargs):
         if isinstance(arg, Message):
@@ -104,23 +152,8 @@ class Channel:
         return await self.publish_messages([message], params, timeout=timeout)
 
     async def publish_messages(self, messages, params=None, timeout=None):
-        request_body = self.__publish_request_body(messages)
-        if not self.ably.options.use_binary_protocol:
-            request_body = json.dumps(request_body, separators=(',', ':'))
-        else:
-            request_body = msgpack.packb(request_body, use_bin_type=True)
-
-        path = self.__base_path + 'messages'
-        if params:
-            params = {k: str(v).lower() if isinstance(v, bool) else v for k, v in params.items()}
-            path += '?' + parse.urlencode(params)
-        response = await self.ably.http.post(path, body=request_body, timeout=timeout)
-
-        # Parse response to extract serials
-        result_data = response.to_native()
-        if result_data and isinstance(result_data, dict):
-            return PublishResult.from_dict(result_data)
-        return PublishResult()
+        self.ably.channels._touch(self.name)
+        return await _post_messages(self.ably, self.__base_path, messages, self.__cipher, params, timeout)
 
     async def publish_name_data(self, name, data, timeout=None):
         messages = [Message(name, data)]
@@ -206,7 +239,7 @@ class Channel:
         request_body = update_message.as_dict(binary=self.ably.options.use_binary_protocol)
 
         if not self.ably.options.use_binary_protocol:
-            request_body = json.dumps(request_body, separators=(',', ':'))
+            request_body = serializer.dumps(request_body)
         else:
             request_body = msgpack.packb(request_body, use_bin_type=True)
 
@@ -367,10 +400,14 @@ class Channel:
 
     @property
     def presence(self):
+        if self.__presence is None:
+            self.__presence = Presence(self)
         return self.__presence
 
     @property
     def annotations(self) -> RestAnnotations:
+        if self.__annotations is None:
+            self.__annotations = RestAnnotations(self)
         return self.__annotations
 
     @options.setter
@@ -388,6 +425,10 @@ class Channels:
     def __init__(self, rest):
         self.__ably = rest
         self.__all: dict = OrderedDict()
+        # Channel name -> monotonic time it was last used, least recently used first.
+        # Only maintained when the channel_idle_timeout or max_channels option is set.
+        self.__last_used: OrderedDict = OrderedDict()
+        self.__evicted_count = 0
 
     def get(self, name, **kwargs):
         if isinstance(name, bytes):
@@ -400,6 +441,7 @@ class Channels:
             if len(kwargs) != 0:
                 result.options = kwargs
 
+        self._touch(name)
         return result
 
     def __getitem__(self, key):
@@ -421,6 +463,39 @@ class Channels:
     def __iter__(self) -> Iterator[str]:
         return iter(self.__all.values())
 
+    def __len__(self) -> int:
+        return len(self.__all)
+
+    @property
+    def evicted_count(self) -> int:
+        """Number of channels released because they were idle, or to stay within max_channels"""
+        return self.__evicted_count
+
+    async def publish_to(self, name, *args, params=None, timeout=None):
+        """Publishes a message on a channel without creating a Channel object for it.
+
+        :Parameters:
+        - `name`: the channel name.
+        - `args`: the same as for `Channel.publish`: `name` and `data`,
+          a `Message` object or a list of `Message` objects.
+
+        If the channel is already in use its options, such as the cipher,
+        apply; channels with options are never evicted, so this holds for
+        as long as they are not released. Otherwise messages are published
+        unencrypted and the channel is not cached, which suits publishing to
+        many short-lived channels.
+        """
+        if isinstance(name, bytes):
+            name = name.decode('ascii')
+
+        messages = _messages_from_args(*args)
+        channel = self.__all.get(name)
+        if channel is None:
+            return await _post_messages(self.__ably, _channel_base_path(name), messages, None, params, timeout)
+
+        self._touch(name)
+        return await _post_messages(self.__ably, channel.base_path, messages, channel.cipher, params, timeout)
+
     # RSN4
     def release(self, name: str):
         """Releases a Channel object, deleting it, and enabling it to be garbage collected.
@@ -434,6 +509,57 @@ class Channels:
             Channel name
         """
 
+        self.__last_used.pop(name, None)
         if name not in self.__all:
             return
         del self.__all[name]
+
+    def _touch(self, name: str) -> None:
+        """Records use of a channel and releases channels that are idle or least recently used"""
+        options = self.__ably.options
+        idle_timeout = options.channel_idle_timeout
+        max_channels = options.max_channels
+        if not (idle_timeout or max_channels) or name not in self.__all:
+            return
+
+        now = time.monotonic()
+        if self._has_options(self.__all[name]):
+            # Evicting it would silently drop its options, such as the cipher
+            self.__last_used.pop(name, None)
+        else:
+            self.__last_used[name] = now
+            self.__last_used.move_to_end(name)
+        cutoff = now - idle_timeout / 1000 if idle_timeout else None
+        self.__evict(cutoff, max_channels)
+
+    def __evict(self, cutoff: Optional[float], max_channels: Optional[int]) -> None:
+        # Visit the least recently used channels first, but never the channel just used, which is last.
+        # Channels that must be kept are moved to the back, so each channel is visited at most once.
+        for _ in range(len(self.__last_used) - 1):
+            name, last_used = next(iter(self.__last_used.items()))
+            expired = cutoff is not None and last_used <= cutoff
+            over_capacity = max_channels and len(self.__last_used) > max_channels
+            if not (expired or over_capacity):
+                return
+
+            del self.__last_used[name]
+            channel = self.__all.get(name)
+            if channel is None or self._has_options(channel):
+                continue
+            if not self._evict(channel):
+                # Still in use, check again later
+                self.__last_used[name] = time.monotonic()
+
+    def _has_options(self, channel) -> bool:
+        """Whether the channel has options, which are lost if it is evicted"""
+        return bool(channel.options)
+
+    def _evict(self, channel) -> bool:
+        """Releases an idle channel, returning False if it must be kept"""
+        self.release(channel.name)
+        self._count_eviction(channel.name)
+        return True
+
+    def _count_eviction(self, name: str) -> None:
+        self.__evicted_count += 1
+        log.debug(f'Channels: evicted channel {name}')
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable
+
+from ably.http.httputils import HttpUtils
+from ably.rest.channel import (
+    _assign_idempotent_ids,
+    _channel_base_path,
+    _encode_request_body,
+    _messages_from_args,
+    _messages_path,
+    _publish_request_body,
+)
+from ably.util.exceptions import AblyException
+
+if TYPE_CHECKING:
+    from ably.rest.rest import AblyRest
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS outbox (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        body BLOB NOT NULL
+    )
+    ''',
+    # Requests Ably rejected, kept for inspection rather than retried
+    '''
+    CREATE TABLE IF NOT EXISTS outbox_rejected (
+        seq INTEGER PRIMARY KEY,
+        path TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        body BLOB NOT NULL,
+        status_code INTEGER NOT NULL,
+        code INTEGER NOT NULL,
+        message TEXT
+    )
+    ''',
+)
+
+
+def _is_retryable(error: Exception) -> bool:
+    # Network errors, server errors and rate limiting may succeed later; other responses will not
+    if not isinstance(error, AblyException):
+        return True
+    return error.is_server_error or error.status_code == 429
+
+
+class RejectedRequest:
+    """A publish request of an Outbox that Ably rejected, such as for invalid data or a missing capability"""
+
+    def __init__(self, seq: int, path: str, error: AblyException):
+        self.__seq = seq
+        self.__path = path
+        self.__error = error
+
+    @property
+    def seq(self) -> int:
+        return self.__seq
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def error(self) -> AblyException:
+        return self.__error
+
+
+class DrainResult:
+    """The result of Outbox.drain()"""
+
+    def __init__(self, published: int = 0, rejected: list[RejectedRequest] | None = None):
+        self.__published = published
+        self.__rejected = rejected or []
+
+    @property
+    def published(self) -> int:
+        """The number of requests that succeeded"""
+        return self.__published
+
+    @property
+    def rejected(self) -> list[RejectedRequest]:
+        """The requests Ably rejected in this drain, moved out of the outbox"""
+        return self.__rejected
+
+
+class Outbox:
+    """A local SQLite file of messages to publish over REST, kept until the publish succeeds
+
+    Messages are given their idempotent ids when added, and the encoded request is stored, so that
+    publishing them again after the process restarts cannot duplicate them (RSL1k). drain() publishes
+    what the outbox holds, up to max_concurrency requests at a time, and removes each request once
+    it has succeeded. Requests running concurrently may reach Ably in a different order than they were
+    added; use max_concurrency=1 where the order matters.
+
+    A request that fails with a network error, a server error or rate limiting stays in the outbox for
+    the next drain(). One that Ably rejects otherwise, such as for invalid data or a missing capability,
+    would fail again, so it is moved to the rejected requests, listed by rejected().
+
+    If a channel is in use on the client when messages are added, its options, such as the cipher,
+    apply, as with Channels.publish_to().
+
+    The SQLite file is only used from a thread of the outbox, so that no method blocks the event loop
+    on disk access. add() returns once its write is committed.
+    """
+
+    def __init__(self, ably: AblyRest, path: str, max_concurrency: int = 10):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.__ably = ably
+        self.__max_concurrency = max_concurrency
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ably-outbox')
+        self.__db: sqlite3.Connection | None = None
+        # Runs before anything else submitted to the outbox thread; an error is raised by the first call
+        self.__opened = self.__executor.submit(self.__open, path)
+        self.__drain_lock: asyncio.Lock | None = None
+
+    def __open(self, path: str) -> None:
+        self.__db = sqlite3.connect(path)
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.execute('PRAGMA synchronous=NORMAL')
+        for statement in _SCHEMA:
+            self.__db.execute(statement)
+        self.__db.commit()
+
+    async def __run_async(self, function: Callable, *args) -> Any:
+        """Calls a function in the outbox thread, without blocking the event loop"""
+        await asyncio.wrap_future(self.__opened)
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, function, *args)
+
+    async def count(self) -> int:
+        """The number of publish requests waiting in the outbox"""
+        return await self.__run_async(
+            lambda: self.__db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0])
+
+    async def add(self, name, *args, params=None) -> list[str]:
+        """Store messages to publish on a channel, returning their ids
+
+        :Parameters:
+        - `name`: the channel name.
+        - `args`: the same as for `Channel.publish`: `name` and `data`,
+          a `Message` object or a list of `Message` objects.
+        - `params`: query parameters for the publish request.
+
+        Messages that already have ids keep them. Once this returns, the messages are published by
+        a later drain(), even if the process restarts in between.
+        """
+        if isinstance(name, bytes):
+            name = name.decode('ascii')
+
+        messages = _messages_from_args(*args)
+        _assign_idempotent_ids(messages)
+
+        channels = self.__ably.channels
+        cipher = channels.get(name).cipher if name in channels else None
+        body = _encode_request_body(self.__ably, _publish_request_body(self.__ably, messages, cipher))
+        content_type = HttpUtils.mime_types['binary' if self.__ably.options.use_binary_protocol else 'json']
+
+        await self.__run_async(self.__insert, _messages_path(_channel_base_path(name), params), content_type, body)
+        return [message.id for message in messages]
+
+    def __insert(self, path: str, content_type: str, body: bytes) -> None:
+        with self.__db:
+            self.__db.execute(
+                'INSERT INTO outbox (path, content_type, body) VALUES (?, ?, ?)', (path, content_type, body))
+
+    async def rejected(self) -> list[RejectedRequest]:
+        """The requests Ably has rejected, oldest first, until clear_rejected() is called"""
+        rows = await self.__run_async(lambda: self.__db.execute(
+            'SELECT seq, path, status_code, code, message FROM outbox_rejected ORDER BY seq').fetchall())
+        return [
+            RejectedRequest(seq, path, AblyException(message, status_code, code))
+            for seq, path, status_code, code, message in rows
+        ]
+
+    async def clear_rejected(self) -> None:
+        def clear():
+            with self.__db:
+                self.__db.execute('DELETE FROM outbox_rejected')
+        await self.__run_async(clear)
+
+    async def drain(self) -> DrainResult:
+        """Publish the messages in the outbox
+
+        Requests that fail with a network error, a server error or rate limiting stay in the outbox for
+        the next drain(); once every request has been tried, the first such error is raised, if any.
+        Requests that Ably rejects otherwise are moved to the rejected requests and returned in the
+        result, without raising.
+        """
+        if self.__drain_lock is None:
+            self.__drain_lock = asyncio.Lock()
+        async with self.__drain_lock:
+            return await self.__drain()
+
+    async def __drain(self) -> DrainResult:
+        published = 0
+        rejected = []
+        errors = []
+        last_seq = 0
+        page_size = self.__max_concurrency * 10
+
+        while True:
+            rows = await self.__run_async(self.__select, last_seq, page_size)
+            if not rows:
+                break
+            last_seq = rows[-1][0]
+
+            pending = iter(rows)
+            done = []
+            failed = []
+            workers = min(self.__max_concurrency, len(rows))
+            await asyncio.gather(*(self.__publish_rows(pending, done, failed) for _ in range(workers)))
+
+            page_rejected = [(row, error) for row, error in failed if not _is_retryable(error)]
+            errors.extend(error for _, error in failed if _is_retryable(error))
+
+            # A crash before this commit publishes these again, with the same ids
+            await self.__run_async(self.__remove, done, page_rejected)
+            published += len(done)
+            rejected.extend(RejectedRequest(row[0], row[1], error) for row, error in page_rejected)
+
+        if errors:
+            raise errors[0]
+        return DrainResult(published, rejected)
+
+    def __select(self, last_seq: int, limit: int) -> list[tuple]:
+        return self.__db.execute(
+            'SELECT seq, path, content_type, body FROM outbox WHERE seq > ? ORDER BY seq LIMIT ?',
+            (last_seq, limit),
+        ).fetchall()
+
+    def __remove(self, done: list[tuple], rejected: list[tuple]) -> None:
+        with self.__db:
+            self.__db.executemany(
+                'INSERT INTO outbox_rejected (seq, path, content_type, body, status_code, code, message) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(*row, error.status_code, error.code, error.message) for row, error in rejected],
+            )
+            self.__db.executemany(
+                'DELETE FROM outbox WHERE seq = ?', done + [(row[0],) for row, _ in rejected])
+
+    async def __publish_rows(self, rows, done, failed) -> None:
+        # Shares the rows iterator with the other workers
+        for row in rows:
+            seq, path, content_type, body = row
+            try:
+                await self.__ably.http.post(path, headers={'Content-Type': content_type}, body=body)
+            except Exception as e:
+                if _is_retryable(e):
+                    log.warning(f'Outbox.drain(): publishing to {path} failed: {e}')
+                else:
+                    log.error(f'Outbox.drain(): publishing to {path} was rejected: {e}')
+                failed.append((row, e))
+            else:
+                done.append((seq,))
+
+    async def close(self) -> None:
+        try:
+            await self.__run_async(lambda: self.__db.close())
+        finally:
+            self.__executor.shutdown(wait=False)
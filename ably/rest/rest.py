@@ -48,6 +48,13 @@ class AblyRest:
           - `auth_callback`: Undocumented
           - `auth_url`: Undocumented
           - `keep_alive`: use persistent connections. Defaults to True
+          - `channel_idle_timeout`: release channels that have not been used
+            for this many milliseconds. Defaults to None (never)
+          - `max_channels`: keep at most this many channels, releasing the
+            least recently used ones. Defaults to None (unbounded)
+
+          Channels with options, such as a cipher, are never released by
+          channel_idle_timeout or max_channels, nor counted against it.
         """
         if key is not None and ('key_name' in kwargs or 'key_secret' in kwargs):
             raise ValueError("key and key_name or key_secret are mutually exclusive. "
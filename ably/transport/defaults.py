@@ -2,6 +2,8 @@ class Defaults:
     protocol_version = "5"
 
     connectivity_check_url = "https://internet-up.ably-realtime.com/is-the-internet-up.txt"
+    connectivity_check_timeout = 3000
+    connectivity_check_cache_window = 10000
     endpoint = 'main'
 
     port = 80
@@ -16,6 +18,7 @@ class Defaults:
     disconnected_retry_timeout = 15000
     connection_state_ttl = 120000
     suspended_retry_timeout = 30000
+    max_concurrent_attaches = 500
 
     transports = []  # ["web_socket", "comet"]
 
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+
+log = logging.getLogger(__name__)
+
+
+class StandbySocket:
+    """A TCP connection opened ahead of time to an alternate realtime host
+
+    A websocket can be opened over it when the active transport fails, without waiting for the host
+    name to be resolved and for the TCP handshake. The websocket handshake itself can only happen then,
+    as it carries the parameters to resume the connection.
+    """
+
+    def __init__(self, host: str, default_port: int):
+        self.host = host
+        name, _, port = host.rpartition(':')
+        if name and port.isdigit():
+            self.__address = (name, int(port))
+        else:
+            self.__address = (host, default_port)
+        self.__sock: socket.socket | None = None
+
+    async def open(self) -> None:
+        loop = asyncio.get_running_loop()
+        name, port = self.__address
+        infos = await loop.getaddrinfo(name, port, type=socket.SOCK_STREAM)
+        family, type_, proto, _, address = infos[0]
+        sock = socket.socket(family, type_, proto)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, address)
+        except BaseException:
+            sock.close()
+            raise
+        self.__sock = sock
+        log.info(f'StandbySocket.open(): connected to {self.host}')
+
+    def take(self) -> socket.socket | None:
+        """Return the socket if the host has not closed it meanwhile, handing over its ownership"""
+        sock, self.__sock = self.__sock, None
+        if sock is None:
+            return None
+        try:
+            # Nothing is expected from the host before the websocket handshake
+            if sock.recv(1, socket.MSG_PEEK) == b'':
+                raise ConnectionResetError('closed by the host')
+        except BlockingIOError:
+            return sock
+        except OSError as e:
+            log.info(f'StandbySocket.take(): connection to {self.host} lost: {e}')
+        sock.close()
+        return None
+
+    def close(self) -> None:
+        if self.__sock is not None:
+            self.__sock.close()
+            self.__sock = None
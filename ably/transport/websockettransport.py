@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import socket
 import urllib.parse
+from collections import deque
 from enum import IntEnum
 from typing import TYPE_CHECKING
 
@@ -13,6 +13,7 @@ import msgpack
 from ably.http.httputils import HttpUtils
 from ably.types.connectiondetails import ConnectionDetails
 from ably.types.operations import PublishResult
+from ably.util import serializer
 from ably.util.eventemitter import EventEmitter
 from ably.util.exceptions import AblyException
 from ably.util.helper import Timer, unix_time_ms
@@ -60,7 +61,8 @@ class ProtocolMessageAction(IntEnum):
 
 
 class WebSocketTransport(EventEmitter):
-    def __init__(self, connection_manager: ConnectionManager, host: str, params: dict):
+    def __init__(self, connection_manager: ConnectionManager, host: str, params: dict,
+                 sock: socket.socket | None = None):
         self.websocket: WebSocketClientProtocol | None = None
         self.read_loop: asyncio.Task | None = None
         self.connect_task: asyncio.Task | None = None
@@ -75,6 +77,17 @@ class WebSocketTransport(EventEmitter):
         self.host = host
         self.params = params
         self.format = params.get('format', 'json')
+        # An already connected socket to open the websocket over, such as a StandbySocket
+        self.sock = sock
+        # Set while racing other hosts for the connection; see ConnectionManager.race_hosts
+        self.racing = False
+        # Protocol messages waiting to be written, in order, by the writer task
+        self.__outbound: deque[tuple[dict, asyncio.Future]] = deque()
+        # The batch the writer task is writing, taken from the outbound queue
+        self.__writing: list[tuple[dict, asyncio.Future]] = []
+        self.__writer: asyncio.Task | None = None
+        self.__writable = asyncio.Event()
+        self.__writable.set()
         super().__init__()
 
     def connect(self):
@@ -98,16 +111,17 @@ class WebSocketTransport(EventEmitter):
         )
 
     async def ws_connect(self, ws_url, headers):
+        connect_kwargs = {'sock': self.sock} if self.sock is not None else {}
         try:
             # Use additional_headers for websockets 15+, fallback to extra_headers for older versions
             try:
-                async with ws_connect(ws_url, additional_headers=headers) as websocket:
+                async with ws_connect(ws_url, additional_headers=headers, **connect_kwargs) as websocket:
                     await self._handle_websocket_connection(ws_url, websocket)
             except TypeError:
                 # Fallback for websockets 14 and earlier
-                async with ws_connect(ws_url, extra_headers=headers) as websocket:
+                async with ws_connect(ws_url, extra_headers=headers, **connect_kwargs) as websocket:
                     await self._handle_websocket_connection(ws_url, websocket)
-        except (WebSocketException, socket.gaierror) as e:
+        except (WebSocketException, OSError) as e:
             exception = AblyException(f'Error opening websocket connection: {e}', 400, 40000)
             log.exception(f'WebSocketTransport.ws_connect(): Error opening websocket connection: {exception}')
             self._emit('failed', exception)
@@ -124,17 +138,26 @@ class WebSocketTransport(EventEmitter):
         except WebSocketException as err:
             if not self.is_disposed:
                 await self.dispose()
-                self.connection_manager.deactivate_transport(err)
+                self.on_closed(err)
         else:
             # Read loop exited normally (e.g., server sent normal WS close frame)
             if not self.is_disposed:
                 await self.dispose()
-                self.connection_manager.deactivate_transport()
+                self.on_closed()
+
+    def on_closed(self, reason=None):
+        if self.racing:
+            # A host dropping the connection before responding loses the race
+            self._emit('failed', reason or AblyException('Websocket connection closed', 400, 40000))
+        else:
+            self.connection_manager.deactivate_transport(reason)
 
     async def on_protocol_message(self, msg):
         self.on_activity()
         log.debug(f'WebSocketTransport.on_protocol_message(): received protocol message: {msg}')
         action = msg.get('action')
+        if self.racing and not await self.on_race_message(action, msg):
+            return
         if action == ProtocolMessageAction.CONNECTED:
             connection_id = msg.get('connectionId')
             connection_details = ConnectionDetails.from_dict(msg.get('connectionDetails'))
@@ -200,6 +223,22 @@ class WebSocketTransport(EventEmitter):
         ):
             self.connection_manager.on_channel_message(msg)
 
+    async def on_race_message(self, action, msg) -> bool:
+        """Returns whether a message received while racing should be handled as usual"""
+        if action == ProtocolMessageAction.DISCONNECTED:
+            error = msg.get('error')
+            exception = AblyException.from_dict(error) if error else None
+            await self.dispose()
+            self._emit('failed', exception or AblyException('Disconnected by server', 400, 40000))
+            return False
+        if action == ProtocolMessageAction.CONNECTED or (
+            action == ProtocolMessageAction.ERROR and msg.get('channel') is None
+        ):
+            if self.connection_manager.claim_transport(self):
+                return True
+            await self.dispose()
+        return False
+
     async def ws_read_loop(self):
         if not self.websocket:
             raise AblyException('ws_read_loop started with no websocket', 500, 50000)
@@ -222,7 +261,7 @@ class WebSocketTransport(EventEmitter):
     def decode_raw_websocket_frame(self, raw: str | bytes) -> dict:
         if self.format == 'msgpack':
             return msgpack.unpackb(raw, raw=False)
-        return json.loads(raw)
+        return serializer.loads(raw)
 
     def on_protcol_message_handled(self, task):
         try:
@@ -254,6 +293,10 @@ class WebSocketTransport(EventEmitter):
             tasks_to_await.append(self.ws_connect_task)
         if self.idle_timer:
             self.idle_timer.cancel()
+        if self.__writer:
+            self.__writer.cancel()
+            tasks_to_await.append(self.__writer)
+        self.__fail_outbound(AblyException('Transport disposed before the message was sent', 500, 50000))
 
         # Schedule cleanup of cancelled tasks in the background to avoid blocking dispose()
         # This prevents deadlock when dispose() is called from within these tasks
@@ -278,16 +321,98 @@ class WebSocketTransport(EventEmitter):
         await self.send({'action': ProtocolMessageAction.CLOSE})
 
     async def send(self, message: dict):
-        if self.websocket is None:
-            raise Exception()
+        """Send a protocol message, returning once it has been written to the websocket"""
+        await self.enqueue(message)
+
+    def enqueue(self, message: dict) -> asyncio.Future:
+        """Queue a protocol message to be written after those already queued
+
+        Returns a future resolved once the message has been written to the websocket.
+        """
+        if self.websocket is None or self.is_disposed:
+            raise AblyException('Cannot send a message on a transport that is not connected', 500, 50000)
+        future = asyncio.get_running_loop().create_future()
+        self.__outbound.append((message, future))
+        high_water_mark = self.options.outbound_high_water_mark
+        if high_water_mark is not None and self.queue_depth >= high_water_mark:
+            self.__writable.clear()
+        if self.__writer is None:
+            self.__writer = asyncio.create_task(self.__write_outbound())
+        return future
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of protocol messages waiting to be written, or being written"""
+        return len(self.__outbound) + len(self.__writing)
+
+    async def wait_writable(self) -> None:
+        """Wait until fewer than outbound_high_water_mark messages are waiting to be written"""
+        await self.__writable.wait()
+
+    async def __write_outbound(self):
+        # The only task writing to the websocket, so messages are sent in the order they were queued.
+        # Each time it wakes, it writes everything queued as one batch: websocket.send() only yields to
+        # the event loop while the socket's write buffer is full, so the frames of a batch are written
+        # back to back, and its futures are resolved together once the batch is written.
+        try:
+            while self.__outbound:
+                self.__writing = list(self.__outbound)
+                self.__outbound.clear()
+                written = []
+                error = None
+                for message, future in self.__writing:
+                    try:
+                        raw_msg = self.encode(message)
+                    except Exception as e:
+                        # Only this message is lost
+                        if not future.done():
+                            future.set_exception(e)
+                        continue
+                    try:
+                        await self.websocket.send(raw_msg)
+                    except Exception as e:
+                        error = e
+                        break
+                    written.append(future)
+
+                batch, self.__writing = self.__writing, []
+                for future in written:
+                    if not future.done():
+                        future.set_result(None)
+                if error is not None:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(error)
+                high_water_mark = self.options.outbound_high_water_mark
+                if high_water_mark is None or self.queue_depth <= high_water_mark // 2:
+                    self.__writable.set()
+        finally:
+            self.__writer = None
+            # Cancelled while writing, such as by dispose(): nothing else would resolve the batch
+            self.__fail_outbound(AblyException('Transport disposed before the message was sent', 500, 50000),
+                                 queued=False)
+
+    def __fail_outbound(self, exception: AblyException, queued: bool = True):
+        """Fails the messages being written, and unless queued is False, those waiting to be written"""
+        batch, self.__writing = self.__writing, []
+        if queued:
+            batch.extend(self.__outbound)
+            self.__outbound.clear()
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(exception)
+        self.__writable.set()
+
+    def encode(self, message: dict) -> str | bytes:
         # Encode based on format
         if self.format == 'msgpack':
             raw_msg = msgpack.packb(message, use_bin_type=True)
             log.info(f'WebSocketTransport.send(): sending msgpack message (length: {len(raw_msg)} bytes)')
         else:
-            raw_msg = json.dumps(message)
+            # Sent as a str, for a text frame
+            raw_msg = serializer.dumps_str(message)
             log.info(f'WebSocketTransport.send(): sending {raw_msg}')
-        await self.websocket.send(raw_msg)
+        return raw_msg
 
     def set_idle_timer(self, timeout: float):
         if self.idle_timer:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import Executor
 from typing import Any
 
 from ably.types.channelmode import ChannelMode
@@ -16,20 +17,33 @@ class ChannelOptions:
         Requests encryption for this channel when not null, and specifies encryption-related parameters.
     params : Dict[str, str], optional
         Channel parameters that configure the behavior of the channel.
+    decode_executor : Executor, optional
+        When set, received messages are decoded (base64, JSON, decryption) by this thread or process pool
+        rather than on the event loop, and delivered to subscribers in the order they arrived. Not used on
+        channels with a vcdiff decoder, whose deltas each depend on the message before.
+    decode_batch_size : int, optional
+        The number of protocol messages decoded together by the decode_executor. Messages received in
+        the same event loop iteration are decoded together up to this number. The default is 1.
     """
 
     def __init__(
         self,
         cipher: CipherParams | None = None,
         params: dict | None = None,
-        modes: list[ChannelMode] | None = None
+        modes: list[ChannelMode] | None = None,
+        decode_executor: Executor | None = None,
+        decode_batch_size: int = 1,
     ):
         self.__cipher = cipher
         self.__params = params
         self.__modes = modes
+        self.__decode_executor = decode_executor
+        self.__decode_batch_size = decode_batch_size
         # Validate params
         if self.__params and not isinstance(self.__params, dict):
             raise AblyException("params must be a dictionary", 40000, 400)
+        if decode_batch_size < 1:
+            raise AblyException("decode_batch_size must be at least 1", 400, 40000)
 
     @property
     def cipher(self) -> CipherParams | None:
@@ -46,20 +60,34 @@ class ChannelOptions:
         """Get channel modes"""
         return self.__modes
 
+    @property
+    def decode_executor(self) -> Executor | None:
+        """Get the executor decoding received messages"""
+        return self.__decode_executor
+
+    @property
+    def decode_batch_size(self) -> int:
+        """Get the number of protocol messages decoded together by the decode executor"""
+        return self.__decode_batch_size
+
     def __eq__(self, other):
         """Check equality with another ChannelOptions instance"""
         if not isinstance(other, ChannelOptions):
             return False
 
         return (self.__cipher == other.__cipher and
-                self.__params == other.__params and self.__modes == other.__modes)
+                self.__params == other.__params and self.__modes == other.__modes and
+                self.__decode_executor is other.__decode_executor and
+                self.__decode_batch_size == other.__decode_batch_size)
 
     def __hash__(self):
         """Make ChannelOptions hashable"""
         return hash((
             self.__cipher,
             tuple(sorted(self.__params.items())) if self.__params else None,
-            tuple(sorted(self.__modes)) if self.__modes else None
+            tuple(sorted(self.__modes)) if self.__modes else None,
+            id(self.__decode_executor),
+            self.__decode_batch_size,
         ))
 
     def to_dict(self) -> dict[str, Any]:
@@ -83,4 +111,6 @@ class ChannelOptions:
             cipher=options_dict.get('cipher'),
             params=options_dict.get('params'),
             modes=options_dict.get('modes'),
+            decode_executor=options_dict.get('decode_executor'),
+            decode_batch_size=options_dict.get('decode_batch_size', 1),
         )
@@ -199,6 +199,7 @@ class Message(EncodeDataMixin):
     @id.setter
     def id(self, value):
         self.__id = value
+        self._invalidate_encoded()
 
     @property
     def connection_id(self):
@@ -243,6 +244,7 @@ class Message(EncodeDataMixin):
             self._encoding_array.append('json')
             self._encoding_array.append('utf-8')
 
+        self._invalidate_encoded()
         typed_data = TypedBuffer.from_obj(self.data)
         if typed_data.buffer is None:
             return True
@@ -263,8 +265,12 @@ class Message(EncodeDataMixin):
         decrypted_data = self.decrypt_data(channel_cipher, self.__data)
         if decrypted_data is not None:
             self.__data = decrypted_data
+            self._invalidate_encoded()
 
     def as_dict(self, binary=False):
+        return self._encoded_form(binary, self._as_dict)
+
+    def _as_dict(self, binary):
         request_body = {
             'name': self.name,
             'timestamp': self.timestamp or None,
@@ -305,6 +311,9 @@ class Message(EncodeDataMixin):
                                 f"Message id = {id}", 400, 40018)
 
         decoded_data = Message.decode(data, encoding, cipher, context)
+        # A delta in the same protocol message is relative to the message before it
+        if context is not None:
+            context.last_message_id = id
 
         if action is not None:
             try:
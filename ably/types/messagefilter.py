@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from ably.util.exceptions import AblyException
+
+
+def _literal(value: Any) -> str:
+    # Filter expressions take JSON literals wrapped in backticks
+    return f'`{json.dumps(value, separators=(",", ":"))}`'
+
+
+def _header_path(key: str) -> str:
+    if key.isidentifier():
+        return f'headers.{key}'
+    return f'headers.{json.dumps(key)}'
+
+
+class MessageFilter:
+    """Describes the messages a subscription is interested in (RTL22)
+
+    Attributes
+    ----------
+    name : str, optional
+        Only match messages with this name.
+    client_id : str, optional
+        Only match messages published by this client id.
+    headers : dict, optional
+        Only match messages whose ``extras.headers`` contain all of these key/value pairs.
+    """
+
+    def __init__(self, name: str | None = None, client_id: str | None = None, headers: dict | None = None):
+        if headers is not None and not isinstance(headers, dict):
+            raise AblyException("headers must be a dictionary", 400, 40000)
+        if name is None and client_id is None and not headers:
+            raise AblyException("MessageFilter requires at least one of name, client_id or headers", 400, 40000)
+
+        self.__name = name
+        self.__client_id = client_id
+        self.__headers = dict(headers) if headers else {}
+
+    @property
+    def name(self) -> str | None:
+        return self.__name
+
+    @property
+    def client_id(self) -> str | None:
+        return self.__client_id
+
+    @property
+    def headers(self) -> dict:
+        return self.__headers
+
+    def matches(self, message) -> bool:
+        """Evaluates the filter against a decoded message on the client"""
+        if self.__name is not None and message.name != self.__name:
+            return False
+        if self.__client_id is not None and message.client_id != self.__client_id:
+            return False
+        if self.__headers:
+            extras = message.extras
+            headers = extras.get('headers') if isinstance(extras, dict) else None
+            if not isinstance(headers, dict):
+                return False
+            for key, value in self.__headers.items():
+                if key not in headers or headers[key] != value:
+                    return False
+        return True
+
+    def to_expression(self) -> str:
+        """Returns the equivalent server-side filter expression
+
+        The expression can be used with ``Channels.get_derived()`` so that Ably drops
+        non-matching messages before they are sent to the client.
+        """
+        clauses = []
+        if self.__name is not None:
+            clauses.append(f'name == {_literal(self.__name)}')
+        if self.__client_id is not None:
+            clauses.append(f'clientId == {_literal(self.__client_id)}')
+        for key, value in self.__headers.items():
+            clauses.append(f'{_header_path(key)} == {_literal(value)}')
+        return ' && '.join(clauses)
+
+    def __eq__(self, other):
+        if not isinstance(other, MessageFilter):
+            return NotImplemented
+        return (self.__name == other.__name and self.__client_id == other.__client_id
+                and self.__headers == other.__headers)
+
+    def __hash__(self):
+        return hash(self.to_expression())
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> MessageFilter:
+        if not isinstance(obj, dict):
+            raise AblyException("filter must be a dictionary", 400, 40000)
+        return cls(
+            name=obj.get('name'),
+            client_id=obj.get('client_id', obj.get('clientId')),
+            headers=obj.get('headers'),
+        )
@@ -1,7 +1,8 @@
 import base64
-import json
 import logging
+import os
 
+from ably.util import serializer
 from ably.util.crypto import CipherData
 from ably.util.exceptions import AblyException
 
@@ -20,10 +21,71 @@ class DeltaExtras:
 
 
 class DecodingContext:
-    def __init__(self, base_payload=None, last_message_id=None, vcdiff_decoder=None):
+    def __init__(self, base_payload=None, last_message_id=None, vcdiff_decoder=None, keep_bytes=False):
         self.base_payload = base_payload
         self.last_message_id = last_message_id
         self.vcdiff_decoder = vcdiff_decoder
+        # Whether binary data is returned as the bytes decoded, rather than copied into a bytearray
+        self.keep_bytes = keep_bytes
+
+
+class EncodingContext:
+    """Publishes messages as VCDiff deltas of the payload published before them on a channel"""
+
+    def __init__(self, vcdiff_encoder):
+        self.vcdiff_encoder = vcdiff_encoder
+        self.base_payload = None
+        self.last_message_id = None
+
+    def reset(self):
+        """Forget the previous payload, so that the next message is published in full"""
+        self.base_payload = None
+        self.last_message_id = None
+
+    def encode(self, encoded_messages, binary=False):
+        """
+        Replaces the data of encoded messages with deltas where they are smaller.
+
+        Messages are given ids, if they have none, so that a delta can name the
+        message it applies to. The payload kept as the base of the next delta is the
+        one subscribers decode to, before any utf-8 or json decoding.
+        """
+        base_id = None
+        for serial, message in enumerate(encoded_messages):
+            if not message.get('id'):
+                base_id = base_id or base64.b64encode(os.urandom(12)).decode()
+                message['id'] = f'{base_id}:{serial}'
+
+            data = message.get('data')
+            encoding = message.get('encoding', '')
+            if data is None or CipherData.ENCODING_ID in encoding:
+                self.reset()
+                continue
+
+            if not binary and encoding.split('/')[-1] == 'base64':
+                payload = base64.b64decode(data)
+                encoding = encoding[:-len('base64')].rstrip('/')
+            elif isinstance(data, str):
+                payload = data.encode('utf-8')
+                encoding = encoding or 'utf-8'
+            else:
+                payload = bytes(data)
+
+            if self.base_payload is not None:
+                delta = self.vcdiff_encoder.encode(payload, self.base_payload)
+                # Falls back to the full payload unless the delta is smaller
+                if len(delta) < len(payload):
+                    encodings = [encoding, ENC_VCDIFF] if binary else [encoding, ENC_VCDIFF, 'base64']
+                    message['encoding'] = '/'.join(filter(None, encodings))
+                    message['data'] = delta if binary else base64.b64encode(delta).decode('ascii')
+                    message['extras'] = {
+                        **(message.get('extras') or {}),
+                        'delta': {'from': self.last_message_id, 'format': ENC_VCDIFF},
+                    }
+
+            self.base_payload = payload
+            self.last_message_id = message['id']
+        return encoded_messages
 
 
 class EncodeDataMixin:
@@ -41,6 +103,28 @@ class EncodeDataMixin:
             self._encoding_array = []
         else:
             self._encoding_array = encoding.strip('/').split('/')
+        self._invalidate_encoded()
+
+    def _invalidate_encoded(self):
+        """Forget the cached wire forms, after a change to the message"""
+        self._encoded = {}
+
+    def _encoded_form(self, binary, encode):
+        """
+        Returns encode(binary), reusing the result for as long as the message is unchanged.
+
+        The wire form is only kept when data and extras are of types that can't be
+        changed in place, as the message would not know about such a change.
+        """
+        encoded = self._encoded.get(binary)
+        if encoded is None:
+            encoded = encode(binary)
+            data = getattr(self, 'data', None)
+            if (data is None or isinstance(data, (str, bytes, CipherData))) \
+                    and getattr(self, 'extras', None) is None:
+                self._encoded[binary] = encoded
+        # Callers may add to the dict they get, so each gets its own
+        return dict(encoded)
 
     @staticmethod
     def decode(data, encoding='', cipher=None, context=None):
@@ -48,6 +132,7 @@ class EncodeDataMixin:
         encoding_list = encoding.split('/')
 
         last_payload = data
+        keep_bytes = context is not None and context.keep_bytes
 
         while encoding_list:
             encoding = encoding_list.pop()
@@ -56,21 +141,24 @@ class EncodeDataMixin:
                 # to specify the base64 encoding. Here we coerce to bytearray,
                 # since that's what is used with the Json transport; though it
                 # can be argued that it should be the other way, and use always
-                # bytes, never bytearray.
-                if type(data) is bytes:
+                # bytes, never bytearray. The decoding context can opt out of the copy.
+                if type(data) is bytes and not keep_bytes:
                     data = bytearray(data)
                 continue
             if encoding == 'json':
-                if isinstance(data, bytes):
-                    data = data.decode()
                 if isinstance(data, list) or isinstance(data, dict):
                     continue
-                data = json.loads(data)
+                data = serializer.loads(data)
             elif encoding == 'base64':
-                data = bytearray(base64.b64decode(data)) if isinstance(data, bytes) \
-                    else bytearray(base64.b64decode(data.encode('utf-8')))
+                decoded = base64.b64decode(data) if isinstance(data, bytes) \
+                    else base64.b64decode(data.encode('utf-8'))
+                # A delta, or a base payload for the next one, is kept as the bytes the decoder takes
+                if keep_bytes or (encoding_list and encoding_list[-1] == ENC_VCDIFF):
+                    data = decoded
+                else:
+                    data = bytearray(decoded)
                 if not encoding_list:
-                    last_payload = data
+                    last_payload = decoded
             elif encoding == ENC_VCDIFF:
                 if not context or not context.vcdiff_decoder:
                     log.error('Message cannot be decoded as no VCDiff decoder available')
@@ -81,23 +169,24 @@ class EncodeDataMixin:
                     raise AblyException('VCDiff decode failure', 40018, 40018)
 
                 try:
-                    # Convert base payload to bytes if it's a string
+                    # Base payload and delta are passed as bytes, converting (and copying) only other types
                     base_data = context.base_payload
                     if isinstance(base_data, str):
                         base_data = base_data.encode('utf-8')
-                    else:
+                    elif not isinstance(base_data, bytes):
                         base_data = bytes(base_data)
 
-                    # Convert delta to bytes if needed
                     delta_data = data
-                    if isinstance(delta_data, (bytes, bytearray)):
+                    if isinstance(delta_data, (bytearray, memoryview)):
                         delta_data = bytes(delta_data)
-                    else:
+                    elif not isinstance(delta_data, bytes):
                         delta_data = str(delta_data).encode('utf-8')
 
-                    # Decode with VCDiff
-                    data = bytearray(context.vcdiff_decoder.decode(delta_data, base_data))
+                    # Decode with VCDiff; the result is kept as is to be the base of the next delta
+                    data = context.vcdiff_decoder.decode(delta_data, base_data)
                     last_payload = data
+                    if not encoding_list and not keep_bytes:
+                        data = bytearray(data)
 
                 except Exception as e:
                     log.error(f'VCDiff decode failed: {e}')
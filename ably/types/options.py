@@ -8,6 +8,12 @@ from ably.util.exceptions import AblyException
 
 log = logging.getLogger(__name__)
 
+# Policies for a new message when the realtime offline queue is full
+QUEUE_OVERFLOW_BLOCK = 'block'
+QUEUE_OVERFLOW_DROP_OLDEST = 'drop_oldest'
+QUEUE_OVERFLOW_FAIL = 'fail'
+QUEUE_OVERFLOW_POLICIES = (QUEUE_OVERFLOW_BLOCK, QUEUE_OVERFLOW_DROP_OLDEST, QUEUE_OVERFLOW_FAIL)
+
 
 class VCDiffDecoder(ABC):
     """
@@ -25,6 +31,20 @@ class VCDiffDecoder(ABC):
         pass
 
 
+class VCDiffEncoder(ABC):
+    """
+    The VCDiffEncoder class defines the interface for delta encoding operations.
+
+    It is the publishing counterpart of VCDiffDecoder: the encode method takes the
+    target bytes and the base bytes, and returns delta bytes from which a VCDiff
+    decoder can generate the target bytes again given the same base.
+
+    """
+    @abstractmethod
+    def encode(self, target: bytes, base: bytes) -> bytes:
+        pass
+
+
 class Options(AuthOptions):
     def __init__(self, client_id=None, log_level=0, tls=True, rest_host=None, realtime_host=None, port=0,
                  tls_port=0, use_binary_protocol=True, queue_messages=True, recover=False, endpoint=None,
@@ -34,7 +54,14 @@ class Options(AuthOptions):
                  idempotent_rest_publishing=None, loop=None, auto_connect=True,
                  suspended_retry_timeout=None, connectivity_check_url=None,
                  channel_retry_timeout=Defaults.channel_retry_timeout, add_request_ids=False,
-                 vcdiff_decoder: VCDiffDecoder = None, transport_params=None, **kwargs):
+                 vcdiff_decoder: VCDiffDecoder = None, transport_params=None,
+                 max_concurrent_attaches=Defaults.max_concurrent_attaches, max_attaches_per_second=None,
+                 channel_idle_timeout=None,
+                 max_channels=None, vcdiff_thread_threshold=None, vcdiff_encoder: VCDiffEncoder = None,
+                 binary_as_bytes=False, connectivity_check_cache_window=None,
+                 fallback_race_delay=None, standby_transport=False, disconnected_retry_backoff=None,
+                 outbound_high_water_mark=None, max_queued_messages=None, max_queued_bytes=None,
+                 queue_overflow_policy=QUEUE_OVERFLOW_FAIL, queue_spill_path=None, **kwargs):
 
         super().__init__(**kwargs)
 
@@ -47,6 +74,13 @@ class Options(AuthOptions):
                     code=40106,
                 )
 
+        if queue_overflow_policy not in QUEUE_OVERFLOW_POLICIES:
+            raise AblyException(
+                message=f'queue_overflow_policy must be one of {", ".join(QUEUE_OVERFLOW_POLICIES)}',
+                status_code=400,
+                code=40000,
+            )
+
         # TODO check these defaults
         if fallback_retry_timeout is None:
             fallback_retry_timeout = Defaults.fallback_retry_timeout
@@ -60,6 +94,9 @@ class Options(AuthOptions):
         if connectivity_check_url is None:
             connectivity_check_url = Defaults.connectivity_check_url
 
+        if connectivity_check_cache_window is None:
+            connectivity_check_cache_window = Defaults.connectivity_check_cache_window
+
         connection_state_ttl = Defaults.connection_state_ttl
 
         if suspended_retry_timeout is None:
@@ -126,9 +163,25 @@ class Options(AuthOptions):
         self.__connection_state_ttl = connection_state_ttl
         self.__suspended_retry_timeout = suspended_retry_timeout
         self.__connectivity_check_url = connectivity_check_url
+        self.__connectivity_check_cache_window = connectivity_check_cache_window
+        self.__fallback_race_delay = fallback_race_delay
+        self.__standby_transport = standby_transport
+        self.__disconnected_retry_backoff = disconnected_retry_backoff
+        self.__outbound_high_water_mark = outbound_high_water_mark
+        self.__max_queued_messages = max_queued_messages
+        self.__max_queued_bytes = max_queued_bytes
+        self.__queue_overflow_policy = queue_overflow_policy
+        self.__queue_spill_path = queue_spill_path
         self.__add_request_ids = add_request_ids
         self.__vcdiff_decoder = vcdiff_decoder
         self.__transport_params = transport_params or {}
+        self.__max_concurrent_attaches = max_concurrent_attaches
+        self.__max_attaches_per_second = max_attaches_per_second
+        self.__channel_idle_timeout = channel_idle_timeout
+        self.__max_channels = max_channels
+        self.__vcdiff_thread_threshold = vcdiff_thread_threshold
+        self.__vcdiff_encoder = vcdiff_encoder
+        self.__binary_as_bytes = binary_as_bytes
         self.__hosts = self.__get_hosts()
 
     @property
@@ -280,6 +333,42 @@ class Options(AuthOptions):
     def connectivity_check_url(self):
         return self.__connectivity_check_url
 
+    @property
+    def connectivity_check_cache_window(self):
+        return self.__connectivity_check_cache_window
+
+    @property
+    def fallback_race_delay(self):
+        return self.__fallback_race_delay
+
+    @property
+    def standby_transport(self):
+        return self.__standby_transport
+
+    @property
+    def disconnected_retry_backoff(self):
+        return self.__disconnected_retry_backoff
+
+    @property
+    def outbound_high_water_mark(self):
+        return self.__outbound_high_water_mark
+
+    @property
+    def max_queued_messages(self):
+        return self.__max_queued_messages
+
+    @property
+    def max_queued_bytes(self):
+        return self.__max_queued_bytes
+
+    @property
+    def queue_overflow_policy(self):
+        return self.__queue_overflow_policy
+
+    @property
+    def queue_spill_path(self):
+        return self.__queue_spill_path
+
     @property
     def fallback_host(self):
         """
@@ -306,6 +395,34 @@ class Options(AuthOptions):
     def transport_params(self):
         return self.__transport_params
 
+    @property
+    def max_concurrent_attaches(self):
+        return self.__max_concurrent_attaches
+
+    @property
+    def max_attaches_per_second(self):
+        return self.__max_attaches_per_second
+
+    @property
+    def channel_idle_timeout(self):
+        return self.__channel_idle_timeout
+
+    @property
+    def max_channels(self):
+        return self.__max_channels
+
+    @property
+    def vcdiff_thread_threshold(self):
+        return self.__vcdiff_thread_threshold
+
+    @property
+    def vcdiff_encoder(self):
+        return self.__vcdiff_encoder
+
+    @property
+    def binary_as_bytes(self):
+        return self.__binary_as_bytes
+
     def __get_hosts(self):
         """
         Return the list of hosts as they should be tried. First comes the main
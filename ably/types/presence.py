@@ -51,6 +51,11 @@ class PresenceMessage(EncodeDataMixin):
         self.__timestamp = timestamp
         self.__member_key = member_key
         self.__extras = extras
+        # Derived from the id, which never changes, so only worked out once
+        self.__serials = None
+        self.__synthesized = None
+        # Copy of this message with a different action, as stored in the presence map
+        self.__member = None
 
     @property
     def id(self):
@@ -92,9 +97,15 @@ class PresenceMessage(EncodeDataMixin):
         This happens with synthesized leave events sent by realtime to indicate
         a connection disconnected unexpectedly.
         """
-        if not self.id or not self.connection_id:
-            return False
-        return not self.id.startswith(self.connection_id + ':')
+        if self.__synthesized is None:
+            if not self.id or not self.connection_id:
+                self.__synthesized = False
+            else:
+                prefix_length = len(self.connection_id)
+                self.__synthesized = not (
+                    self.id.startswith(self.connection_id) and self.id[prefix_length:prefix_length + 1] == ':'
+                )
+        return self.__synthesized
 
     def parse_id(self):
         """
@@ -107,18 +118,53 @@ class PresenceMessage(EncodeDataMixin):
         Raises:
             ValueError: If id is missing or has invalid format
         """
-        if not self.id:
-            raise ValueError("Cannot parse id: id is None or empty")
+        msg_serial, index = self._serials()
+        return {
+            'msgSerial': msg_serial,
+            'index': index
+        }
+
+    def _serials(self):
+        """
+        Returns the (msgSerial, index) tuple from the id, parsing it on first use.
+
+        Raises:
+            ValueError: If id is missing or has invalid format
+        """
+        if self.__serials is None:
+            if not self.id:
+                raise ValueError("Cannot parse id: id is None or empty")
+
+            parts = self.id.split(':')
 
-        parts = self.id.split(':')
+            try:
+                self.__serials = (int(parts[1]), int(parts[2]))
+            except (ValueError, IndexError) as e:
+                raise ValueError(f"Cannot parse id: invalid msgSerial or index in '{self.id}'") from e
+        return self.__serials
 
-        try:
-            return {
-                'msgSerial': int(parts[1]),
-                'index': int(parts[2])
-            }
-        except (ValueError, IndexError) as e:
-            raise ValueError(f"Cannot parse id: invalid msgSerial or index in '{self.id}'") from e
+    def _with_action(self, action):
+        """
+        Returns this message with the given action, as seen by presence map readers.
+
+        The copy is only made when the action differs, and is then reused.
+        """
+        if self.action == action:
+            return self
+        if self.__member is None or self.__member.action != action:
+            self.__member = PresenceMessage(
+                id=self.id,
+                action=action,
+                client_id=self.client_id,
+                connection_id=self.connection_id,
+                data=self.data,
+                encoding=self.encoding,
+                timestamp=self.timestamp,
+                extras=self.extras
+            )
+            self.__member.__serials = self.__serials
+            self.__member.__synthesized = self.__synthesized
+        return self.__member
 
     def encrypt(self, channel_cipher):
         """
@@ -135,6 +181,7 @@ class PresenceMessage(EncodeDataMixin):
             self._encoding_array.append('json')
             self._encoding_array.append('utf-8')
 
+        self._invalidate_encoded()
         typed_data = TypedBuffer.from_obj(self.data)
         if typed_data.buffer is None:
             return
@@ -148,8 +195,11 @@ class PresenceMessage(EncodeDataMixin):
 
         Handles proper encoding of data including JSON serialization,
         base64 encoding for binary data, and encryption support.
+        The result is reused for as long as the message is unchanged.
         """
+        return self._encoded_form(binary, self._to_encoded)
 
+    def _to_encoded(self, binary):
         result = {
             'action': self.action,
             **encode_data(self.data, self._encoding_array, binary),
@@ -203,6 +253,33 @@ class PresenceMessage(EncodeDataMixin):
         return [PresenceMessage.from_encoded(item, cipher, context) for item in encoded_array]
 
 
+class PresenceDiff:
+    """
+    Presence changes coalesced over an interval.
+
+    Attributes
+    ----------
+    entered : list[PresenceMessage]
+        Members present now that were not present at the start of the interval.
+    left : list[PresenceMessage]
+        Members present at the start of the interval that are not present now, as they were then.
+    updated : list[PresenceMessage]
+        Members present throughout the interval whose presence message changed.
+    count : int
+        Number of members present now.
+    """
+
+    def __init__(self, entered=None, left=None, updated=None, count=0):
+        self.entered = entered or []
+        self.left = left or []
+        self.updated = updated or []
+        self.count = count
+
+    def __repr__(self):
+        return (f'PresenceDiff(entered={len(self.entered)}, left={len(self.left)}, '
+                f'updated={len(self.updated)}, count={self.count})')
+
+
 class Presence:
     def __init__(self, channel):
         self.__base_path = f'/channels/{parse.quote_plus(channel.name)}/'
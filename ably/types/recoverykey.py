@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+from ably.util import serializer
+
+log = logging.getLogger(__name__)
+
+
+# RTN16i
+@dataclass
+class RecoveryKeyContext:
+    """The state needed to recover a connection, encoded as a recovery key string (RTN16g1)"""
+
+    connection_key: str
+    msg_serial: int
+    channel_serials: dict[str, str] = field(default_factory=dict)
+
+    def encode(self) -> str:
+        return serializer.dumps_str({
+            'connectionKey': self.connection_key,
+            'msgSerial': self.msg_serial,
+            'channelSerials': self.channel_serials,
+        })
+
+    @staticmethod
+    def decode(recovery_key: str) -> RecoveryKeyContext | None:
+        """Returns None, logging why, when the recovery key cannot be decoded"""
+        try:
+            data = serializer.loads(recovery_key)
+            return RecoveryKeyContext(data['connectionKey'], data['msgSerial'], data.get('channelSerials') or {})
+        except (ValueError, TypeError, KeyError) as e:
+            log.warning(f'RecoveryKeyContext.decode(): unable to decode recovery key: {e}')
+            return None
+
+    @staticmethod
+    def save(path: str, recovery_key: str) -> None:
+        """Write a recovery key to a file, replacing it as a whole so a crash never leaves it partly written"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix='.ably-recovery-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(recovery_key)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def load(path: str) -> str | None:
+        """Read a recovery key saved with save(), for the recover client option
+
+        Returns None when there is no such file.
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                return f.read() or None
+        except FileNotFoundError:
+            return None
@@ -1,7 +1,7 @@
-import json
 import time
 
 from ably.types.capability import Capability
+from ably.util import serializer
 
 
 class TokenDetails:
@@ -69,7 +69,7 @@ class TokenDetails:
     @staticmethod
     def from_json(data):
         if isinstance(data, str):
-            data = json.loads(data)
+            data = serializer.loads(data)
 
         mapping = {
             'clientId': 'client_id',
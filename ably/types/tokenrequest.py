@@ -1,7 +1,8 @@
 import base64
 import hashlib
 import hmac
-import json
+
+from ably.util import serializer
 
 
 class TokenRequest:
@@ -51,7 +52,7 @@ class TokenRequest:
     @staticmethod
     def from_json(data):
         if isinstance(data, str):
-            data = json.loads(data)
+            data = serializer.loads(data)
 
         mapping = {
             'keyName': 'key_name',
@@ -1,9 +1,10 @@
 # This functionality is depreceated and will be removed
 # Message Pack is the replacement for all binary data messages
 
-import json
 import struct
 
+from ably.util import serializer
+
 
 class DataType:
     NONE = 0
@@ -32,8 +33,8 @@ _decoders = {DataType.TRUE: lambda b: True,
              DataType.DOUBLE: lambda b: struct.unpack('>d', b)[0],
              DataType.STRING: lambda b: b.decode('utf-8'),
              DataType.BUFFER: lambda b: b,
-             DataType.JSONARRAY: lambda b: json.loads(b.decode('utf-8')),
-             DataType.JSONOBJECT: lambda b: json.loads(b.decode('utf-8'))}
+             DataType.JSONARRAY: serializer.loads,
+             DataType.JSONOBJECT: serializer.loads}
 
 
 class TypedBuffer:
@@ -80,10 +81,10 @@ class TypedBuffer:
             buffer = struct.pack('>d', obj)
         elif isinstance(obj, list):
             data_type = DataType.JSONARRAY
-            buffer = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+            buffer = serializer.dumps(obj)
         elif isinstance(obj, dict):
             data_type = DataType.JSONOBJECT
-            buffer = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+            buffer = serializer.dumps(obj)
         else:
             raise TypeError(f'Unexpected object type {type(obj)}')
 
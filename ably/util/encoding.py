@@ -1,7 +1,7 @@
 import base64
-import json
 from typing import Any
 
+from ably.util import serializer
 from ably.util.crypto import CipherData
 from ably.util.exceptions import AblyException
 
@@ -11,7 +11,7 @@ def encode_data(data: Any, encoding_array: list, binary: bool = False):
 
     if isinstance(data, (dict, list)):
         encoding.append('json')
-        data = json.dumps(data)  # json.dumps already returns str
+        data = serializer.dumps_str(data)
     elif isinstance(data, str) and not binary:
         pass
     elif not binary and isinstance(data, (bytearray, bytes)):
@@ -146,6 +146,7 @@ class EventEmitter:
         if len(args) == 0:
             self.__all_event_emitter.remove_all_listeners()
             self.__named_event_emitter.remove_all_listeners()
+            self.__wrapped_listeners.clear()
             return
         elif _is_all_event_args(*args):
             event = _all_event
@@ -158,13 +159,12 @@ class EventEmitter:
         else:
             raise ValueError("EventEmitter.once(): invalid args")
 
-        wrapped_listener = self.__wrapped_listeners.get(listener)
+        wrapped_listener = self.__wrapped_listeners.pop(listener, None)
 
         if wrapped_listener is None:
             return
 
         emitter.remove_listener(event, wrapped_listener)
-        self.__wrapped_listeners[listener] = None
 
     async def once_async(self, state=None):
         future = asyncio.Future()
@@ -181,6 +181,14 @@ class EventEmitter:
 
         return state_change
 
+    def _listener_count(self) -> int:
+        """Returns the number of listeners currently registered, for any event"""
+        return sum(
+            len(emitter.listeners(event))
+            for emitter in (self.__named_event_emitter, self.__all_event_emitter)
+            for event in emitter.event_names()
+        )
+
     def _emit(self, *args):
         self.__named_event_emitter.emit(*args)
         self.__all_event_emitter.emit(_all_event, *args[1:])
@@ -19,6 +19,10 @@ class AblyException(Exception):
         self.status_code = status_code
         self.cause = cause
 
+    def __reduce__(self):
+        # Keeps the arguments of __new__, so errors can be returned from worker processes
+        return self.__class__, (self.message, self.status_code, self.code, self.cause)
+
     def __str__(self):
         str = f'{self.code} {self.status_code} {self.message}'
         if self.cause is not None:
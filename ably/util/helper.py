@@ -1,14 +1,14 @@
 import asyncio
 import inspect
-import json
 import random
 import string
 import time
-from typing import Callable, Dict, Tuple
+from typing import Any, Callable, Dict, Tuple
 from urllib.parse import parse_qs, urlparse
 
 import msgpack
 
+from ably.util import serializer
 from ably.util.exceptions import AblyException
 
 
@@ -75,6 +75,24 @@ class Timer:
     def cancel(self):
         self._task.cancel()
 
+
+def get_retry_delay(initial: float, maximum: float, attempt: int) -> float:
+    """
+    Return the delay before the given retry attempt, counting from 1: the initial delay doubled for each
+    previous attempt, up to the maximum, less a random jitter of up to 20% so clients disconnected together
+    do not all retry at the same moment.
+    """
+    delay = min(initial * 2 ** min(attempt - 1, 32), maximum)
+    return delay * (1 - random.random() * 0.2)
+
+
+def encoded_size(encoded: Any, use_binary_protocol: bool) -> int:
+    """Return the size in bytes of an encoded message, or list of messages, on the wire"""
+    if use_binary_protocol:
+        return len(msgpack.packb(encoded, use_bin_type=True))
+    return len(serializer.dumps(encoded))
+
+
 def validate_message_size(encoded_messages: list, use_binary_protocol: bool, max_message_size: int) -> None:
     """Validate that encoded messages don't exceed the maximum size limit.
 
@@ -86,11 +104,7 @@ def validate_message_size(encoded_messages: list, use_binary_protocol: bool, max
     Raises:
         AblyException: If the encoded messages exceed the maximum size
     """
-    if use_binary_protocol:
-        size = len(msgpack.packb(encoded_messages, use_bin_type=True))
-    else:
-        size = len(json.dumps(encoded_messages, separators=(',', ':')).encode('utf-8'))
-
+    size = encoded_size(encoded_messages, use_binary_protocol)
     if size > max_message_size:
         raise AblyException(
             f"Maximum size of messages that can be published at once exceeded "
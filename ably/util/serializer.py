@@ -0,0 +1,93 @@
+"""
+JSON serialization used throughout the library.
+
+orjson is used when it is installed (pip install orjson), as it is several
+times faster than the json module and works on bytes directly. Output is always
+compact, whichever backend is used.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _StdlibBackend:
+    name = 'json'
+
+    @staticmethod
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def dumps_str(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'))
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class _OrjsonBackend:
+    name = 'orjson'
+
+    @staticmethod
+    def dumps(obj) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Such as integers beyond 64 bits, which the json module still handles
+            return _StdlibBackend.dumps(obj)
+
+    @staticmethod
+    def dumps_str(obj) -> str:
+        return _OrjsonBackend.dumps(obj).decode('utf-8')
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+_backends = {backend.name: backend for backend in (_StdlibBackend, _OrjsonBackend)}
+_backend = _OrjsonBackend if orjson is not None else _StdlibBackend
+
+
+def dumps(obj) -> bytes:
+    """Serialize obj to compact JSON, encoded as UTF-8"""
+    return _backend.dumps(obj)
+
+
+def dumps_str(obj) -> str:
+    """Serialize obj to compact JSON, where a str is needed rather than bytes"""
+    return _backend.dumps_str(obj)
+
+
+def loads(data):
+    """Deserialize JSON from str, bytes or bytearray"""
+    return _backend.loads(data)
+
+
+def backend_name() -> str:
+    """The name of the JSON backend in use: 'orjson' or 'json'"""
+    return _backend.name
+
+
+def set_backend(name: str) -> None:
+    """
+    Select the JSON backend used by the library.
+
+    Args:
+        name: 'orjson' or 'json'
+
+    Raises:
+        ImportError: If orjson is selected but not installed
+        ValueError: If the backend is unknown
+    """
+    global _backend
+    if name not in _backends:
+        raise ValueError(f'Unknown JSON backend {name!r}; expected one of {sorted(_backends)}')
+    if name == 'orjson' and orjson is None:
+        raise ImportError('The orjson backend requires orjson: pip install orjson')
+    _backend = _backends[name]
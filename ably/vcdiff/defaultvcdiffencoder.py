@@ -0,0 +1,141 @@
+"""
+VCDiff Encoder for Ably Python SDK
+
+This module provides a reference VCDiff (RFC 3284) encoder written in pure Python.
+It implements the VCDiffEncoder interface, producing deltas that any VCDiff decoder,
+including AblyVCDiffDecoder, can apply.
+
+Usage:
+    from ably import AblyRealtime, AblyVCDiffEncoder
+
+    # Publish messages as deltas of the previous payload
+    client = AblyRealtime(key="your-key", vcdiff_encoder=AblyVCDiffEncoder())
+"""
+
+from ably.types.options import VCDiffEncoder
+
+# RFC 3284 header: magic bytes, version 0, no secondary compressor or custom code table
+_HEADER = b'\xd6\xc3\xc4\x00\x00'
+_VCD_SOURCE = 0x01
+
+# Instruction codes in the default code table (RFC 3284 section 5.6)
+_ADD_SIZE_FOLLOWS = 1
+_ADD_SMALL = 1  # ADD of size 1-17 is code 1 + size
+_COPY_SELF_SIZE_FOLLOWS = 19
+_COPY_SELF_SMALL = 16  # COPY in VCD_SELF mode of size 4-18 is code 16 + size
+
+
+def _varint(value):
+    """Encode an integer as an RFC 3284 variable-length integer"""
+    encoded = bytearray([value & 0x7f])
+    value >>= 7
+    while value:
+        encoded.append(0x80 | (value & 0x7f))
+        value >>= 7
+    encoded.reverse()
+    return bytes(encoded)
+
+
+class AblyVCDiffEncoder(VCDiffEncoder):
+    """
+    Reference VCDiff encoder, finding runs of the target that also appear in the base.
+
+    The base is indexed in blocks of block_size bytes, so only matches at least that long
+    (and up to twice that, depending on alignment) are found. The target is encoded as a
+    single window of COPY instructions from the base and ADD instructions for the rest.
+    """
+
+    def __init__(self, block_size: int = 16):
+        """
+        Args:
+            block_size: The length of the base blocks indexed to find matches (at least 4)
+        """
+        if block_size < 4:
+            raise ValueError('block_size must be at least 4')
+        self.block_size = block_size
+
+    def encode(self, target: bytes, base: bytes) -> bytes:
+        """
+        Encode the target as a VCDiff delta against the base payload.
+
+        Args:
+            target: The payload to encode
+            base: The base payload the delta is applied to
+
+        Returns:
+            bytes: The VCDiff-encoded delta
+        """
+        block_size = self.block_size
+        index = {}
+        for position in range(0, len(base) - block_size + 1, block_size):
+            index.setdefault(base[position:position + block_size], position)
+
+        data = bytearray()
+        instructions = bytearray()
+        addresses = bytearray()
+
+        def add(start, end):
+            size = end - start
+            if size <= 0:
+                return
+            if size <= 17:
+                instructions.append(_ADD_SMALL + size)
+            else:
+                instructions.append(_ADD_SIZE_FOLLOWS)
+                instructions.extend(_varint(size))
+            data.extend(target[start:end])
+
+        def copy(address, size):
+            if size <= 18:
+                instructions.append(_COPY_SELF_SMALL + size)
+            else:
+                instructions.append(_COPY_SELF_SIZE_FOLLOWS)
+                instructions.extend(_varint(size))
+            addresses.extend(_varint(address))
+
+        pending = 0
+        position = 0
+        last = len(target) - block_size
+        while position <= last:
+            address = index.get(target[position:position + block_size])
+            if address is None:
+                position += 1
+                continue
+
+            # Extend the match forwards, then backwards over bytes not yet encoded
+            end = position + block_size
+            base_end = address + block_size
+            while target[end:end + 256] == base[base_end:base_end + 256] and end + 256 <= len(target):
+                end += 256
+                base_end += 256
+            while end < len(target) and base_end < len(base) and target[end] == base[base_end]:
+                end += 1
+                base_end += 1
+            while position > pending and address > 0 and target[position - 1] == base[address - 1]:
+                position -= 1
+                address -= 1
+
+            add(pending, position)
+            copy(address, end - position)
+            pending = position = end
+        add(pending, len(target))
+
+        window = b''.join([
+            _varint(len(target)),
+            b'\x00',  # Delta_Indicator: no compression
+            _varint(len(data)),
+            _varint(len(instructions)),
+            _varint(len(addresses)),
+            bytes(data),
+            bytes(instructions),
+            bytes(addresses),
+        ])
+        if base:
+            window_header = bytes([_VCD_SOURCE]) + _varint(len(base)) + _varint(0)
+        else:
+            window_header = b'\x00'
+        return _HEADER + window_header + _varint(len(window)) + window
+
+
+# Export for easy importing
+__all__ = ['AblyVCDiffEncoder']
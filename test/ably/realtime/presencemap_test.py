@@ -57,6 +57,17 @@ class TestPresenceMessageHelpers(BaseAsyncTestCase):
         assert parsed['msgSerial'] == 42
         assert parsed['index'] == 7
 
+    def test_parse_id_is_cached(self):
+        """Test that the id is only parsed once."""
+        msg = PresenceMessage(
+            id='connection123:42:7',
+            connection_id='connection123',
+            client_id='client1',
+            action=PresenceAction.PRESENT
+        )
+        assert msg._serials() == (42, 7)
+        assert msg._serials() is msg._serials()
+
     def test_parse_id_without_id(self):
         """Test parsing message without id raises ValueError."""
         msg = PresenceMessage(
@@ -137,7 +148,7 @@ class TestPresenceMessageHelpers(BaseAsyncTestCase):
             data={'key': 'value', 'number': 42}
         )
         encoded = msg.to_encoded()
-        assert encoded['data'] == '{"key": "value", "number": 42}'
+        assert encoded['data'] == '{"key":"value","number":42}'
         assert encoded['encoding'] == 'json'
 
     def test_to_encoded_with_list_data(self):
@@ -150,7 +161,7 @@ class TestPresenceMessageHelpers(BaseAsyncTestCase):
             data=['item1', 'item2', 3]
         )
         encoded = msg.to_encoded()
-        assert encoded['data'] == '["item1", "item2", 3]'
+        assert encoded['data'] == '["item1","item2",3]'
         assert encoded['encoding'] == 'json'
 
     def test_to_encoded_with_binary_data(self):
@@ -361,6 +372,35 @@ class TestPresenceMapBasicOperations(BaseAsyncTestCase):
         assert stored.client_id == 'client1'
         assert stored.data == 'test'
 
+    def test_put_does_not_copy_present_message(self):
+        """Test that PRESENT messages are stored and returned as received."""
+        msg = PresenceMessage(
+            id='connection123:0:0',
+            connection_id='connection123',
+            client_id='client1',
+            action=PresenceAction.PRESENT
+        )
+        self.presence_map.put(msg)
+
+        assert self.presence_map.get('connection123:client1') is msg
+        assert self.presence_map.values() == [msg]
+
+    def test_put_enter_message_is_read_back_once(self):
+        """Test that reading an ENTER member reuses the same PRESENT message."""
+        msg = PresenceMessage(
+            id='connection123:0:0',
+            connection_id='connection123',
+            client_id='client1',
+            action=PresenceAction.ENTER
+        )
+        self.presence_map.put(msg)
+
+        stored = self.presence_map.get('connection123:client1')
+        assert msg.action == PresenceAction.ENTER
+        assert stored.action == PresenceAction.PRESENT
+        assert self.presence_map.get('connection123:client1') is stored
+        assert self.presence_map.list(client_id='client1') == [stored]
+
     def test_put_update_message(self):
         """Test RTP2d: UPDATE message stored as PRESENT."""
         msg = PresenceMessage(
@@ -552,6 +592,63 @@ class TestPresenceMapBasicOperations(BaseAsyncTestCase):
         assert len(result) == 2
         assert all(msg.connection_id == 'conn1' for msg in result)
 
+    def test_list_and_count_with_both_filters(self):
+        """Test that list() and count() apply client and connection id filters together."""
+        for i, (conn, client) in enumerate([('conn1', 'client1'), ('conn1', 'client2'), ('conn2', 'client1')]):
+            self.presence_map.put(PresenceMessage(
+                id=f'{conn}:0:{i}',
+                connection_id=conn,
+                client_id=client,
+                action=PresenceAction.ENTER
+            ))
+
+        result = self.presence_map.list(client_id='client1', connection_id='conn2')
+        assert [(msg.connection_id, msg.client_id) for msg in result] == [('conn2', 'client1')]
+        assert self.presence_map.count() == 3
+        assert self.presence_map.count(client_id='client1') == 2
+        assert self.presence_map.count(connection_id='conn1') == 2
+        assert self.presence_map.count(client_id='unknown') == 0
+
+    def test_indexes_follow_removed_members(self):
+        """Test that removed and absent members are no longer listed or counted."""
+        msg = PresenceMessage(
+            id='conn1:0:0',
+            connection_id='conn1',
+            client_id='client1',
+            action=PresenceAction.PRESENT
+        )
+        leave = PresenceMessage(
+            id='conn1:1:0',
+            connection_id='conn1',
+            client_id='client1',
+            action=PresenceAction.LEAVE
+        )
+        self.presence_map.put(msg)
+        assert self.presence_map.values() == [msg]
+
+        self.presence_map.start_sync()
+        self.presence_map.remove(leave)
+        assert self.presence_map.values() == []
+        assert self.presence_map.list(client_id='client1') == []
+        assert self.presence_map.count() == 0
+
+        self.presence_map.end_sync()
+        assert self.presence_map._keys_by_client_id == {}
+        assert self.presence_map._keys_by_connection_id == {}
+
+    def test_values_returns_a_copy_of_the_snapshot(self):
+        """Test that changing the result of values() does not affect the map."""
+        msg = PresenceMessage(
+            id='conn1:0:0',
+            connection_id='conn1',
+            client_id='client1',
+            action=PresenceAction.PRESENT
+        )
+        self.presence_map.put(msg)
+
+        self.presence_map.values().clear()
+        assert self.presence_map.values() == [msg]
+
     def test_clear(self):
         """Test RTP5a: clear removes all members."""
         msg1 = PresenceMessage(
@@ -579,7 +676,7 @@ class TestPresenceMapSyncOperations(BaseAsyncTestCase):
         yield
 
     def test_start_sync(self):
-        """Test RTP18: start_sync captures residual members."""
+        """Test RTP18: start_sync starts a new sync epoch without copying members."""
         msg1 = PresenceMessage(
             id='conn1:0:0',
             connection_id='conn1',
@@ -598,8 +695,10 @@ class TestPresenceMapSyncOperations(BaseAsyncTestCase):
 
         self.presence_map.start_sync()
         assert self.presence_map.sync_in_progress is True
-        assert self.presence_map._residual_members is not None
-        assert len(self.presence_map._residual_members) == 2
+        # Neither member has been seen in this sync yet
+        epochs = self.presence_map._epochs
+        assert len(epochs) == 2
+        assert all(epoch != self.presence_map._sync_epoch for epoch in epochs.values())
 
     def test_put_during_sync_removes_from_residual(self):
         """Test that members seen during sync are removed from residual."""
@@ -623,8 +722,8 @@ class TestPresenceMapSyncOperations(BaseAsyncTestCase):
         )
         self.presence_map.put(msg1_update)
 
-        # Member should be removed from residual
-        assert 'conn1:client1' not in self.presence_map._residual_members
+        # Member should no longer be residual
+        assert self.presence_map._epochs['conn1:client1'] == self.presence_map._sync_epoch
 
     def test_remove_during_sync_marks_absent(self):
         """Test RTP2h2: LEAVE during sync marks member as ABSENT."""
@@ -719,6 +818,51 @@ class TestPresenceMapSyncOperations(BaseAsyncTestCase):
         # msg1 should still be present
         assert self.presence_map.get('conn1:client1') is not None
 
+    def test_put_of_older_message_during_sync_marks_member_seen(self):
+        """Test that a member is not residual when a message for it arrives during sync, even if older."""
+        msg1 = PresenceMessage(
+            id='conn1:1:0',
+            connection_id='conn1',
+            client_id='client1',
+            action=PresenceAction.PRESENT
+        )
+        self.presence_map.put(msg1)
+        self.presence_map.start_sync()
+
+        older = PresenceMessage(
+            id='conn1:0:0',
+            connection_id='conn1',
+            client_id='client1',
+            action=PresenceAction.PRESENT
+        )
+        assert self.presence_map.put(older) is False
+
+        residual, absent = self.presence_map.end_sync()
+        assert residual == []
+        assert self.presence_map.get('conn1:client1') is msg1
+
+    def test_leave_during_sync_is_only_reported_as_absent(self):
+        """Test that a member leaving during sync gets a single leave."""
+        msg1 = PresenceMessage(
+            id='conn1:0:0',
+            connection_id='conn1',
+            client_id='client1',
+            action=PresenceAction.PRESENT
+        )
+        self.presence_map.put(msg1)
+        self.presence_map.start_sync()
+        self.presence_map.remove(PresenceMessage(
+            id='conn1:1:0',
+            connection_id='conn1',
+            client_id='client1',
+            action=PresenceAction.LEAVE
+        ))
+
+        residual, absent = self.presence_map.end_sync()
+        assert residual == []
+        assert [msg.action for msg in absent] == [PresenceAction.ABSENT]
+        assert self.presence_map._epochs == {}
+
     def test_start_sync_multiple_times(self):
         """Test that start_sync can be called multiple times during sync."""
         msg1 = PresenceMessage(
@@ -731,11 +875,11 @@ class TestPresenceMapSyncOperations(BaseAsyncTestCase):
         self.presence_map.put(msg1)
         self.presence_map.start_sync()
 
-        initial_residual = self.presence_map._residual_members
+        initial_epoch = self.presence_map._sync_epoch
 
         # Call start_sync again - should not reset residual
         self.presence_map.start_sync()
-        assert self.presence_map._residual_members is initial_residual
+        assert self.presence_map._sync_epoch == initial_epoch
 
     def test_clear_invokes_sync_callbacks(self):
         """
@@ -242,19 +242,19 @@ class TestRealtimeConnection(BaseAsyncTestCase):
     async def test_connectivity_check_default(self):
         ably = await TestApp.get_ably_realtime(auto_connect=False)
         # The default connectivity check should return True
-        assert ably.connection.connection_manager.check_connection() is True
+        assert await ably.connection.connection_manager.check_connection() is True
 
     async def test_connectivity_check_non_default(self):
         ably = await TestApp.get_ably_realtime(
             connectivity_check_url="https://echo.ably.io/respondWith?status=200", auto_connect=False)
         # A non-default URL should return True with a HTTP OK despite not returning "Yes" in the body
-        assert ably.connection.connection_manager.check_connection() is True
+        assert await ably.connection.connection_manager.check_connection() is True
 
     async def test_connectivity_check_bad_status(self):
         ably = await TestApp.get_ably_realtime(
             connectivity_check_url="https://echo.ably.io/respondWith?status=400", auto_connect=False)
         # Should return False when the URL returns a non-2xx response code
-        assert ably.connection.connection_manager.check_connection() is False
+        assert await ably.connection.connection_manager.check_connection() is False
 
     async def test_unroutable_host(self):
         ably = await TestApp.get_ably_realtime(endpoint="10.255.255.1", realtime_request_timeout=3000)
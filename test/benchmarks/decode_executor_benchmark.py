@@ -0,0 +1,99 @@
+"""
+Measures the throughput of a realtime channel receiving JSON-heavy messages, decoding them on the event
+loop and with a decode executor: a thread pool, and process pools of increasing size and batch size.
+
+Messages are encrypted when pycryptodome is installed, as decryption is the other costly step of decoding.
+Process pools pickle the decoded messages back to the event loop, which costs about as much as parsing
+JSON, so they pay off with decryption and with more cores than the event loop has work for.
+
+Run with: uv run python -m test.benchmarks.decode_executor_benchmark [protocol messages]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+
+from ably import AblyRealtime
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channeloptions import ChannelOptions
+from ably.types.message import Message
+from ably.util.crypto import CipherParams, get_cipher
+
+
+def _cipher_params():
+    try:
+        params = CipherParams(secret_key=os.urandom(16))
+        get_cipher(params)
+        return params
+    except ImportError:
+        return None
+
+
+def _protocol_messages(count, cipher_params):
+    document = {'items': [{'id': i, 'name': f'item {i}', 'tags': ['a', 'b'], 'value': i / 3} for i in range(200)]}
+    encoded = []
+    for _ in range(10):
+        message = Message(name='state', data=document)
+        if cipher_params is not None:
+            message.encrypt(get_cipher(cipher_params))
+        encoded.append(message.as_dict(binary=False))
+    return [
+        {'action': ProtocolMessageAction.MESSAGE, 'channel': 'channel', 'id': f'p{i}', 'messages': encoded}
+        for i in range(count)
+    ]
+
+
+async def _receive(proto_msgs, cipher_params, executor=None, batch_size=1):
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel', ChannelOptions(
+        cipher=cipher_params, decode_executor=executor, decode_batch_size=batch_size))
+    expected = sum(len(proto_msg['messages']) for proto_msg in proto_msgs)
+    done = asyncio.Event()
+    received = 0
+
+    def listener(message):
+        nonlocal received
+        received += 1
+        if received == expected:
+            done.set()
+
+    with mock.patch.object(channel, 'attach'):
+        await channel.subscribe(listener)
+
+    start = time.perf_counter()
+    for proto_msg in proto_msgs:
+        channel._on_message(dict(proto_msg))
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    await ably.close()
+    return elapsed
+
+
+async def run(count=200):
+    cipher_params = _cipher_params()
+    proto_msgs = _protocol_messages(count, cipher_params)
+    print(f'{count} protocol messages of 10 JSON messages, {"encrypted" if cipher_params else "not encrypted"}')
+
+    def report(name, elapsed):
+        print(f'{name:>28}: {count / elapsed:,.0f} protocol messages/s')
+
+    report('event loop', await _receive(proto_msgs, cipher_params))
+
+    with ThreadPoolExecutor(4) as executor:
+        report('4 threads, batch 8', await _receive(proto_msgs, cipher_params, executor, 8))
+
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        with ProcessPoolExecutor(workers) as executor:
+            # Starts the worker processes before timing
+            await _receive(proto_msgs[:workers], cipher_params, executor)
+            for batch_size in (1, 8):
+                name = f'{workers} processes, batch {batch_size}'
+                report(name, await _receive(proto_msgs, cipher_params, executor, batch_size))
+
+
+if __name__ == '__main__':
+    asyncio.run(run(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,87 @@
+"""
+Measures the time to connect when the primary realtime host is down, trying hosts one at a time
+and racing them with fallback_race_delay, against local stand-ins for the realtime hosts.
+
+Run with: uv run python -m test.benchmarks.fallback_race_benchmark [race delay ms]
+"""
+
+import asyncio
+import json
+import sys
+
+try:
+    # websockets 15+ preferred import
+    from websockets.asyncio.server import serve as ws_serve
+except ImportError:
+    # websockets 14 and earlier fallback
+    from websockets.server import serve as ws_serve
+
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+
+
+async def _connected_host(websocket):
+    await websocket.send(json.dumps({
+        'action': ProtocolMessageAction.CONNECTED,
+        'connectionId': 'connection',
+        'connectionDetails': {'connectionKey': 'key', 'connectionStateTtl': 120000},
+    }))
+    async for _ in websocket:
+        pass
+
+
+async def _stalled_host(reader, writer):
+    await reader.read()
+
+
+async def _internet_up(reader, writer):
+    await reader.readuntil(b'\r\n\r\n')
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\nyes')
+    await writer.drain()
+    writer.close()
+
+
+def _host(server):
+    return f'127.0.0.1:{server.sockets[0].getsockname()[1]}'
+
+
+async def _time_to_connect(hosts, connectivity_check_url, timeout=20, **kwargs):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    ably = AblyRealtime(
+        'api:key', endpoint=hosts[0], fallback_hosts=hosts[1:], tls=False, use_binary_protocol=False,
+        connectivity_check_url=connectivity_check_url, **kwargs
+    )
+    try:
+        await asyncio.wait_for(ably.connection.once_async(ConnectionState.CONNECTED), timeout)
+        return f'{(loop.time() - start) * 1000:,.0f}ms'
+    except asyncio.TimeoutError:
+        return f'not connected after {timeout}s'
+    finally:
+        await ably.close()
+
+
+async def run(race_delay=250):
+    connected = await ws_serve(_connected_host, '127.0.0.1', 0, ping_interval=None)
+    stalled = await asyncio.start_server(_stalled_host, '127.0.0.1', 0)
+    internet_up = await asyncio.start_server(_internet_up, '127.0.0.1', 0)
+    closed = await asyncio.start_server(_stalled_host, '127.0.0.1', 0)
+    refused = _host(closed)
+    closed.close()
+    await closed.wait_closed()
+    connectivity_check_url = f'http://{_host(internet_up)}/'
+
+    for name, primary in (('refused', refused), ('stalled', _host(stalled))):
+        hosts = [primary, _host(connected)]
+        one_at_a_time = await _time_to_connect(hosts, connectivity_check_url)
+        racing = await _time_to_connect(hosts, connectivity_check_url, fallback_race_delay=race_delay)
+        print(f'primary {name}: one at a time {one_at_a_time}, '
+              f'racing every {race_delay}ms {racing}')
+
+    for server in (connected, stalled, internet_up):
+        server.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(run(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,64 @@
+"""
+Compares the JSON backends on protocol messages like those sent and received over the JSON protocol.
+
+Run with: uv run python -m test.benchmarks.json_backend_benchmark [rounds]
+"""
+
+import sys
+import time
+
+from ably.types.message import Message
+from ably.util import serializer
+
+
+def _payloads():
+    small = {
+        'action': 15, 'channel': 'channel', 'msgSerial': 1,
+        'messages': [Message(name='event', data='data').as_dict(binary=False)],
+    }
+    document = {'items': [{'id': i, 'name': f'item {i}', 'tags': ['a', 'b'], 'value': i / 3} for i in range(500)]}
+    large = {
+        'action': 15, 'channel': 'channel', 'msgSerial': 2,
+        'messages': [Message(name='state', data=document).as_dict(binary=False) for _ in range(10)],
+    }
+    presence = {
+        'action': 16, 'channel': 'channel',
+        'presence': [
+            {'id': f'conn:0:{i}', 'action': 1, 'clientId': f'client{i}', 'connectionId': 'conn', 'data': 'data'}
+            for i in range(100)
+        ],
+    }
+    return {'small message': small, 'large JSON messages': large, 'presence sync': presence}
+
+
+def run(rounds=2000):
+    payloads = _payloads()
+    for backend in ('json', 'orjson'):
+        try:
+            serializer.set_backend(backend)
+        except ImportError:
+            print(f'{backend}: not installed')
+            continue
+
+        for name, payload in payloads.items():
+            raw = serializer.dumps(payload)
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                serializer.dumps_str(payload)
+            dumps_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                serializer.loads(raw)
+            loads_elapsed = time.perf_counter() - start
+
+            print(
+                f'{backend:>6} {name} ({len(raw) / 1024:,.1f}KiB): '
+                f'{dumps_elapsed * 1e6 / rounds:,.1f}us to serialize, '
+                f'{loads_elapsed * 1e6 / rounds:,.1f}us to deserialize'
+            )
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,63 @@
+"""
+Measures decoding of msgpack MESSAGE frames with binary data, as received by realtime channels.
+
+Compares delivering binary data as a bytearray copy (the default) with binary_as_bytes, and
+unpacking each frame with msgpack.unpackb against feeding a reused msgpack.Unpacker.
+
+Run with: uv run python -m test.benchmarks.msgpack_decode_benchmark [sizes ...]
+"""
+
+import os
+import sys
+import time
+
+import msgpack
+
+from ably.types.message import Message
+from ably.types.mixins import DecodingContext
+
+
+def _frame(size):
+    return msgpack.packb({
+        'action': 15,
+        'channel': 'channel',
+        'messages': [{'id': f'id:0:{i}', 'name': 'binary', 'data': os.urandom(size)} for i in range(10)],
+    }, use_bin_type=True)
+
+
+def _time(rounds, decode):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode()
+    return time.perf_counter() - start
+
+
+def run(size):
+    raw = _frame(size)
+    rounds = max(10, 200_000_000 // len(raw))
+    unpacker = msgpack.Unpacker(raw=False)
+
+    def unpack_reused():
+        unpacker.feed(raw)
+        return unpacker.unpack()
+
+    def decode(unpack, keep_bytes):
+        context = DecodingContext(keep_bytes=keep_bytes)
+        return lambda: Message.from_encoded_array(unpack()['messages'], context=context)
+
+    def unpackb():
+        return msgpack.unpackb(raw, raw=False)
+
+    results = {
+        'bytearray': _time(rounds, decode(unpackb, False)),
+        'bytes': _time(rounds, decode(unpackb, True)),
+        'bytes, reused Unpacker': _time(rounds, decode(unpack_reused, True)),
+    }
+    print(f'{size / 1024:,.0f}KiB messages: ' + ', '.join(
+        f'{name} {len(raw) * rounds / elapsed / 1024 / 1024:,.0f}MiB/s' for name, elapsed in results.items()
+    ))
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [1024, 16 * 1024, 256 * 1024, 1024 * 1024]:
+        run(size)
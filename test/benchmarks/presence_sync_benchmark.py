@@ -0,0 +1,65 @@
+"""
+Measures PresenceMap SYNC throughput, and the time and peak memory of a resync.
+
+Run with: uv run python -m test.benchmarks.presence_sync_benchmark [members ...]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from ably.realtime.presencemap import PresenceMap
+from ably.types.presence import PresenceAction, PresenceMessage
+
+
+def _members(count, msg_serial):
+    return [
+        PresenceMessage(
+            id=f'conn{i % 100}:{msg_serial}:{i}',
+            action=PresenceAction.PRESENT,
+            client_id=f'client{i}',
+            connection_id=f'conn{i % 100}',
+            data='data',
+        )
+        for i in range(count)
+    ]
+
+
+def _sync(presence_map, batch):
+    presence_map.start_sync()
+    for msg in batch:
+        presence_map.put(msg)
+    return presence_map.end_sync()
+
+
+def run(members, rounds=5):
+    presence_map = PresenceMap(member_key_fn=lambda msg: msg.member_key)
+    # Each round syncs newer messages for every member, as after a reattach
+    batches = [_members(members, msg_serial) for msg_serial in range(rounds + 2)]
+
+    start = time.perf_counter()
+    for batch in batches[:rounds]:
+        _sync(presence_map, batch)
+    elapsed = time.perf_counter() - start
+
+    # Resyncs in which a tenth of the members left, timed and then traced, as tracing slows them down
+    start = time.perf_counter()
+    residual, _ = _sync(presence_map, batches[rounds][members // 10:])
+    resync_elapsed = time.perf_counter() - start
+
+    # Measures memory allocated by the map only, as the messages already exist
+    tracemalloc.start()
+    _sync(presence_map, batches[rounds + 1][members // 5:])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f'{members} members: {members * rounds / elapsed:,.0f} members/s synced, '
+        f'resync in {resync_elapsed * 1000:.0f}ms with {len(residual)} leaving, '
+        f'peak {peak / 1024 / 1024:.1f}MiB'
+    )
+
+
+if __name__ == '__main__':
+    for count in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        run(count)
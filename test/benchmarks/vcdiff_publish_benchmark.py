@@ -0,0 +1,53 @@
+"""
+Measures the bytes on the wire saved by publishing an evolving JSON document as VCDiff deltas.
+
+Run with: uv run python -m test.benchmarks.vcdiff_publish_benchmark [items ...]
+"""
+
+import json
+import random
+import sys
+import time
+
+from ably.types.message import Message
+from ably.types.mixins import EncodingContext
+from ably.util.helper import encoded_size
+from ably.vcdiff.defaultvcdiffencoder import AblyVCDiffEncoder
+
+
+def _documents(items, updates):
+    document = {'items': [{'id': i, 'value': random.random(), 'status': 'active'} for i in range(items)]}
+    documents = [json.loads(json.dumps(document))]
+    for _ in range(updates):
+        # Each update changes a few items, as a published state document would
+        for item in random.sample(document['items'], 3):
+            item['value'] = random.random()
+        documents.append(json.loads(json.dumps(document)))
+    return documents
+
+
+def run(items, updates=20, use_binary_protocol=True):
+    documents = _documents(items, updates)
+    context = EncodingContext(AblyVCDiffEncoder())
+
+    full = 0
+    deltas = 0
+    elapsed = 0.0
+    for document in documents:
+        encoded = [Message(name='state', data=document).as_dict(binary=use_binary_protocol)]
+        full += encoded_size(encoded, use_binary_protocol)
+        start = time.perf_counter()
+        context.encode(encoded, use_binary_protocol)
+        elapsed += time.perf_counter() - start
+        deltas += encoded_size(encoded, use_binary_protocol)
+
+    print(
+        f'{items} items: {full / len(documents) / 1024:,.1f}KiB per message in full, '
+        f'{deltas / len(documents) / 1024:,.1f}KiB with deltas ({100 - deltas * 100 / full:.1f}% saved), '
+        f'{elapsed * 1000 / len(documents):.1f}ms to encode each'
+    )
+
+
+if __name__ == '__main__':
+    for count in [int(arg) for arg in sys.argv[1:]] or [1000, 10000]:
+        run(count)
@@ -0,0 +1,145 @@
+import asyncio
+
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channelstate import ChannelState
+
+
+def _connected_realtime(**kwargs):
+    ably = AblyRealtime('api:key', auto_connect=False, **kwargs)
+    connection_manager = ably.connection.connection_manager
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    sent = []
+
+    async def send_protocol_message(msg):
+        sent.append(msg)
+
+    connection_manager.send_protocol_message = send_protocol_message
+    return ably, sent
+
+
+async def test_attach_scheduler_bounds_pending_attaches():
+    ably, sent = _connected_realtime(max_concurrent_attaches=2)
+    scheduler = ably.channels._attach_scheduler
+
+    channels = [ably.channels.get(f'channel-{i}') for i in range(5)]
+    for channel in channels:
+        channel._request_state(ChannelState.ATTACHING)
+    await asyncio.sleep(0.01)
+
+    assert [msg['channel'] for msg in sent] == ['channel-0', 'channel-1']
+    assert scheduler.in_flight_count == 2
+    assert scheduler.queued_count == 3
+
+    channels[0]._on_message({'action': ProtocolMessageAction.ATTACHED, 'channel': 'channel-0'})
+    await asyncio.sleep(0.01)
+
+    assert channels[0].state == ChannelState.ATTACHED
+    assert [msg['channel'] for msg in sent] == ['channel-0', 'channel-1', 'channel-2']
+    assert all(msg['action'] == ProtocolMessageAction.ATTACH for msg in sent)
+    assert scheduler.in_flight_count == 2
+
+    scheduler.clear()
+    await ably.close()
+
+
+async def test_attach_scheduler_times_out_pending_attaches():
+    ably, sent = _connected_realtime(realtime_request_timeout=50)
+    scheduler = ably.channels._attach_scheduler
+
+    channels = [ably.channels.get(f'channel-{i}') for i in range(3)]
+    for channel in channels:
+        channel._request_state(ChannelState.ATTACHING)
+    await asyncio.sleep(0.01)
+    assert len(sent) == 3
+
+    channels[1]._on_message({'action': ProtocolMessageAction.ATTACHED, 'channel': 'channel-1'})
+    await asyncio.sleep(0.1)
+
+    assert channels[0].state == ChannelState.SUSPENDED
+    assert channels[0].error_reason.code == 90007
+    assert channels[1].state == ChannelState.ATTACHED
+    assert channels[2].state == ChannelState.SUSPENDED
+    assert scheduler.in_flight_count == 0
+
+    scheduler.clear()
+    await ably.close()
+
+
+async def test_attach_scheduler_skips_channels_no_longer_pending():
+    ably, sent = _connected_realtime(max_concurrent_attaches=1)
+
+    first = ably.channels.get('first')
+    second = ably.channels.get('second')
+    first._request_state(ChannelState.ATTACHING)
+    second._request_state(ChannelState.ATTACHING)
+    await asyncio.sleep(0.01)
+    second._notify_state(ChannelState.DETACHED)
+    first._on_message({'action': ProtocolMessageAction.ATTACHED, 'channel': 'first'})
+    await asyncio.sleep(0.01)
+
+    assert [msg['channel'] for msg in sent] == ['first']
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_attach_scheduler_sends_queued_attach_when_one_times_out():
+    ably, sent = _connected_realtime(max_concurrent_attaches=2, realtime_request_timeout=100)
+
+    channels = [ably.channels.get(f'channel-{i}') for i in range(3)]
+    channels[0]._request_state(ChannelState.ATTACHING)
+    await asyncio.sleep(0.06)
+    channels[1]._request_state(ChannelState.ATTACHING)
+    channels[2]._request_state(ChannelState.ATTACHING)
+    await asyncio.sleep(0.01)
+    assert [msg['channel'] for msg in sent] == ['channel-0', 'channel-1']
+
+    # channel-0 times out while channel-1 is still awaiting its response
+    await asyncio.sleep(0.06)
+
+    assert channels[0].state == ChannelState.SUSPENDED
+    assert [msg['channel'] for msg in sent] == ['channel-0', 'channel-1', 'channel-2']
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_attach_scheduler_spaces_requests_at_the_rate_limit():
+    ably, sent = _connected_realtime(max_attaches_per_second=20)
+
+    channels = [ably.channels.get(f'channel-{i}') for i in range(3)]
+    for channel in channels:
+        channel._request_state(ChannelState.ATTACHING)
+    await asyncio.sleep(0.01)
+    assert [msg['channel'] for msg in sent] == ['channel-0']
+
+    await asyncio.sleep(0.05)
+    assert [msg['channel'] for msg in sent] == ['channel-0', 'channel-1']
+
+    await asyncio.sleep(0.05)
+    assert [msg['channel'] for msg in sent] == ['channel-0', 'channel-1', 'channel-2']
+
+    await ably.close()
+
+
+async def test_attach_scheduler_is_cleared_when_the_connection_fails():
+    ably, sent = _connected_realtime(max_concurrent_attaches=1, realtime_request_timeout=50)
+    scheduler = ably.channels._attach_scheduler
+
+    channels = [ably.channels.get(f'channel-{i}') for i in range(3)]
+    for channel in channels:
+        channel._request_state(ChannelState.ATTACHING)
+    await asyncio.sleep(0.01)
+    assert (scheduler.in_flight_count, scheduler.queued_count) == (1, 2)
+
+    ably.connection.connection_manager.notify_state(ConnectionState.FAILED)
+    assert (scheduler.in_flight_count, scheduler.queued_count) == (0, 0)
+    assert scheduler._AttachScheduler__sweep_task is None
+
+    await asyncio.sleep(0.1)
+    assert [channel.state for channel in channels] == [ChannelState.FAILED] * 3
+    assert [msg['channel'] for msg in sent] == ['channel-0']
+
+    await ably.close()
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import time
+
+import respx
+from httpx import Response
+
+from ably import AblyRealtime, AblyRest
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channeloptions import ChannelOptions
+from ably.types.channelstate import ChannelState
+
+
+def _connected_realtime(**kwargs):
+    ably = AblyRealtime('api:key', auto_connect=False, **kwargs)
+    connection_manager = ably.connection.connection_manager
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    sent = []
+
+    async def send_protocol_message(msg):
+        sent.append(msg)
+
+    connection_manager.send_protocol_message = send_protocol_message
+    return ably, sent
+
+
+async def test_rest_channels_evict_idle_channels():
+    ably = AblyRest('api:key', channel_idle_timeout=50)
+    ably.channels.get('first')
+    ably.channels.get('second')
+    time.sleep(0.03)
+    ably.channels.get('second')
+    time.sleep(0.03)
+
+    ably.channels.get('third')
+
+    assert [channel.name for channel in ably.channels] == ['second', 'third']
+    assert len(ably.channels) == 2
+    assert ably.channels.evicted_count == 1
+
+    await ably.close()
+
+
+async def test_rest_channels_are_kept_without_idle_timeout():
+    ably = AblyRest('api:key')
+    ably.channels.get('first')
+    ably.channels.get('second')
+
+    assert len(ably.channels) == 2
+    assert ably.channels.evicted_count == 0
+
+    await ably.close()
+
+
+async def test_realtime_channels_only_evict_channels_without_listeners():
+    ably = AblyRealtime('api:key', auto_connect=False, channel_idle_timeout=20)
+    idle = ably.channels.get('idle')
+    busy = ably.channels.get('busy')
+
+    def listener(state_change):
+        pass
+
+    busy.on(ChannelState.ATTACHED, listener)
+    await asyncio.sleep(0.05)
+
+    ably.channels.get('other')
+
+    assert 'idle' not in ably.channels
+    assert 'busy' in ably.channels
+    assert ably.channels.evicted_count == 1
+    assert ably.channels.count_by_state()[ChannelState.INITIALIZED] == 2
+
+    # Released channels no longer hold on to their listeners
+    ably.channels.release('busy')
+    assert busy._listener_count() == 0
+    assert idle.state == ChannelState.INITIALIZED
+
+    await ably.close()
+
+
+async def test_realtime_channels_detach_attached_channels_before_releasing():
+    ably, sent = _connected_realtime(channel_idle_timeout=20)
+    channel = ably.channels.get('attached')
+    channel._notify_state(ChannelState.ATTACHED)
+    await asyncio.sleep(0.05)
+
+    ably.channels.get('other')
+    await asyncio.sleep(0.01)
+
+    assert channel.state == ChannelState.DETACHING
+    assert [msg['action'] for msg in sent] == [ProtocolMessageAction.DETACH]
+    assert 'attached' in ably.channels
+    # Counted once released
+    assert ably.channels.evicted_count == 0
+
+    channel._on_message({'action': ProtocolMessageAction.DETACHED, 'channel': 'attached'})
+
+    assert channel.state == ChannelState.DETACHED
+    assert 'attached' not in ably.channels
+    assert ably.channels.evicted_count == 1
+    assert ably.channels.count_by_state()[ChannelState.DETACHED] == 0
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_realtime_channels_get_cancels_pending_release():
+    ably, sent = _connected_realtime()
+    channel = ably.channels.get('attached')
+    channel._notify_state(ChannelState.ATTACHED)
+
+    ably.channels.release('attached')
+    assert channel.state == ChannelState.DETACHING
+    assert ably.channels.get('attached') is channel
+
+    channel._on_message({'action': ProtocolMessageAction.DETACHED, 'channel': 'attached'})
+
+    assert channel.state == ChannelState.DETACHED
+    assert ably.channels.get('attached') is channel
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_rest_channels_evict_least_recently_used_channels():
+    ably = AblyRest('api:key', max_channels=2)
+    ably.channels.get('first')
+    ably.channels.get('second')
+    ably.channels.get('first')
+
+    ably.channels.get('third')
+
+    assert [channel.name for channel in ably.channels] == ['first', 'third']
+    assert ably.channels.evicted_count == 1
+
+    await ably.close()
+
+
+async def test_realtime_channels_over_capacity_keep_channels_in_use():
+    ably = AblyRealtime('api:key', auto_connect=False, max_channels=1)
+    busy = ably.channels.get('busy')
+
+    def listener(state_change):
+        pass
+
+    busy.on(listener)
+    ably.channels.get('idle')
+    ably.channels.get('other')
+
+    assert [channel.name for channel in ably.channels] == ['busy', 'other']
+    assert ably.channels.evicted_count == 1
+
+    await ably.close()
+
+
+@respx.mock
+async def test_publish_to_does_not_create_channels():
+    ably = AblyRest('api:key', use_binary_protocol=False, endpoint='example.org')
+    route = respx.post('https://example.org/channels/some:channel%2F1/messages').mock(
+        return_value=Response(201, json={'serials': ['serial']}))
+
+    result = await ably.channels.publish_to('some:channel/1', 'event', 'data')
+
+    assert result.serials == ['serial']
+    body = json.loads(route.calls[0].request.content)
+    assert (body['name'], body['data']) == ('event', 'data')
+    assert len(ably.channels) == 0
+
+    await ably.close()
+
+
+async def test_rest_channels_with_options_are_not_evicted():
+    ably = AblyRest('api:key', max_channels=1)
+    ably.channels.get('configured', params={'rewind': '1'})
+    ably.channels.get('first')
+    ably.channels.get('second')
+
+    assert [channel.name for channel in ably.channels] == ['configured', 'second']
+    assert ably.channels.get('configured').options == {'params': {'rewind': '1'}}
+    assert ably.channels.evicted_count == 1
+
+    await ably.close()
+
+
+async def test_realtime_channels_with_options_are_not_evicted():
+    ably = AblyRealtime('api:key', auto_connect=False, max_channels=1)
+    ably.channels.get('configured', ChannelOptions(params={'rewind': '1'}))
+    ably.channels.get('decoded', ChannelOptions(decode_batch_size=4))
+    ably.channels.get('first')
+    ably.channels.get('second')
+
+    assert [channel.name for channel in ably.channels] == ['configured', 'decoded', 'second']
+    assert ably.channels.get('configured').options == {'params': {'rewind': '1'}}
+    assert ably.channels.evicted_count == 1
+
+    await ably.close()
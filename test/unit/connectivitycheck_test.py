@@ -0,0 +1,71 @@
+import asyncio
+
+from ably import AblyRealtime
+
+
+async def _start_server(status=200, body=b'yes', delay=0.0):
+    requests = []
+
+    async def handle(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        requests.append(asyncio.get_running_loop().time())
+        await asyncio.sleep(delay)
+        writer.write(
+            b'HTTP/1.1 %d OK\r\nContent-Length: %d\r\nContent-Type: text/plain\r\n\r\n%s'
+            % (status, len(body), body)
+        )
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f'http://127.0.0.1:{port}/', requests
+
+
+async def test_check_connection_does_not_block_the_loop():
+    server, url, requests = await _start_server(delay=0.3)
+    ably = AblyRealtime('api:key', auto_connect=False, connectivity_check_url=url)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    try:
+        assert await ably.connection.connection_manager.check_connection() is True
+    finally:
+        task.cancel()
+        server.close()
+        await ably.close()
+
+    assert len(requests) == 1
+    assert len(ticks) >= 10
+
+
+async def test_check_connection_reuses_result_within_window():
+    server, url, requests = await _start_server(status=400)
+    ably = AblyRealtime('api:key', auto_connect=False, connectivity_check_url=url)
+    connection_manager = ably.connection.connection_manager
+
+    assert await connection_manager.check_connection() is False
+    assert await connection_manager.check_connection() is False
+    assert len(requests) == 1
+
+    server.close()
+    await ably.close()
+
+
+async def test_check_connection_probes_again_without_window():
+    server, url, requests = await _start_server()
+    ably = AblyRealtime('api:key', auto_connect=False, connectivity_check_url=url,
+                       connectivity_check_cache_window=0)
+    connection_manager = ably.connection.connection_manager
+
+    assert await connection_manager.check_connection() is True
+    assert await connection_manager.check_connection() is True
+    assert len(requests) == 2
+
+    server.close()
+    await ably.close()
@@ -0,0 +1,189 @@
+import asyncio
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from unittest import mock
+
+from ably import AblyRealtime
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channeloptions import ChannelOptions
+from ably.types.channelstate import ChannelState
+
+
+class ManualExecutor(Executor):
+    """Runs submitted calls only when asked, in any order"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.submitted.append((future, fn, args))
+        return future
+
+    def run(self, index):
+        future, fn, args = self.submitted[index]
+        future.set_result(fn(*args))
+
+
+def _message(index, data=None):
+    return {
+        'action': ProtocolMessageAction.MESSAGE, 'channel': 'channel', 'id': f'p{index}',
+        'channelSerial': f'serial:{index}',
+        'messages': [{'name': f'm{index}', 'data': data if data is not None else f'{{"index": {index}}}',
+                      'encoding': 'json'}],
+    }
+
+
+async def _subscribed_channel(ably, options):
+    channel = ably.channels.get('channel', options)
+    received = []
+
+    def listener(message):
+        received.append(message.data)
+
+    with mock.patch.object(channel, 'attach'):
+        await channel.subscribe(listener)
+    return channel, received
+
+
+async def test_batches_are_delivered_in_arrival_order():
+    executor = ManualExecutor()
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel, received = await _subscribed_channel(
+        ably, ChannelOptions(decode_executor=executor, decode_batch_size=2))
+
+    for index in range(5):
+        channel._on_message(_message(index))
+    # The last message is batched on its own once the loop iteration ends
+    assert len(executor.submitted) == 2
+    await asyncio.sleep(0)
+    assert len(executor.submitted) == 3
+    assert [len(args[0]) for _, _, args in executor.submitted] == [2, 2, 1]
+
+    executor.run(2)
+    executor.run(1)
+    await asyncio.sleep(0.01)
+    assert received == []
+
+    executor.run(0)
+    await asyncio.sleep(0.01)
+    assert received == [{'index': index} for index in range(5)]
+    assert channel._channel_serial == 'serial:4'
+    await ably.close()
+
+
+async def test_messages_after_a_batch_wait_for_it():
+    executor = ManualExecutor()
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel, received = await _subscribed_channel(ably, ChannelOptions(decode_executor=executor))
+
+    channel._on_message(_message(0))
+    # Deltas are not decoded by the executor, but still delivered after the messages before them
+    channel._on_message({
+        'action': ProtocolMessageAction.MESSAGE, 'channel': 'channel', 'id': 'p1',
+        'messages': [{'name': 'delta', 'data': 'delta', 'encoding': 'vcdiff'}],
+    })
+    await asyncio.sleep(0.01)
+    assert received == []
+
+    executor.run(0)
+    await asyncio.sleep(0.01)
+    assert received == [{'index': 0}]
+    await ably.close()
+
+
+async def test_decode_errors_skip_their_protocol_message():
+    executor = ManualExecutor()
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel, received = await _subscribed_channel(
+        ably, ChannelOptions(decode_executor=executor, decode_batch_size=3))
+
+    channel._on_message(_message(0))
+    channel._on_message(_message(1, data='{invalid'))
+    channel._on_message(_message(2))
+    executor.run(0)
+    await asyncio.sleep(0.01)
+
+    assert received == [{'index': 0}, {'index': 2}]
+    await ably.close()
+
+
+async def test_decodes_in_a_process_pool():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        channel, received = await _subscribed_channel(
+            ably, ChannelOptions(decode_executor=executor, decode_batch_size=4))
+        for index in range(10):
+            channel._on_message(_message(index))
+        channel._on_message(_message(10, data='{invalid'))
+
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if len(received) == 10:
+                break
+
+    assert received == [{'index': index} for index in range(10)]
+    await ably.close()
+
+
+async def test_batches_in_flight_are_dropped_when_the_channel_detaches():
+    executor = ManualExecutor()
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel, received = await _subscribed_channel(ably, ChannelOptions(decode_executor=executor))
+
+    channel._on_message(_message(0))
+    await asyncio.sleep(0)
+    channel._on_message({'action': ProtocolMessageAction.ATTACHED, 'channel': 'channel', 'channelSerial': 'fresh'})
+    channel._on_message({'action': ProtocolMessageAction.DETACHED, 'channel': 'channel'})
+    assert channel.state == ChannelState.ATTACHING
+
+    executor.run(0)
+    await asyncio.sleep(0.01)
+    assert received == []
+    assert channel._channel_serial == 'fresh'
+    await ably.close()
+
+
+async def test_batches_received_before_an_attached_keep_its_channel_serial():
+    executor = ManualExecutor()
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel, received = await _subscribed_channel(ably, ChannelOptions(decode_executor=executor))
+    channel._notify_state(ChannelState.ATTACHED)
+
+    # Not yet submitted when the ATTACHED arrives
+    channel._on_message(_message(0))
+    channel._on_message({
+        'action': ProtocolMessageAction.ATTACHED, 'channel': 'channel', 'channelSerial': 'fresh', 'flags': 4,
+    })
+    channel._on_message(_message(1))
+    await asyncio.sleep(0)
+    assert len(executor.submitted) == 2
+
+    executor.run(0)
+    await asyncio.sleep(0.01)
+    assert received == [{'index': 0}]
+    assert channel._channel_serial == 'fresh'
+
+    executor.run(1)
+    await asyncio.sleep(0.01)
+    assert received == [{'index': 0}, {'index': 1}]
+    assert channel._channel_serial == 'serial:1'
+    await ably.close()
+
+
+async def test_changing_the_decode_executor_does_not_reattach():
+    executor = ManualExecutor()
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel', ChannelOptions(params={'rewind': '1'}))
+    channel._notify_state(ChannelState.ATTACHED)
+
+    options = ChannelOptions(params={'rewind': '1'}, decode_executor=executor, decode_batch_size=4)
+    assert not channel.should_reattach_to_set_options(options)
+    assert ably.channels.get('channel', options) is channel
+    assert channel.options == {'params': {'rewind': '1'}}
+
+    channel._on_message(_message(0))
+    await asyncio.sleep(0)
+    assert len(executor.submitted) == 1
+
+    assert channel.should_reattach_to_set_options(ChannelOptions(params={'rewind': '2'}, decode_executor=executor))
+    await ably.close()
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+try:
+    # websockets 15+ preferred import
+    from websockets.asyncio.server import serve as ws_serve
+except ImportError:
+    # websockets 14 and earlier fallback
+    from websockets.server import serve as ws_serve
+
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+
+
+class _Hosts:
+    """Local stand-ins for realtime hosts: stalled ones never complete the websocket handshake"""
+
+    def __init__(self, *kinds):
+        self.kinds = kinds
+        self.servers = []
+        self.hosts = []
+        self.connections = []
+
+    async def _stall(self, reader, writer):
+        self.connections.append(writer)
+        await reader.read()
+
+    async def _connect(self, websocket):
+        self.connections.append(websocket)
+        await websocket.send(json.dumps({
+            'action': ProtocolMessageAction.CONNECTED,
+            'connectionId': 'connection',
+            'connectionDetails': {'connectionKey': 'key', 'connectionStateTtl': 120000},
+        }))
+        async for _ in websocket:
+            pass
+
+    async def __aenter__(self):
+        for kind in self.kinds:
+            if kind == 'stalled':
+                server = await asyncio.start_server(self._stall, '127.0.0.1', 0)
+            else:
+                server = await ws_serve(self._connect, '127.0.0.1', 0, ping_interval=None)
+            self.servers.append(server)
+            self.hosts.append(f'127.0.0.1:{server.sockets[0].getsockname()[1]}')
+        return self
+
+    async def __aexit__(self, *args):
+        for server in self.servers:
+            server.close()
+
+
+def _realtime(hosts, **kwargs):
+    return AblyRealtime(
+        'api:key', endpoint=hosts[0], fallback_hosts=hosts[1:], tls=False, use_binary_protocol=False,
+        realtime_request_timeout=5000, **kwargs
+    )
+
+
+async def test_race_keeps_the_first_host_to_connect():
+    async with _Hosts('stalled', 'stalled', 'connected') as stand_in:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        ably = _realtime(stand_in.hosts, fallback_race_delay=100)
+        await asyncio.wait_for(ably.connection.once_async(ConnectionState.CONNECTED), timeout=3)
+        elapsed = loop.time() - start
+
+        connection_manager = ably.connection.connection_manager
+        assert connection_manager.transport.host == stand_in.hosts[2]
+        assert ably.options.fallback_host == stand_in.hosts[2]
+        assert elapsed < 1
+
+        await ably.close()
+
+
+async def test_race_disposes_the_losers():
+    async with _Hosts('connected', 'connected') as stand_in:
+        ably = _realtime(stand_in.hosts, fallback_race_delay=0)
+        pending = []
+
+        def on_transport_pending(transport):
+            pending.append(transport)
+
+        ably.connection.connection_manager.on('transport.pending', on_transport_pending)
+        await asyncio.wait_for(ably.connection.once_async(ConnectionState.CONNECTED), timeout=3)
+        await asyncio.sleep(0.1)
+
+        winner = ably.connection.connection_manager.transport
+        assert len(pending) == 2
+        assert [transport.is_disposed for transport in pending] == [t is not winner for t in pending]
+        assert not winner.racing
+
+        await ably.close()
+
+
+async def test_race_fails_when_every_host_fails():
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), '127.0.0.1', 0)
+    refusing = f'127.0.0.1:{server.sockets[0].getsockname()[1]}'
+    server.close()
+    await server.wait_closed()
+
+    ably = _realtime([refusing, refusing], fallback_race_delay=100)
+    state_change = await asyncio.wait_for(ably.connection.once_async(ConnectionState.DISCONNECTED), timeout=3)
+
+    assert state_change.reason is not None
+    assert ably.connection.connection_manager.transport is None
+
+    await ably.close()
@@ -1,4 +1,11 @@
+import base64
+import json
+from unittest import mock
+
 import ably.types.message
+from ably.types.mixins import DecodingContext
+from ably.types.presence import PresenceAction, PresenceMessage
+from ably.util.encoding import encode_data
 
 
 # TM2a, TM2c, TM2f
@@ -45,3 +52,59 @@ def test_update_inner_message_fields_for_presence_msg_tm2():
         assert presence_msg.get('connectionId') == 'custom_connection_id'
         assert presence_msg.get('timestamp') == 23134
         msg_index = msg_index + 1
+
+
+def test_as_dict_reuses_encoding_until_the_message_changes():
+    message = ably.types.message.Message(name='event', data='data')
+    with mock.patch('ably.types.message.encode_data', wraps=encode_data) as encode:
+        first = message.as_dict(binary=False)
+        first['id'] = 'added by caller'
+        assert message.as_dict(binary=False) == {'name': 'event', 'data': 'data'}
+        assert encode.call_count == 1
+
+        message.as_dict(binary=True)
+        assert encode.call_count == 2
+
+        message.id = 'id'
+        assert message.as_dict(binary=False)['id'] == 'id'
+        assert encode.call_count == 3
+
+
+def test_as_dict_does_not_cache_mutable_data():
+    data = {'key': 'value'}
+    message = ably.types.message.Message(name='event', data=data)
+    message.as_dict()
+
+    data['key'] = 'changed'
+
+    assert json.loads(message.as_dict()['data']) == {'key': 'changed'}
+
+
+def test_presence_to_encoded_reuses_encoding_after_encryption():
+    cipher = mock.Mock(cipher_type='aes-128-cbc')
+    cipher.encrypt.side_effect = lambda buffer: buffer[::-1]
+    presence = PresenceMessage(action=PresenceAction.ENTER, client_id='client', data='data')
+    plain = presence.to_encoded()
+
+    presence.encrypt(cipher)
+    encrypted = presence.to_encoded()
+
+    assert encrypted['data'] != plain['data']
+    assert encrypted['encoding'] == 'utf-8/cipher+aes-128-cbc/base64'
+    assert presence.to_encoded() == encrypted
+
+
+def test_decode_copies_binary_data_into_bytearray_by_default():
+    data = b'\x00\x01binary'
+
+    assert type(ably.types.message.Message.decode(data)['data']) is bytearray
+    assert type(ably.types.message.Message.decode(data, context=DecodingContext())['data']) is bytearray
+
+
+def test_decode_keeps_binary_data_as_bytes_when_asked():
+    data = b'\x00\x01binary'
+    context = DecodingContext(keep_bytes=True)
+
+    assert ably.types.message.Message.decode(data, context=context)['data'] is data
+    decoded = ably.types.message.Message.decode(base64.b64encode(data).decode('ascii'), 'base64', context=context)
+    assert (type(decoded['data']), decoded['data']) == (bytes, data)
@@ -0,0 +1,109 @@
+import base64
+from unittest import mock
+
+import pytest
+
+from ably import AblyRealtime
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.message import Message
+from ably.types.messagefilter import MessageFilter
+from ably.util.exceptions import AblyException
+
+
+def _message_proto(channel_name, *messages):
+    return {
+        'action': ProtocolMessageAction.MESSAGE,
+        'channel': channel_name,
+        'id': 'proto',
+        'connectionId': 'conn',
+        'timestamp': 1,
+        'messages': list(messages),
+    }
+
+
+def test_message_filter_requires_a_predicate():
+    with pytest.raises(AblyException):
+        MessageFilter()
+
+
+def test_message_filter_matches():
+    message_filter = MessageFilter(name='quote', headers={'region': 'eu'})
+
+    assert message_filter.matches(Message(name='quote', extras={'headers': {'region': 'eu', 'x': 1}}))
+    assert not message_filter.matches(Message(name='quote', extras={'headers': {'region': 'us'}}))
+    assert not message_filter.matches(Message(name='trade', extras={'headers': {'region': 'eu'}}))
+    assert not message_filter.matches(Message(name='quote'))
+
+
+def test_message_filter_matches_client_id():
+    message_filter = MessageFilter(client_id='bob')
+
+    assert message_filter.matches(Message(name='a', client_id='bob'))
+    assert not message_filter.matches(Message(name='a', client_id='alice'))
+
+
+def test_message_filter_to_expression():
+    message_filter = MessageFilter(name='quote', client_id='bob', headers={'region': 'eu', 'odd-key': 2})
+
+    assert message_filter.to_expression() == (
+        'name == `"quote"` && clientId == `"bob"` && headers.region == `"eu"` && headers."odd-key" == `2`'
+    )
+
+
+def test_message_filter_from_dict():
+    assert MessageFilter.from_dict({'name': 'a', 'clientId': 'b'}) == MessageFilter(name='a', client_id='b')
+
+
+# RTS5
+async def test_get_derived_qualifies_channel_name():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    expression = 'name == `"quote"`'
+    encoded = base64.b64encode(expression.encode()).decode()
+
+    channel = ably.channels.get_derived('prices', {'filter': expression})
+    assert channel.name == f'[filter={encoded}]prices'
+    assert ably.channels.get_derived('prices', MessageFilter(name='quote')) is channel
+
+    rewind = ably.channels.get_derived('[?rewind=1]prices', {'filter': expression})
+    assert rewind.name == f'[filter={encoded}?rewind=1]prices'
+
+    with pytest.raises(AblyException):
+        ably.channels.get_derived('[meta]log', {'filter': expression})
+
+    await ably.close()
+
+
+# RTL22
+async def test_subscribe_with_filter_only_delivers_matching_messages():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('prices')
+    received = []
+    unfiltered = []
+
+    def listener(message):
+        received.append(message)
+
+    def unfiltered_listener(message):
+        unfiltered.append(message)
+
+    message_filter = MessageFilter(name='quote', headers={'region': 'eu'})
+    with mock.patch.object(channel, 'attach'):
+        await channel.subscribe(message_filter, listener)
+        await channel.subscribe(unfiltered_listener)
+
+    channel._on_message(_message_proto(
+        'prices',
+        {'name': 'quote', 'data': 'a', 'extras': {'headers': {'region': 'eu'}}},
+        {'name': 'quote', 'data': 'b', 'extras': {'headers': {'region': 'us'}}},
+        {'name': 'trade', 'data': 'c', 'extras': {'headers': {'region': 'eu'}}},
+    ))
+
+    assert [message.data for message in received] == ['a']
+    assert len(unfiltered) == 3
+
+    channel.unsubscribe(message_filter, listener)
+    channel._on_message(_message_proto(
+        'prices', {'name': 'quote', 'data': 'd', 'extras': {'headers': {'region': 'eu'}}}))
+    assert [message.data for message in received] == ['a']
+
+    await ably.close()
@@ -0,0 +1,203 @@
+import asyncio
+import gc
+import os
+import weakref
+from unittest import mock
+
+import msgpack
+import pytest
+
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction, WebSocketTransport
+from ably.types.message import Message
+from ably.util.exceptions import AblyException
+
+
+class _WebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, raw):
+        self.sent.append(raw)
+
+    async def close(self):
+        pass
+
+
+def _message(data='data'):
+    return {'action': ProtocolMessageAction.MESSAGE, 'channel': 'channel', 'messages': [{'data': data}]}
+
+
+def _disconnected(**kwargs):
+    ably = AblyRealtime('api:key', auto_connect=False, use_binary_protocol=False, **kwargs)
+    connection_manager = ably.connection.connection_manager
+    connection_manager._ConnectionManager__state = ConnectionState.DISCONNECTED
+    return ably, connection_manager
+
+
+def _connect(connection_manager):
+    transport = WebSocketTransport(connection_manager, 'host', {'format': 'msgpack'})
+    transport.websocket = _WebSocket()
+    connection_manager.transport = transport
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    connection_manager.send_queued_messages()
+    return transport
+
+
+async def _publish(connection_manager, count, start=0):
+    tasks = [
+        asyncio.create_task(connection_manager.send_protocol_message(_message(f'data {i}')))
+        for i in range(start, start + count)
+    ]
+    await asyncio.sleep(0)
+    return tasks
+
+
+async def _close(ably, tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await ably.close()
+
+
+async def test_fail_policy_rejects_messages_beyond_the_bound():
+    ably, connection_manager = _disconnected(max_queued_messages=2)
+    tasks = await _publish(connection_manager, 2)
+
+    with pytest.raises(AblyException) as exception:
+        await connection_manager.send_protocol_message(_message())
+
+    assert exception.value.code == 90000
+    assert len(connection_manager.queued_messages) == 2
+    await _close(ably, tasks)
+
+
+async def test_byte_bound():
+    ably, connection_manager = _disconnected(max_queued_bytes=200)
+    tasks = await _publish(connection_manager, 2)
+
+    assert 0 < connection_manager.queued_messages.memory_bytes <= 200
+    with pytest.raises(AblyException):
+        await connection_manager.send_protocol_message(_message('x' * 200))
+    await _close(ably, tasks)
+
+
+async def test_drop_oldest_policy_keeps_msgserials_contiguous():
+    ably, connection_manager = _disconnected(max_queued_messages=3, queue_overflow_policy='drop_oldest')
+    tasks = await _publish(connection_manager, 5)
+
+    for task in tasks[:2]:
+        with pytest.raises(AblyException):
+            await task
+    queued = [pending.message for pending in reversed(list(connection_manager.queued_messages))]
+    assert [message['messages'][0]['data'] for message in queued] == ['data 2', 'data 3', 'data 4']
+    assert [message['msgSerial'] for message in queued] == [0, 1, 2]
+    assert connection_manager.msg_serial == 3
+    # Tracked for acknowledgment once sent
+    assert connection_manager.pending_message_queue.count() == 0
+    await _close(ably, tasks)
+
+
+async def test_block_policy_waits_until_the_queue_is_sent():
+    ably, connection_manager = _disconnected(max_queued_messages=2, queue_overflow_policy='block')
+    tasks = await _publish(connection_manager, 3)
+
+    assert len(connection_manager.queued_messages) == 2
+    assert not tasks[2].done()
+
+    transport = _connect(connection_manager)
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert len(transport.websocket.sent) == 3
+    await _close(ably, tasks)
+
+
+async def test_spilled_messages_are_replayed_in_order(tmp_path):
+    ably, connection_manager = _disconnected(max_queued_messages=2, queue_spill_path=str(tmp_path))
+    tasks = await _publish(connection_manager, 10)
+
+    queue = connection_manager.queued_messages
+    assert (len(queue), queue.spilled_count) == (10, 8)
+    assert len(os.listdir(tmp_path)) == 1
+    # Only placeholders of the spilled messages are held in memory
+    assert queue[0].message == {'action': ProtocolMessageAction.MESSAGE, 'msgSerial': 9}
+
+    transport = _connect(connection_manager)
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+    sent = [msgpack.unpackb(raw) for raw in transport.websocket.sent]
+    assert [message['msgSerial'] for message in sent] == list(range(10))
+    assert [message['messages'][0]['data'] for message in sent] == [f'data {i}' for i in range(10)]
+    assert os.listdir(tmp_path) == []
+    await _close(ably, tasks)
+
+
+async def test_spilled_messages_are_read_back_as_they_are_written(tmp_path):
+    ably, connection_manager = _disconnected(
+        max_queued_messages=2, queue_spill_path=str(tmp_path), outbound_high_water_mark=3)
+    tasks = await _publish(connection_manager, 10)
+
+    transport = _connect(connection_manager)
+    queue = connection_manager.queued_messages
+    assert (len(queue), queue.spilled_count, transport.queue_depth) == (7, 7, 3)
+
+    # Published after the connection, but sent after the queued messages
+    tasks += await _publish(connection_manager, 1, start=10)
+    assert len(queue) == 8
+
+    for _ in range(20):
+        await asyncio.sleep(0)
+    sent = [msgpack.unpackb(raw) for raw in transport.websocket.sent]
+    assert [message['msgSerial'] for message in sent] == list(range(11))
+    assert [message.message['msgSerial'] for message in connection_manager.pending_message_queue.messages] == \
+        list(range(11))
+    assert len(queue) == 0
+    await _close(ably, tasks)
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(AblyException):
+        AblyRealtime('api:key', auto_connect=False, queue_overflow_policy='discard')
+
+
+class _Dict(dict):
+    """A dict that can be weakly referenced"""
+
+
+async def test_spilled_messages_are_not_held_in_memory(tmp_path):
+    ably, connection_manager = _disconnected(queue_spill_path=str(tmp_path))
+    message = _Dict(_message('x' * 10000))
+    ref = weakref.ref(message)
+    task = asyncio.create_task(connection_manager.send_protocol_message(message))
+    del message
+    await asyncio.sleep(0)
+
+    gc.collect()
+    assert connection_manager.queued_messages.spilled_count == 1
+    assert ref() is None
+    await _close(ably, [task])
+
+
+async def test_messages_published_on_a_channel_are_not_held_once_spilled(tmp_path):
+    ably, connection_manager = _disconnected(queue_spill_path=str(tmp_path))
+    ably.connection.state = ConnectionState.DISCONNECTED
+    channel = ably.channels.get('channel')
+    refs = []
+    as_dict = Message.as_dict
+
+    def weak_as_dict(self, *args, **kwargs):
+        encoded = _Dict(as_dict(self, *args, **kwargs))
+        refs.append(weakref.ref(encoded))
+        return encoded
+
+    with mock.patch.object(Message, 'as_dict', weak_as_dict):
+        task = asyncio.create_task(channel.publish('event', {'payload': 'x' * 10000}))
+        await asyncio.sleep(0)
+
+    gc.collect()
+    assert connection_manager.queued_messages.spilled_count == 1
+    assert len(refs) == 1 and refs[0]() is None
+    await _close(ably, [task])
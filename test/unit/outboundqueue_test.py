@@ -0,0 +1,213 @@
+import asyncio
+
+import pytest
+
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.realtime.connectionmanager import PendingMessage
+from ably.transport.websockettransport import ProtocolMessageAction, WebSocketTransport
+from ably.util.exceptions import AblyException
+
+
+class _WebSocket:
+    """Records the frames written, and how many writes were in progress at once"""
+
+    def __init__(self):
+        self.frames = []
+        self.open = asyncio.Event()
+        self.open.set()
+        self.writing = 0
+        self.max_writing = 0
+
+    async def send(self, raw):
+        self.writing += 1
+        self.max_writing = max(self.max_writing, self.writing)
+        await self.open.wait()
+        await asyncio.sleep(0)
+        self.frames.append(raw)
+        self.writing -= 1
+
+    async def close(self):
+        pass
+
+
+def _connected(**kwargs):
+    ably = AblyRealtime('api:key', auto_connect=False, use_binary_protocol=False, **kwargs)
+    connection_manager = ably.connection.connection_manager
+    transport = WebSocketTransport(connection_manager, 'host', {})
+    transport.websocket = _WebSocket()
+    connection_manager.transport = transport
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    ably.connection.state = ConnectionState.CONNECTED
+    return ably, connection_manager, transport
+
+
+def _serials(transport):
+    return [int(frame.split('"msgSerial":')[1].split(',')[0].rstrip('}')) for frame in transport.websocket.frames]
+
+
+def _message(channel='channel'):
+    return {'action': ProtocolMessageAction.MESSAGE, 'channel': channel, 'messages': [{'data': 'data'}]}
+
+
+async def test_concurrent_sends_are_written_in_order_by_one_writer():
+    ably, connection_manager, transport = _connected()
+
+    tasks = [asyncio.create_task(connection_manager.send_protocol_message(_message())) for _ in range(200)]
+    while len(transport.websocket.frames) < 200:
+        await asyncio.sleep(0)
+
+    assert _serials(transport) == list(range(200))
+    assert transport.websocket.max_writing == 1
+
+    for task in tasks:
+        task.cancel()
+    await transport.dispose()
+    await ably.close()
+
+
+async def test_queued_messages_are_sent_in_order_without_a_task_each():
+    ably, connection_manager, transport = _connected()
+    connection_manager._ConnectionManager__state = ConnectionState.DISCONNECTED
+    for serial in range(5000):
+        message = {**_message(), 'msgSerial': serial}
+        connection_manager.queued_messages.appendleft(PendingMessage(message))
+
+    tasks_before = len(asyncio.all_tasks())
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    connection_manager.send_queued_messages()
+
+    # Only the writer task, fed a chunk at a time
+    assert len(asyncio.all_tasks()) - tasks_before == 1
+    assert connection_manager.queue_depth == 5000
+    assert transport.queue_depth == 1000
+    while len(transport.websocket.frames) < 5000:
+        await asyncio.sleep(0)
+    assert _serials(transport) == list(range(5000))
+    assert connection_manager.pending_message_queue.count() == 5000
+
+    connection_manager.pending_message_queue.complete_all_messages(AblyException('cleanup', 500, 50000))
+    await transport.dispose()
+    await ably.close()
+
+
+async def test_resent_messages_are_acknowledged_in_msgserial_order():
+    ably, connection_manager, transport = _connected()
+    connection_manager._ConnectionManager__state = ConnectionState.DISCONNECTED
+    # Messages 0 and 1 were sent, then message 2 was published while disconnected
+    for serial in range(2):
+        connection_manager.pending_message_queue.push(PendingMessage({**_message(), 'msgSerial': serial}))
+    connection_manager.msg_serial = 2
+    publish = asyncio.create_task(connection_manager.send_protocol_message(_message()))
+    await asyncio.sleep(0)
+    connection_manager.requeue_pending_messages()
+    assert connection_manager.pending_message_queue.count() == 0
+
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    connection_manager.send_queued_messages()
+
+    pending = connection_manager.pending_message_queue.messages
+    assert [message.message['msgSerial'] for message in pending] == [0, 1, 2]
+    connection_manager.on_ack(0, 2, None)
+    assert [message.future.done() for message in pending] == [True, True, False]
+    publish.cancel()
+
+    connection_manager.pending_message_queue.complete_all_messages(AblyException('cleanup', 500, 50000))
+    await transport.dispose()
+    await ably.close()
+
+
+async def test_publishers_wait_at_the_high_water_mark():
+    ably, connection_manager, transport = _connected(outbound_high_water_mark=4)
+    transport.websocket.open.clear()
+
+    tasks = [asyncio.create_task(connection_manager.send_protocol_message(_message())) for _ in range(10)]
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    # The first messages are being written as one batch, and the others wait for it to be written
+    assert transport.queue_depth == 4
+    assert connection_manager.msg_serial == 4
+
+    transport.websocket.open.set()
+    while len(transport.websocket.frames) < 10:
+        await asyncio.sleep(0)
+
+    assert _serials(transport) == list(range(10))
+
+    for task in tasks:
+        task.cancel()
+    await transport.dispose()
+    await ably.close()
+
+
+async def test_dispose_fails_messages_waiting_to_be_written():
+    ably, connection_manager, transport = _connected()
+    transport.websocket.open.clear()
+
+    writes = [transport.enqueue({'action': ProtocolMessageAction.HEARTBEAT}) for _ in range(3)]
+    await asyncio.sleep(0)
+    await transport.dispose()
+
+    # Including the message that was being written
+    for write in writes:
+        with pytest.raises(AblyException):
+            await write
+    assert transport.queue_depth == 0
+    with pytest.raises(AblyException):
+        transport.enqueue({'action': ProtocolMessageAction.HEARTBEAT})
+
+    await ably.close()
+
+
+async def test_send_does_not_hang_when_disposed_while_writing():
+    ably, connection_manager, transport = _connected()
+    transport.websocket.open.clear()
+
+    send = asyncio.create_task(transport.send({'action': ProtocolMessageAction.HEARTBEAT}))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert transport.websocket.writing == 1
+    await transport.dispose()
+
+    with pytest.raises(AblyException):
+        await asyncio.wait_for(send, 1)
+    await ably.close()
+
+
+async def test_messages_queued_together_are_written_in_one_batch():
+    ably, connection_manager, transport = _connected()
+    frames = []
+
+    async def send(raw):
+        # Writes without yielding, as websockets does until the socket buffer is full
+        frames.append(raw)
+
+    transport.websocket.send = send
+    writes = [transport.enqueue({'action': ProtocolMessageAction.HEARTBEAT}) for _ in range(100)]
+    await asyncio.sleep(0)
+
+    assert len(frames) == 100
+    assert all(write.done() for write in writes)
+    assert transport.queue_depth == 0
+
+    await transport.dispose()
+    await ably.close()
+
+
+async def test_a_message_that_cannot_be_encoded_fails_alone():
+    ably, connection_manager, transport = _connected()
+
+    writes = [
+        transport.enqueue({'action': ProtocolMessageAction.HEARTBEAT, 'id': 'first'}),
+        transport.enqueue({'action': ProtocolMessageAction.HEARTBEAT, 'id': object()}),
+        transport.enqueue({'action': ProtocolMessageAction.HEARTBEAT, 'id': 'last'}),
+    ]
+    await asyncio.gather(*writes, return_exceptions=True)
+
+    assert writes[0].exception() is None and writes[2].exception() is None
+    assert isinstance(writes[1].exception(), TypeError)
+    assert len(transport.websocket.frames) == 2
+
+    await transport.dispose()
+    await ably.close()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+import respx
+from httpx import Response
+
+from ably import AblyRest, Outbox
+from ably.types.message import Message
+from ably.util.exceptions import AblyException
+
+
+def _rest():
+    return AblyRest('api:key', use_binary_protocol=False, endpoint='example.org', fallback_hosts=[])
+
+
+@respx.mock
+async def test_outbox_keeps_ids_across_reopening(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    ably = _rest()
+    outbox = Outbox(ably, path)
+    ids = await outbox.add('channel', [Message('first', 'a'), Message('second', 'b')])
+    await outbox.add('channel', Message('third', 'c', id='own-id'))
+    await outbox.close()
+
+    route = respx.post('https://example.org/channels/channel/messages').mock(return_value=Response(201, json={}))
+    outbox = Outbox(ably, path)
+    assert await outbox.count() == 2
+    assert (await outbox.drain()).published == 2
+    assert await outbox.count() == 0
+
+    bodies = [json.loads(call.request.content) for call in route.calls]
+    sent_ids = sorted(
+        message['id'] for body in bodies for message in (body if isinstance(body, list) else [body])
+    )
+    assert sent_ids == sorted(ids + ['own-id'])
+    assert ids[0].endswith(':0') and ids[1].endswith(':1')
+
+    await outbox.close()
+    await ably.close()
+
+
+@respx.mock
+async def test_outbox_keeps_failed_requests(tmp_path):
+    ably = _rest()
+    outbox = Outbox(ably, str(tmp_path / 'outbox.db'), max_concurrency=2)
+    for i in range(5):
+        await outbox.add(f'channel{i}', 'event', str(i))
+
+    respx.post('https://example.org/channels/channel3/messages').mock(
+        return_value=Response(500, json={'error': {'message': 'error', 'statusCode': 500, 'code': 50000}}))
+    respx.post(url__regex=r'https://example.org/channels/channel\d/messages').mock(
+        return_value=Response(201, json={}))
+
+    with pytest.raises(AblyException):
+        await outbox.drain()
+    assert await outbox.count() == 1
+
+    respx.routes.clear()
+    route = respx.post('https://example.org/channels/channel3/messages').mock(return_value=Response(201, json={}))
+    assert (await outbox.drain()).published == 1
+    assert json.loads(route.calls[0].request.content)['data'] == '3'
+    assert await outbox.count() == 0
+
+    await outbox.close()
+    await ably.close()
+
+
+@respx.mock
+async def test_outbox_moves_rejected_requests_out(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    ably = _rest()
+    outbox = Outbox(ably, path)
+    for i in range(3):
+        await outbox.add(f'channel{i}', 'event', str(i))
+
+    respx.post('https://example.org/channels/channel1/messages').mock(
+        return_value=Response(400, json={'error': {'message': 'invalid', 'statusCode': 400, 'code': 40013}}))
+    respx.post('https://example.org/channels/channel2/messages').mock(
+        return_value=Response(429, json={'error': {'message': 'limit', 'statusCode': 429, 'code': 42910}}))
+    respx.post('https://example.org/channels/channel0/messages').mock(return_value=Response(201, json={}))
+
+    # The rate limited request is kept and raised, the rejected one is not
+    with pytest.raises(AblyException) as excinfo:
+        await outbox.drain()
+    assert excinfo.value.code == 42910
+    assert await outbox.count() == 1
+
+    respx.routes.clear()
+    route = respx.post(url__regex=r'https://example.org/channels/channel\d/messages').mock(
+        return_value=Response(201, json={}))
+    result = await outbox.drain()
+    assert result.published == 1
+    assert result.rejected == []
+    assert route.calls[0].request.url.path == '/channels/channel2/messages'
+    await outbox.close()
+
+    outbox = Outbox(ably, path)
+    [rejected] = await outbox.rejected()
+    assert rejected.path == '/channels/channel1/messages'
+    assert (rejected.error.status_code, rejected.error.code) == (400, 40013)
+    await outbox.clear_rejected()
+    assert await outbox.rejected() == []
+
+    await outbox.close()
+    await ably.close()
+
+
+@respx.mock
+async def test_outbox_reports_rejected_requests_in_the_result(tmp_path):
+    ably = _rest()
+    outbox = Outbox(ably, str(tmp_path / 'outbox.db'))
+    await outbox.add('channel', 'event', 'data')
+
+    respx.post('https://example.org/channels/channel/messages').mock(
+        return_value=Response(401, json={'error': {'message': 'denied', 'statusCode': 401, 'code': 40160}}))
+
+    result = await outbox.drain()
+    assert result.published == 0
+    assert [request.error.code for request in result.rejected] == [40160]
+    assert await outbox.count() == 0
+    assert (await outbox.drain()).rejected == []
+
+    await outbox.close()
+    await ably.close()
+
+
+async def test_outbox_does_not_block_the_event_loop(tmp_path):
+    ably = _rest()
+    outbox = Outbox(ably, str(tmp_path / 'outbox.db'))
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    for i in range(20):
+        await outbox.add('channel', 'event', str(i))
+    assert await outbox.count() == 20
+    ticker.cancel()
+    # The loop ran while the writes were committed in the outbox thread
+    assert ticks > 1
+
+    await outbox.close()
+    await ably.close()
+
+
+async def test_outbox_raises_an_error_opening_the_file_on_first_use(tmp_path):
+    ably = _rest()
+    outbox = Outbox(ably, str(tmp_path / 'missing' / 'outbox.db'))
+    with pytest.raises(sqlite3.OperationalError):
+        await outbox.add('channel', 'event', 'data')
+    with pytest.raises(sqlite3.OperationalError):
+        await outbox.close()
+    await ably.close()
@@ -0,0 +1,143 @@
+import asyncio
+from unittest import mock
+
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channelstate import ChannelState
+from ably.types.presence import PresenceAction, PresenceMessage
+from ably.util.exceptions import AblyException
+
+
+def _attached_channel(fail_client_id=None, **kwargs):
+    ably = AblyRealtime('api:key', auto_connect=False, use_binary_protocol=False, **kwargs)
+    connection_manager = ably.connection.connection_manager
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    ably.connection.state = ConnectionState.CONNECTED
+    sent = []
+
+    async def send_protocol_message(msg):
+        sent.append(msg)
+        # Acknowledges every protocol message except one carrying fail_client_id
+        if any(presence['clientId'] == fail_client_id for presence in msg['presence']):
+            raise AblyException('nacked', 400, 40000)
+
+    connection_manager.send_protocol_message = send_protocol_message
+    channel = ably.channels.get('channel')
+    channel._notify_state(ChannelState.ATTACHED)
+    return ably, channel, sent
+
+
+async def test_enter_clients_sends_one_protocol_message():
+    ably, channel, sent = _attached_channel()
+
+    results = await channel.presence.enter_clients([(f'client{i}', f'data{i}') for i in range(3)] + [('bad', 1)])
+
+    assert results[:3] == [None, None, None]
+    assert results[3].code == 40011
+    assert len(sent) == 1
+    assert sent[0]['action'] == ProtocolMessageAction.PRESENCE
+    assert [(msg['clientId'], msg['data']) for msg in sent[0]['presence']] == [
+        ('client0', 'data0'), ('client1', 'data1'), ('client2', 'data2'),
+    ]
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_enter_clients_splits_by_size_and_resolves_results_per_client():
+    ably, channel, sent = _attached_channel(fail_client_id='client3')
+    ably.options.max_message_size = 200
+
+    results = await channel.presence.enter_clients(
+        [(f'client{i}', 'x' * 40) for i in range(6)] + [('large', 'x' * 300)]
+    )
+
+    assert len(sent) > 1
+    assert all(len(msg['presence']) > 1 for msg in sent)
+    nacked = next(msg for msg in sent if 'client3' in [p['clientId'] for p in msg['presence']])
+    failed = [p['clientId'] for p in nacked['presence']]
+    assert [f'client{i}' for i, result in enumerate(results[:6]) if result is not None] == failed
+    assert results[-1].code == 40009
+    assert 'large' not in {p['clientId'] for msg in sent for p in msg['presence']}
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_leave_clients_fails_only_mismatched_client_ids():
+    ably, channel, sent = _attached_channel(client_id='me')
+
+    results = await channel.presence.leave_clients([('me', None), ('other', None)])
+
+    assert results[0] is None
+    assert results[1].code == 40012
+    assert [msg['clientId'] for msg in sent[0]['presence']] == ['me']
+    assert sent[0]['presence'][0]['action'] == PresenceAction.LEAVE
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_leave_clients_does_not_attach():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel')
+
+    try:
+        await channel.presence.leave_clients([('client', None)])
+    except AblyException as e:
+        assert e.code == 90001
+    else:
+        raise AssertionError('leave_clients should fail on an initialized channel')
+
+    await ably.close()
+
+
+async def test_reentering_members_is_batched():
+    ably, channel, sent = _attached_channel(fail_client_id='client1')
+    presence = channel.presence
+    for i in range(3):
+        presence._my_members.put(PresenceMessage(
+            id=f'conn:0:{i}', action=PresenceAction.ENTER, client_id=f'client{i}', connection_id='conn',
+        ))
+    updates = []
+
+    def listener(state_change):
+        updates.append(state_change)
+
+    channel.on('update', listener)
+    presence._ensure_my_members_present()
+    await asyncio.sleep(0.01)
+
+    assert len(sent) == 1
+    assert [msg['clientId'] for msg in sent[0]['presence']] == ['client0', 'client1', 'client2']
+    assert len(updates) == 3
+    assert all(update.reason.code == 40000 for update in updates)
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+
+
+async def test_reentering_reuses_the_message_sent_to_enter():
+    ably, channel, sent = _attached_channel()
+    presence = channel.presence
+
+    await presence.enter_client('client', 'data')
+    entered = presence._sent_enters['client'][3]
+    presence._my_members.put(PresenceMessage(
+        id='conn:0:0', action=PresenceAction.ENTER, client_id='client', connection_id='other', data='data',
+    ))
+
+    with mock.patch.object(PresenceMessage, '_to_encoded', autospec=True) as encode:
+        presence._ensure_my_members_present()
+        await asyncio.sleep(0.01)
+
+    encode.assert_not_called()
+    assert presence._sent_enters['client'][3] is entered
+    assert sent[1]['presence'] == sent[0]['presence']
+
+    await presence.update_client('client', 'data')
+    assert 'client' not in presence._sent_enters
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
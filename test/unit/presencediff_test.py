@@ -0,0 +1,76 @@
+import asyncio
+from unittest import mock
+
+from ably import AblyRealtime
+from ably.types.presence import PresenceAction, PresenceMessage
+
+
+def _presence(client_id, action, msg_serial=0, data=None):
+    return PresenceMessage(
+        id=f'conn-{client_id}:{msg_serial}:0',
+        action=action,
+        client_id=client_id,
+        connection_id=f'conn-{client_id}',
+        data=data,
+    )
+
+
+async def test_presence_diff_coalesces_changes_over_the_interval():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel')
+    presence = channel.presence
+    presence.set_presence([
+        _presence('stays', PresenceAction.ENTER),
+        _presence('updates', PresenceAction.ENTER, data='a'),
+        _presence('leaves', PresenceAction.ENTER),
+    ], is_sync=False)
+    diffs = []
+
+    def listener(diff):
+        diffs.append(diff)
+
+    with mock.patch.object(channel, 'attach'):
+        await presence.subscribe_diff(listener, interval=20)
+
+    presence.set_presence([
+        _presence('updates', PresenceAction.UPDATE, msg_serial=1, data='b'),
+        _presence('leaves', PresenceAction.LEAVE, msg_serial=1),
+        _presence('enters', PresenceAction.ENTER),
+        _presence('transient', PresenceAction.ENTER),
+    ], is_sync=False)
+    presence.set_presence([_presence('transient', PresenceAction.LEAVE, msg_serial=1)], is_sync=False)
+    await asyncio.sleep(0.05)
+
+    assert len(diffs) == 1
+    diff = diffs[0]
+    assert [member.client_id for member in diff.entered] == ['enters']
+    assert [member.client_id for member in diff.left] == ['leaves']
+    assert [(member.client_id, member.data) for member in diff.updated] == [('updates', 'b')]
+    assert all(member.action == PresenceAction.PRESENT for member in diff.entered + diff.left + diff.updated)
+    assert diff.count == presence.member_count == 3
+
+    await ably.close()
+
+
+async def test_presence_diff_unsubscribe_stops_delivery():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel')
+    presence = channel.presence
+    diffs = []
+
+    def listener(diff):
+        diffs.append(diff)
+
+    with mock.patch.object(channel, 'attach'):
+        await presence.subscribe_diff(listener, interval=10)
+    assert not presence._is_idle()
+
+    presence.set_presence([_presence('enters', PresenceAction.ENTER)], is_sync=False)
+    presence.unsubscribe_diff(listener)
+    await asyncio.sleep(0.03)
+
+    assert diffs == []
+    assert presence.members._change_listeners == []
+    assert presence._is_idle()
+
+    await ably.close()
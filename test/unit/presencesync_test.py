@@ -0,0 +1,86 @@
+import asyncio
+from unittest import mock
+
+from ably import AblyRealtime
+from ably.types.channelstate import ChannelState
+from ably.types.presence import PresenceAction, PresenceMessage
+
+
+def _members(count, msg_serial=0, action=PresenceAction.PRESENT):
+    return [
+        PresenceMessage(
+            id=f'conn{i}:{msg_serial}:0',
+            action=action,
+            client_id=f'client{i}',
+            connection_id=f'conn{i}',
+        )
+        for i in range(count)
+    ]
+
+
+async def test_large_sync_is_applied_in_chunks_and_in_order():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel')
+    presence = channel.presence
+    left = []
+
+    def on_leave(message):
+        left.append(message)
+
+    with mock.patch.object(channel, 'attach'):
+        await presence.subscribe('leave', on_leave)
+
+    presence.set_presence(_members(2500), is_sync=True, sync_channel_serial='sync:cursor')
+    # Only the first chunk is applied before returning to the event loop
+    assert presence.members.count() == 1000
+
+    # A later message waits for the page before it
+    presence.set_presence(_members(1, msg_serial=1, action=PresenceAction.LEAVE), is_sync=False)
+    await asyncio.sleep(0.01)
+
+    # The sync is still in progress, so the member that left is ABSENT
+    assert presence.members.count() == 2499
+    assert presence.members.get('conn0:client0').action == PresenceAction.ABSENT
+    assert len(left) == 1
+
+    await ably.close()
+
+
+async def test_sync_end_emits_leaves_for_residual_members():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel')
+    presence = channel.presence
+    presence.set_presence(_members(1500), is_sync=False)
+    await asyncio.sleep(0.01)
+    left = []
+
+    def on_leave(message):
+        left.append(message)
+
+    with mock.patch.object(channel, 'attach'):
+        await presence.subscribe('leave', on_leave)
+
+    presence.set_presence([], is_sync=True, sync_channel_serial='sync:cursor')
+    presence.set_presence(_members(1, msg_serial=1), is_sync=True, sync_channel_serial='sync:')
+    await asyncio.sleep(0.01)
+
+    assert presence.sync_complete
+    assert presence.members.count() == 1
+    assert len(left) == 1499
+
+    await ably.close()
+
+
+async def test_channel_state_change_applies_pending_presence_first():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    channel = ably.channels.get('channel')
+    presence = channel.presence
+
+    presence.set_presence(_members(2500), is_sync=False)
+    assert presence.members.count() == 1000
+
+    channel._notify_state(ChannelState.SUSPENDED)
+
+    assert presence.members.count() == 2500
+
+    await ably.close()
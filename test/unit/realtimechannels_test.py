@@ -0,0 +1,53 @@
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channelstate import ChannelState
+
+
+async def test_channel_message_for_unknown_channel_is_ignored():
+    ably = AblyRealtime('api:key', auto_connect=False)
+
+    # Should not raise
+    ably.channels._on_channel_message({'action': ProtocolMessageAction.MESSAGE, 'channel': 'unknown'})
+    ably.channels._on_channel_message({'action': ProtocolMessageAction.MESSAGE})
+
+    await ably.close()
+
+
+async def test_channels_are_indexed_by_state():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    first = ably.channels.get('first')
+    second = ably.channels.get('second')
+
+    assert ably.channels._channels_in_states(ChannelState.INITIALIZED) == [first, second]
+
+    first.state = ChannelState.SUSPENDED
+    second._notify_state(ChannelState.FAILED)
+
+    assert ably.channels._channels_in_states(ChannelState.INITIALIZED) == []
+    assert ably.channels._channels_in_states(ChannelState.SUSPENDED) == [first]
+    assert ably.channels._channels_in_states(ChannelState.SUSPENDED, ChannelState.FAILED) == [first, second]
+
+    ably.channels.release('first')
+    assert ably.channels._channels_in_states(ChannelState.SUSPENDED) == []
+
+    # Released channels are no longer tracked
+    first._notify_state(ChannelState.DETACHED)
+    assert ably.channels._channels_in_states(ChannelState.DETACHED) == []
+
+    await ably.close()
+
+
+async def test_connection_interruption_only_affects_active_channels():
+    ably = AblyRealtime('api:key', auto_connect=False)
+    attached = ably.channels.get('attached')
+    idle = ably.channels.get('idle')
+    attached.state = ChannelState.ATTACHED
+
+    ably.channels._propagate_connection_interruption(ConnectionState.SUSPENDED, None)
+
+    assert attached.state == ChannelState.SUSPENDED
+    assert idle.state == ChannelState.INITIALIZED
+    assert ably.channels._channels_in_states(ChannelState.SUSPENDED) == [attached]
+
+    await ably.close()
@@ -0,0 +1,107 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from ably import AblyRealtimePool
+from ably.realtime.connection import ConnectionState
+from ably.realtime.pool import HashRing
+from ably.types.connectionstate import ConnectionEvent, ConnectionStateChange
+from ably.util.exceptions import AblyException
+
+
+def test_hash_ring_spreads_keys_evenly():
+    ring = HashRing(4)
+    counts = Counter(ring.node(f'channel-{i}') for i in range(10000))
+
+    assert sorted(counts) == [0, 1, 2, 3]
+    assert min(counts.values()) > 1500
+
+
+def test_hash_ring_moves_few_keys_when_resized():
+    keys = [f'channel-{i}' for i in range(10000)]
+    before = HashRing(4)
+    after = HashRing(5)
+
+    moved = [key for key in keys if before.node(key) != after.node(key)]
+
+    # Only keys taken by the new node move
+    assert all(after.node(key) == 4 for key in moved)
+    assert len(moved) < 3000
+
+
+async def test_pool_channels_use_one_client_each():
+    pool = AblyRealtimePool('api:key', size=3, auto_connect=False)
+    names = [f'channel-{i}' for i in range(30)]
+    channels = [pool.channels.get(name) for name in names]
+
+    for name, channel in zip(names, channels):
+        client = pool.client_for(name)
+        assert channel is client.channels.get(name)
+        assert name in pool.channels
+    assert len(pool.channels) == 30
+    assert {channel.name for channel in pool.channels} == set(names)
+    assert all(len(client.channels) > 0 for client in pool.clients)
+
+    pool.channels.release('channel-0')
+    assert 'channel-0' not in pool.channels
+    await pool.close()
+
+
+async def test_pool_derived_channels_use_the_client_of_their_base_name():
+    pool = AblyRealtimePool('api:key', size=4, auto_connect=False)
+    names = [f'foo{i}' for i in range(20)]
+    derived = [pool.channels.get_derived(name, {'filter': 'name == `"bar"`'}) for name in names]
+
+    for name, channel in zip(names, derived):
+        assert channel.name != name
+        assert pool.client_for(channel.name) is pool.client_for(name)
+        assert channel in pool.channels
+        assert channel.name in pool.channels
+
+    for channel in derived:
+        pool.channels.release(channel.name)
+        assert channel.name not in pool.channels
+    assert len(pool.channels) == 0
+    await pool.close()
+
+
+async def test_pool_connection_state_is_least_connected():
+    pool = AblyRealtimePool('api:key', size=2, auto_connect=False)
+    first, second = pool.clients
+    changes = []
+
+    def on_state_change(state_change):
+        changes.append(state_change)
+
+    pool.connection.on(on_state_change)
+    assert pool.connection.state == ConnectionState.INITIALIZED
+
+    def set_state(client, state):
+        previous = client.connection.state
+        client.connection._on_state_update(ConnectionStateChange(previous, state, ConnectionEvent(state.value)))
+
+    set_state(first, ConnectionState.CONNECTED)
+    set_state(second, ConnectionState.CONNECTING)
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert pool.connection.state == ConnectionState.CONNECTING
+
+    set_state(second, ConnectionState.CONNECTED)
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert pool.connection.state == ConnectionState.CONNECTED
+    assert pool.connection.states == [ConnectionState.CONNECTED, ConnectionState.CONNECTED]
+    assert [(change.previous, change.current) for change in changes] == [
+        (ConnectionState.INITIALIZED, ConnectionState.CONNECTING),
+        (ConnectionState.CONNECTING, ConnectionState.CONNECTED),
+    ]
+
+    set_state(first, ConnectionState.CLOSED)
+    set_state(second, ConnectionState.CLOSED)
+    await pool.close()
+
+
+def test_pool_rejects_recover():
+    with pytest.raises(AblyException):
+        AblyRealtimePool('api:key', size=2, auto_connect=False, recover='{}')
@@ -0,0 +1,89 @@
+import asyncio
+
+from ably import AblyRealtime, RecoveryKeyContext
+from ably.realtime.connection import ConnectionState
+from ably.types.channelstate import ChannelState
+from ably.types.connectiondetails import ConnectionDetails
+from ably.util.exceptions import AblyException
+
+
+def _connected_realtime(**kwargs):
+    ably = AblyRealtime('api:key', auto_connect=False, **kwargs)
+    connection_manager = ably.connection.connection_manager
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    ably.connection.state = ConnectionState.CONNECTED
+    connection_manager._ConnectionManager__connection_details = ConnectionDetails(120000, 15000, 'key!1', None)
+    return ably
+
+
+def test_recovery_key_round_trip():
+    context = RecoveryKeyContext('key!1', 7, {'first': 'serial:1'})
+    assert RecoveryKeyContext.decode(context.encode()) == context
+    assert RecoveryKeyContext.decode('not json') is None
+    assert RecoveryKeyContext.decode('{"msgSerial": 1}') is None
+
+
+async def test_create_recovery_key():
+    ably = _connected_realtime()
+    ably.connection.connection_manager.msg_serial = 3
+    attached = ably.channels.get('attached')
+    attached._notify_state(ChannelState.ATTACHED)
+    attached._channel_serial = 'serial:1'
+    detached = ably.channels.get('detached')
+    detached._channel_serial = 'serial:2'
+
+    context = RecoveryKeyContext.decode(ably.connection.create_recovery_key())
+
+    assert context == RecoveryKeyContext('key!1', 3, {'attached': 'serial:1'})
+
+    ably.connection.connection_manager._ConnectionManager__state = ConnectionState.SUSPENDED
+    assert ably.connection.create_recovery_key() is None
+    await ably.close()
+
+
+async def test_save_and_load_recovery_key(tmp_path):
+    path = str(tmp_path / 'recovery')
+    assert RecoveryKeyContext.load(path) is None
+
+    ably = AblyRealtime('api:key', auto_connect=False)
+    assert ably.connection.save_recovery_key(path) is False
+    await ably.close()
+
+    ably = _connected_realtime()
+    assert ably.connection.save_recovery_key(path) is True
+    assert RecoveryKeyContext.load(path) == ably.connection.create_recovery_key()
+    assert list(tmp_path.iterdir()) == [tmp_path / 'recovery']
+    await ably.close()
+
+
+async def test_recover_option_restores_connection_and_channels():
+    recovery_key = RecoveryKeyContext('key!1', 5, {'first': 'serial:1', 'second': 'serial:2'}).encode()
+    ably = AblyRealtime('api:key', auto_connect=False, recover=recovery_key)
+    connection_manager = ably.connection.connection_manager
+
+    assert connection_manager.msg_serial == 5
+    assert [channel.name for channel in ably.channels] == ['first', 'second']
+    assert all(channel.state == ChannelState.ATTACHING for channel in ably.channels)
+    assert ably.channels.get('second')._attach_message()['channelSerial'] == 'serial:2'
+
+    params = await connection_manager._ConnectionManager__get_transport_params()
+    assert params['recover'] == 'key!1'
+    assert 'resume' not in params
+
+    sent = []
+
+    async def send_protocol_message(msg):
+        sent.append(msg)
+
+    connection_manager.send_protocol_message = send_protocol_message
+    connection_manager.on_connected(ConnectionDetails(120000, 15000, 'key!2', None), 'connection',
+                                    reason=AblyException('Unable to recover connection', 400, 80008))
+
+    assert connection_manager.msg_serial == 0
+    await asyncio.sleep(0.01)
+    assert [(msg['channel'], msg.get('channelSerial')) for msg in sent] == [
+        ('first', 'serial:1'), ('second', 'serial:2')
+    ]
+    params = await connection_manager._ConnectionManager__get_transport_params()
+    assert 'recover' not in params
+    await ably.close()
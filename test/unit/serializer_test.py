@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from ably.util import serializer
+
+orjson = pytest.importorskip('orjson')
+
+
+@pytest.fixture(params=['json', 'orjson'])
+def backend(request):
+    previous = serializer.backend_name()
+    serializer.set_backend(request.param)
+    yield request.param
+    serializer.set_backend(previous)
+
+
+def test_orjson_is_selected_when_installed():
+    assert serializer.backend_name() == 'orjson'
+
+
+def test_backends_serialize_compactly(backend):
+    value = {'name': 'événement', 'items': [1, 2.5, None, True], 'nested': {'key': 'value'}}
+
+    encoded = serializer.dumps(value)
+
+    assert isinstance(encoded, bytes)
+    assert b' ' not in encoded
+    assert json.loads(encoded) == value
+    assert serializer.dumps_str(value) == encoded.decode('utf-8')
+    assert serializer.loads(encoded) == serializer.loads(encoded.decode('utf-8')) == value
+    assert serializer.loads(bytearray(encoded)) == value
+
+
+def test_backends_handle_what_the_json_module_does(backend):
+    assert serializer.loads(serializer.dumps({1: 2 ** 70})) == {'1': 2 ** 70}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        serializer.set_backend('simplejson')
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from unittest import mock
+
+try:
+    # websockets 15+ preferred import
+    from websockets.asyncio.server import serve as ws_serve
+except ImportError:
+    # websockets 14 and earlier fallback
+    from websockets.server import serve as ws_serve
+
+from ably import AblyRealtime
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.util.exceptions import AblyException
+from ably.util.helper import get_retry_delay
+
+
+class _Host:
+    """A local stand-in for a realtime host, recording the websocket requests it gets"""
+
+    def __init__(self):
+        self.paths = []
+        self.websockets = []
+
+    async def _connect(self, websocket):
+        self.paths.append(websocket.request.path)
+        self.websockets.append(websocket)
+        await websocket.send(json.dumps({
+            'action': ProtocolMessageAction.CONNECTED,
+            'connectionId': 'connection',
+            'connectionDetails': {'connectionKey': 'key', 'connectionStateTtl': 120000},
+        }))
+        async for _ in websocket:
+            pass
+
+    async def __aenter__(self):
+        self.server = await ws_serve(self._connect, '127.0.0.1', 0, ping_interval=None)
+        self.host = f'127.0.0.1:{self.server.sockets[0].getsockname()[1]}'
+        return self
+
+    async def __aexit__(self, *args):
+        self.server.close()
+
+
+async def test_connection_is_resumed_over_the_standby_socket():
+    async with _Host() as primary, _Host() as fallback:
+        ably = AblyRealtime('api:key', endpoint=primary.host, fallback_hosts=[fallback.host], tls=False,
+                           use_binary_protocol=False, standby_transport=True)
+        await asyncio.wait_for(ably.connection.once_async(ConnectionState.CONNECTED), timeout=3)
+        # Wait for the standby socket to the fallback host
+        for _ in range(100):
+            if ably.connection.connection_manager._ConnectionManager__standby:
+                break
+            await asyncio.sleep(0.01)
+        assert fallback.paths == []
+
+        await primary.websockets[0].close()
+        await asyncio.wait_for(ably.connection.once_async(ConnectionState.CONNECTED), timeout=3)
+
+        assert ably.connection.connection_manager.transport.host == fallback.host
+        assert 'resume=key' in fallback.paths[0]
+        assert len(primary.paths) == 1
+
+        await ably.close()
+        assert ably.connection.connection_manager._ConnectionManager__standby is None
+
+
+async def test_closed_standby_socket_is_not_used():
+    # The fallback host accepts TCP connections and closes them straight away
+    fallback = await asyncio.start_server(lambda reader, writer: writer.close(), '127.0.0.1', 0)
+    fallback_host = f'127.0.0.1:{fallback.sockets[0].getsockname()[1]}'
+    async with _Host() as primary:
+        ably = AblyRealtime('api:key', endpoint=primary.host, fallback_hosts=[fallback_host], tls=False,
+                           use_binary_protocol=False, standby_transport=True)
+        await asyncio.wait_for(ably.connection.once_async(ConnectionState.CONNECTED), timeout=3)
+        for _ in range(100):
+            if ably.connection.connection_manager._ConnectionManager__standby:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        await primary.websockets[0].close()
+        await asyncio.wait_for(ably.connection.once_async(ConnectionState.CONNECTED), timeout=3)
+
+        assert ably.connection.connection_manager.transport.host == primary.host
+        assert 'resume=key' in primary.paths[1]
+
+        await ably.close()
+    fallback.close()
+
+
+def test_retry_delay_backs_off_with_jitter():
+    with mock.patch('random.random', return_value=0):
+        assert [get_retry_delay(500, 15000, attempt) for attempt in range(1, 8)] == \
+            [500, 1000, 2000, 4000, 8000, 15000, 15000]
+    with mock.patch('random.random', return_value=1):
+        assert get_retry_delay(500, 15000, 2) == 800
+    assert get_retry_delay(500, 15000, 10_000) <= 15000
+
+
+async def test_disconnected_retries_back_off():
+    ably = AblyRealtime('api:key', auto_connect=False, disconnected_retry_backoff=100,
+                       disconnected_retry_timeout=1000)
+    connection_manager = ably.connection.connection_manager
+    intervals = []
+    error = AblyException('unreachable', 500, 50000)
+
+    with mock.patch.object(connection_manager, 'start_retry_timer', side_effect=intervals.append), \
+            mock.patch('random.random', return_value=0):
+        for _ in range(3):
+            connection_manager.notify_state(ConnectionState.CONNECTING)
+            connection_manager.notify_state(ConnectionState.DISCONNECTED, error)
+
+    assert intervals == [100, 200, 400]
+    connection_manager.cancel_suspend_timer()
+    connection_manager.cancel_transition_timer()
+    await ably.close()
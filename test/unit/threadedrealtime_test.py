@@ -0,0 +1,180 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+from ably import AblyRealtimeThreaded
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channelstate import ChannelState
+from ably.types.operations import PublishResult
+
+
+def _message(index):
+    return {
+        'action': ProtocolMessageAction.MESSAGE, 'channel': 'channel', 'id': f'p{index}',
+        'messages': [{'name': 'event', 'data': f'data {index}'}],
+    }
+
+
+def test_runs_the_client_on_a_background_loop():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False)
+    loop_threads = []
+    client._call(lambda: loop_threads.append(threading.current_thread()))
+
+    assert loop_threads[0] is not threading.current_thread()
+    assert loop_threads[0].name == 'ably-realtime'
+    assert client.connection.state == ConnectionState.INITIALIZED
+    client.connection.wait_for(ConnectionState.INITIALIZED, timeout=1)
+
+    client.close()
+    assert not loop_threads[0].is_alive()
+    assert client.loop.is_closed()
+
+
+def test_listeners_are_called_in_the_executor_in_order():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False)
+    channel = client.channels.get('channel')
+    assert client.channels.get('channel') is channel
+    received = []
+    done = threading.Event()
+
+    def listener(message):
+        received.append((message.data, threading.current_thread().name))
+        if len(received) == 20:
+            done.set()
+
+    with mock.patch.object(channel.channel, 'attach'):
+        channel.subscribe(listener)
+    for index in range(20):
+        client._call(channel.channel._on_message, _message(index))
+
+    assert done.wait(5)
+    assert [data for data, _ in received] == [f'data {index}' for index in range(20)]
+    assert all(name.startswith('ably-listeners') for _, name in received)
+
+    channel.unsubscribe(listener)
+    client._call(channel.channel._on_message, _message(20))
+    client.close()
+    assert len(received) == 20
+
+
+def test_publish_from_many_threads():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False)
+    channel = client.channels.get('channel')
+    publish_threads = set()
+
+    async def publish(*args, **kwargs):
+        publish_threads.add(threading.current_thread().name)
+        return PublishResult(serials=[args[1]])
+
+    with mock.patch.object(channel.channel, 'publish', publish):
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda i: channel.publish('event', str(i)), range(50)))
+        future = channel.publish_nowait('event', 'nowait')
+        assert future.result(5).serials == ['nowait']
+
+    assert [result.serials for result in results] == [[str(i)] for i in range(50)]
+    assert publish_threads == {'ably-realtime'}
+    client.close()
+
+
+def test_calls_from_the_loop_thread_are_rejected():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False)
+    channel = client.channels.get('channel')
+    errors = []
+
+    def get_state():
+        try:
+            client.connection.wait_for(ConnectionState.CONNECTED)
+        except RuntimeError as e:
+            errors.append(e)
+
+    client._call(get_state)
+    assert len(errors) == 1
+    assert channel.state == ChannelState.INITIALIZED
+    client.close()
+
+
+def test_context_manager_closes_the_client():
+    with AblyRealtimeThreaded('api:key', auto_connect=False) as client:
+        loop = client.loop
+    assert loop.is_closed()
+    with pytest.raises(RuntimeError):
+        client.connect()
+
+
+def test_threads_getting_a_channel_at_once_share_it():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False)
+    barrier = threading.Barrier(8)
+
+    def get(_):
+        barrier.wait()
+        return client.channels.get('channel')
+
+    with ThreadPoolExecutor(8) as executor:
+        channels = list(executor.map(get, range(8)))
+
+    assert all(channel is channels[0] for channel in channels)
+    client.close()
+
+
+def test_coroutine_listeners_are_awaited():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False)
+    channel = client.channels.get('channel')
+    received = []
+    done = threading.Event()
+
+    async def listener(message):
+        await asyncio.sleep(0)
+        received.append(message.data)
+        done.set()
+
+    with mock.patch.object(channel.channel, 'attach'):
+        channel.subscribe(listener)
+    client._call(channel.channel._on_message, _message(0))
+
+    assert done.wait(5)
+    assert received == ['data 0']
+    client.close()
+
+
+def test_coroutine_listeners_share_an_event_loop():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False)
+    channel = client.channels.get('channel')
+    loops = []
+    done = threading.Event()
+
+    async def listener(message):
+        loops.append(asyncio.get_running_loop())
+        if len(loops) == 3:
+            done.set()
+
+    with mock.patch.object(channel.channel, 'attach'):
+        channel.subscribe(listener)
+    for i in range(3):
+        client._call(channel.channel._on_message, _message(i))
+
+    assert done.wait(5)
+    assert loops[0] is loops[1] is loops[2]
+    client.close()
+    assert loops[0].is_closed()
+
+
+def test_channels_released_by_the_client_are_dropped():
+    client = AblyRealtimeThreaded('api:key', auto_connect=False, max_channels=2)
+    first = client.channels.get('channel-0')
+    for i in range(1, 200):
+        client.channels.get(f'channel-{i}')
+
+    assert 'channel-0' not in client.channels
+    assert len(client.channels._ThreadedChannels__all) < 70
+
+    # A channel created again gets a ThreadedChannel of its own
+    again = client.channels.get('channel-0')
+    assert again is not first
+    assert again.channel is not first.channel
+    assert client.channels.get('channel-0') is again
+    client.close()
@@ -0,0 +1,126 @@
+import asyncio
+import base64
+import threading
+from unittest import mock
+
+from ably import AblyRealtime
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channelstate import ChannelState
+from ably.types.message import Message
+from ably.types.mixins import DecodingContext
+from ably.types.options import VCDiffDecoder
+
+
+class AppendingVCDiffDecoder(VCDiffDecoder):
+    """Applies a 'delta' by appending it to the base, recording what it was called with"""
+
+    def __init__(self):
+        self.calls = []
+
+    def decode(self, delta: bytes, base: bytes) -> bytes:
+        self.calls.append((delta, base, threading.current_thread()))
+        return base + delta
+
+
+def _delta_message(proto_id, from_id, delta):
+    return {
+        'action': ProtocolMessageAction.MESSAGE,
+        'channel': 'channel',
+        'id': proto_id,
+        'messages': [{
+            'name': proto_id,
+            'data': base64.b64encode(delta).decode('ascii'),
+            'encoding': 'utf-8/vcdiff/base64',
+            'extras': {'delta': {'from': from_id, 'format': 'vcdiff'}},
+        }],
+    }
+
+
+def test_decode_keeps_the_decoded_payload_as_the_next_base():
+    decoder = AppendingVCDiffDecoder()
+    context = DecodingContext(base_payload=b'base', last_message_id='m:0', vcdiff_decoder=decoder)
+
+    first = Message.decode(base64.b64encode(b'-1'), 'vcdiff/base64', context=context)
+    first_base = context.base_payload
+    second = Message.decode(base64.b64encode(b'-2'), 'utf-8/vcdiff/base64', context=context)
+
+    # Binary data is still returned as a bytearray, while the base is passed on without a copy
+    assert first['data'] == bytearray(b'base-1')
+    assert type(first['data']) is bytearray
+    assert decoder.calls[1][1] is first_base
+    assert second['data'] == 'base-1-2'
+    assert all(type(delta) is bytes and type(base) is bytes for delta, base, _ in decoder.calls)
+
+
+async def test_large_deltas_are_decoded_in_a_thread_and_delivered_in_order():
+    decoder = AppendingVCDiffDecoder()
+    ably = AblyRealtime('api:key', auto_connect=False, vcdiff_decoder=decoder, vcdiff_thread_threshold=20)
+    channel = ably.channels.get('channel')
+    received = []
+
+    def listener(message):
+        received.append(message.data)
+
+    with mock.patch.object(channel, 'attach'):
+        await channel.subscribe(listener)
+
+    channel._on_message({
+        'action': ProtocolMessageAction.MESSAGE, 'channel': 'channel', 'id': 'p0',
+        'messages': [{'name': 'p0', 'data': 'base'}],
+    })
+    channel._on_message(_delta_message('p1', 'p0:0', b'-small'))
+    channel._on_message(_delta_message('p2', 'p1:0', b'-large' * 4))
+    channel._on_message(_delta_message('p3', 'p2:0', b'-next'))
+
+    assert received == ['base', 'base-small']
+    await asyncio.sleep(0.05)
+
+    assert received == ['base', 'base-small', 'base-small' + '-large' * 4, 'base-small' + '-large' * 4 + '-next']
+    main_thread = threading.current_thread()
+    assert [thread is main_thread for _, _, thread in decoder.calls] == [True, False, False]
+
+    await ably.close()
+
+
+async def test_messages_queued_before_a_detach_are_discarded():
+    decoding = threading.Event()
+    release = threading.Event()
+
+    class BlockingVCDiffDecoder(AppendingVCDiffDecoder):
+        def decode(self, delta, base):
+            decoding.set()
+            release.wait(5)
+            return super().decode(delta, base)
+
+    ably = AblyRealtime('api:key', auto_connect=False, vcdiff_decoder=BlockingVCDiffDecoder(),
+                       vcdiff_thread_threshold=20)
+    channel = ably.channels.get('channel')
+    received = []
+
+    def listener(message):
+        received.append(message.data)
+
+    with mock.patch.object(channel, 'attach'):
+        await channel.subscribe(listener)
+    channel._notify_state(ChannelState.ATTACHED)
+
+    channel._on_message({
+        'action': ProtocolMessageAction.MESSAGE, 'channel': 'channel', 'id': 'p0', 'channelSerial': 's0',
+        'messages': [{'name': 'p0', 'data': 'base'}],
+    })
+    large = _delta_message('p1', 'p0:0', b'-large' * 4)
+    large['channelSerial'] = 's1'
+    channel._on_message(large)
+    channel._on_message(_delta_message('p2', 'p1:0', b'-next'))
+    await asyncio.get_running_loop().run_in_executor(None, decoding.wait, 5)
+
+    # The server detaches the channel while the large delta is being decoded
+    channel._on_message({'action': ProtocolMessageAction.DETACHED, 'channel': 'channel'})
+    release.set()
+    await asyncio.sleep(0.05)
+
+    assert channel.state == ChannelState.ATTACHING
+    assert received == ['base']
+    assert channel._channel_serial == 's0'
+
+    await ably.close()
@@ -0,0 +1,103 @@
+import json
+from unittest import mock
+
+import pytest
+
+from ably import AblyRealtime, AblyVCDiffDecoder, AblyVCDiffEncoder
+from ably.realtime.connection import ConnectionState
+from ably.transport.websockettransport import ProtocolMessageAction
+from ably.types.channelstate import ChannelState
+from ably.util.exceptions import AblyException
+
+
+def _document(version):
+    return {'version': version, 'items': [{'id': i, 'name': f'item {i}'} for i in range(200)]}
+
+
+def _publishing_channel(**kwargs):
+    ably = AblyRealtime('api:key', auto_connect=False, vcdiff_encoder=AblyVCDiffEncoder(), **kwargs)
+    connection_manager = ably.connection.connection_manager
+    connection_manager._ConnectionManager__state = ConnectionState.CONNECTED
+    ably.connection.state = ConnectionState.CONNECTED
+    sent = []
+
+    async def send_protocol_message(msg):
+        sent.append(msg)
+
+    connection_manager.send_protocol_message = send_protocol_message
+    channel = ably.channels.get('channel')
+    channel._notify_state(ChannelState.ATTACHED)
+    return ably, channel, sent
+
+
+def test_encoder_output_is_decodable():
+    encoder = AblyVCDiffEncoder()
+    decoder = AblyVCDiffDecoder()
+    base = json.dumps(_document(1)).encode()
+    cases = [
+        (json.dumps(_document(2)).encode(), base),
+        (b'unrelated', base),
+        (b'', base),
+        (b'no base', b''),
+        (base + base, base),
+    ]
+
+    for target, base in cases:
+        assert decoder.decode(encoder.encode(target, base), base) == target
+
+    assert len(encoder.encode(json.dumps(_document(2)).encode(), base)) < 100
+
+
+@pytest.mark.parametrize('use_binary_protocol', [True, False])
+async def test_publish_sends_deltas_that_subscribers_decode(use_binary_protocol):
+    ably, channel, sent = _publishing_channel(use_binary_protocol=use_binary_protocol)
+
+    await channel.publish('state', _document(1))
+    await channel.publish('state', _document(2))
+    await channel.publish('state', 'unrelated')
+
+    first, second, third = (msg['messages'][0] for msg in sent)
+    assert 'vcdiff' not in first.get('encoding', '')
+    assert second['encoding'].startswith('json/vcdiff')
+    assert second['extras']['delta'] == {'from': first['id'], 'format': 'vcdiff'}
+    # Not smaller as a delta, so sent in full
+    assert (third['data'], 'extras' in third) == ('unrelated', False)
+
+    subscriber = AblyRealtime('api:key', auto_connect=False, vcdiff_decoder=AblyVCDiffDecoder())
+    subscribed = subscriber.channels.get('channel')
+    received = []
+
+    def listener(message):
+        received.append(message.data)
+
+    with mock.patch.object(subscribed, 'attach'):
+        await subscribed.subscribe(listener)
+    for msg in sent:
+        subscribed._on_message({**msg, 'action': ProtocolMessageAction.MESSAGE})
+
+    assert received == [_document(1), _document(2), 'unrelated']
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()
+    await subscriber.close()
+
+
+async def test_publish_sends_full_payload_after_a_failed_publish():
+    ably, channel, sent = _publishing_channel()
+    await channel.publish('state', _document(1))
+
+    send_protocol_message = ably.connection.connection_manager.send_protocol_message
+    nack = AblyException('nack', 400, 40000)
+    ably.connection.connection_manager.send_protocol_message = mock.AsyncMock(side_effect=nack)
+    try:
+        await channel.publish('state', _document(2))
+    except AblyException:
+        pass
+    ably.connection.connection_manager.send_protocol_message = send_protocol_message
+
+    await channel.publish('state', _document(3))
+
+    assert 'extras' not in sent[-1]['messages'][0]
+
+    ably.channels._attach_scheduler.clear()
+    await ably.close()